@@ -0,0 +1,97 @@
+"""Sustained per-camera FPS of the capture backends as the camera count grows.
+
+Usage:
+    python benchmarks/capture_scaling.py [SOURCE ...] [--synthetic 8] [--size 1920x1080] [--fps 60]
+                                         [--backend thread|process|both]
+
+Sources are camera indices, video files (one distinct path per simulated
+camera; bare paths are read as fast as they decode, file:PATH at the file's
+own rate) or synthetic:WIDTHxHEIGHT@FPS specs. --synthetic adds that many
+generated cameras, so the numbers can be reproduced without webcams. The GUI
+process is simulated by a consumer loop that colour-converts every new
+frame, so GIL contention shows up in the numbers.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.camera_manager import CameraManager
+from core.process_capture import ProcessCameraManager
+from core.sources import synthetic_sources
+
+def parse_source(source):
+    return int(source) if source.isdigit() else source
+
+def run(backend, sources, duration, cameras_per_process):
+    if backend == "process":
+        manager = ProcessCameraManager(cameras_per_process=cameras_per_process)
+    else:
+        manager = CameraManager()
+
+    camera_ids = []
+    for camera_id, source in enumerate(sources):
+        if source in sources[:camera_id] or not manager.add_camera(camera_id, source=source):
+            print(f"  could not add source {source!r}, skipping")
+            continue
+        camera_ids.append(camera_id)
+
+    consumed = {camera_id: 0 for camera_id in camera_ids}
+    last_seqs = {}
+    manager.start_capture()
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < duration:
+            refs = manager.get_frames_since(last_seqs)
+            if not refs:
+                time.sleep(0.001)
+                continue
+            for camera_id, ref in refs.items():
+                last_seqs[camera_id] = ref.seq
+                if ref.frame is not None:
+                    cv2.cvtColor(ref.frame, cv2.COLOR_BGR2RGB)  # Stand-in for UI work
+                    consumed[camera_id] += 1
+        elapsed = time.monotonic() - start
+        stats = manager.get_camera_stats()
+    finally:
+        manager.stop_capture()
+
+    capture_fps = [stats[camera_id].fps for camera_id in camera_ids]
+    consumed_fps = [consumed[camera_id] / elapsed for camera_id in camera_ids]
+    dropped = sum(stats[camera_id].dropped_frames for camera_id in camera_ids)
+    return capture_fps, consumed_fps, dropped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help="camera indices, video files or source specs")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of generated cameras to add")
+    parser.add_argument("--size", default="1920x1080", help="frame size of generated cameras as WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=60.0, help="frame rate of generated cameras")
+    parser.add_argument("--backend", choices=("thread", "process", "both"), default="both")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per measurement")
+    parser.add_argument("--cameras-per-process", type=int, default=1)
+    args = parser.parse_args()
+
+    sources = [parse_source(source) for source in args.sources]
+    width, height = (int(value) for value in args.size.split("x"))
+    sources += synthetic_sources(args.synthetic, width, height, args.fps).values()
+    if not sources:
+        parser.error("give at least one source or --synthetic COUNT")
+    backends = ("thread", "process") if args.backend == "both" else (args.backend,)
+
+    print(f"{'backend':<8} {'cams':>4} {'capture fps/cam':>16} {'min':>7} {'consumed fps/cam':>17} {'dropped':>8}")
+    for backend in backends:
+        for count in range(1, len(sources) + 1):
+            capture_fps, consumed_fps, dropped = run(backend, sources[:count], args.duration,
+                                                     args.cameras_per_process)
+            if not capture_fps:
+                continue
+            print(f"{backend:<8} {len(capture_fps):>4} {sum(capture_fps) / len(capture_fps):>16.1f} "
+                  f"{min(capture_fps):>7.1f} {sum(consumed_fps) / len(consumed_fps):>17.1f} {dropped:>8}")
+
+if __name__ == "__main__":
+    main()
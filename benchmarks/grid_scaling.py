@@ -0,0 +1,118 @@
+"""GUI-thread cost of the video grid as the camera count grows.
+
+Usage:
+    python benchmarks/grid_scaling.py [--max-cameras 16] [--fps 30] [--size 1920x1080]
+
+Synthetic frames are pushed through FrameNotifier into VideoGrid, as
+capture does, once with one widget per feed and once with the composited
+canvas. Reported per second of wall time:
+
+    GUI CPU     CPU time of the GUI thread over the whole event loop, Qt's
+                own repaint and backing-store work included
+    handlers    wall time spent in frame delivery and paint handlers; where
+                there are fewer cores than busy threads this includes time
+                the GUI thread waits for the scaler thread or the GIL
+    paints      paint events of the grid's widgets
+    ticks       frame deliveries from FrameNotifier
+
+Runs headless with QT_QPA_PLATFORM=offscreen, which has no real display to
+flush to.
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+from core.frames import FrameRef
+from ui.frame_notifier import FrameNotifier
+from ui.video_grid import CompositeView, FeedWidget, VideoGrid
+
+def timed(function, busy):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            busy[0] += time.perf_counter() - start
+    return wrapper
+
+def run(app, cameras, composite, fps, size, duration):
+    busy = [0.0]
+    painted = [0]
+    original_paints = (CompositeView.paintEvent, FeedWidget.paintEvent)
+
+    def counted(paint):
+        def wrapper(widget, event):
+            painted[0] += 1
+            return paint(widget, event)
+        return timed(wrapper, busy)
+    CompositeView.paintEvent = counted(original_paints[0])
+    FeedWidget.paintEvent = counted(original_paints[1])
+
+    grid = VideoGrid(composite_from=1 if composite else cameras + 1)
+    grid.setup_grid(cameras)
+    grid.resize(1600, 900)
+    grid.show()
+    notifier = FrameNotifier(max_fps=60)
+    notifier.frames_ready.connect(timed(
+        lambda refs: [grid.update_feed(camera_idx, ref.frame, ref.pixel_format) for camera_idx, ref in refs.items()],
+        busy))
+    grid.scaler.image_ready.disconnect()
+    grid.scaler.image_ready.connect(timed(grid.show_scaled_frame, busy))
+
+    width, height = size
+    frames = [np.random.randint(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(cameras)]
+    stop = threading.Event()
+
+    def produce(camera_idx):
+        seq = 0
+        while not stop.wait(1.0 / fps):
+            seq += 1
+            notifier.post(camera_idx, FrameRef(seq, time.monotonic(), frames[camera_idx]))
+
+    producers = [threading.Thread(target=produce, args=(camera_idx,), daemon=True) for camera_idx in range(cameras)]
+    for producer in producers:
+        producer.start()
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    start = time.monotonic()
+    cpu_start = time.thread_time()
+    app.exec()
+    cpu = time.thread_time() - cpu_start
+    elapsed = time.monotonic() - start
+    stop.set()
+    for producer in producers:
+        producer.join()
+    grid.stop()
+    grid.deleteLater()
+    CompositeView.paintEvent, FeedWidget.paintEvent = original_paints
+    return cpu / elapsed * 1000, busy[0] / elapsed * 1000, painted[0] / elapsed, notifier.get_stats().display_fps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-cameras", type=int, default=16)
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of every synthetic camera")
+    parser.add_argument("--size", default="1920x1080", help="frame size as WIDTHxHEIGHT")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measurement")
+    args = parser.parse_args()
+    size = tuple(int(value) for value in args.size.split("x"))
+
+    app = QApplication(sys.argv[:1])
+    print(f"{'mode':<10} {'cams':>4} {'GUI CPU ms/s':>12} {'handlers ms/s':>13} {'paints/s':>9} {'ticks/s':>8}")
+    for count in (1, 2, 4, 6, 9, 12, 16):
+        if count > args.max_cameras:
+            break
+        for composite in (False, True):
+            cpu, busy, paints, ticks = run(app, count, composite, args.fps, size, args.duration)
+            mode = "composite" if composite else "widgets"
+            print(f"{mode:<10} {count:>4} {cpu:>12.1f} {busy:>13.1f} {paints:>9.1f} {ticks:>8.1f}")
+
+if __name__ == "__main__":
+    main()
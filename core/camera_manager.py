@@ -1,48 +1,168 @@
-import cv2
 import logging
 import threading
 import time
+from collections import deque
+from dataclasses import dataclass
+
+from .frames import FrameSlot, PixelFormat
+from .sources import open_source
+from utils.time_sync import SynchronizedCapture
 
 logger = logging.getLogger(__name__)
 
+CAPTURE_MODES = ("per_camera", "round_robin", "synchronized")
+
+@dataclass
+class CameraStats:
+    camera_idx: int
+    fps: float = 0.0
+    frames_read: int = 0
+    dropped_frames: int = 0   # Frames overwritten before any consumer fetched them
+    failed_reads: int = 0
+    read_latency_ms: float = 0.0
+    mean_read_latency_ms: float = 0.0
+    max_read_latency_ms: float = 0.0
+
+def probe_pixel_format(cap):
+    """Read one frame to find out whether the capture delivers decoded BGR or raw MJPEG"""
+    ret, frame = cap.read()
+    if ret and frame is not None and frame.ndim < 3 and frame.size > 2 and \
+            frame.reshape(-1)[0] == 0xFF and frame.reshape(-1)[1] == 0xD8:
+        return PixelFormat.MJPEG
+    return PixelFormat.BGR
+
+class CameraWorker:
+    """Reads a single camera and publishes the latest frame into its own slot"""
+    def __init__(self, camera_idx, cap, slot=None, on_frame=None, stats_window=120):
+        self.camera_idx = camera_idx
+        self.cap = cap
+        self.on_frame = on_frame  # Called as on_frame(camera_idx, FrameRef) for every captured frame
+        self.running = False
+        self.thread = None
+        self.slot = slot if slot is not None else FrameSlot()
+        self.lock = threading.Lock()   # Guards the counters of this camera only
+        self.frames_read = 0
+        self.failed_reads = 0
+        self.frame_times = deque(maxlen=stats_window)
+        self.read_latencies = deque(maxlen=stats_window)
+
+    def start(self):
+        """Start the worker thread, paced by the device's blocking read"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f"camera-worker-{self.camera_idx}")
+        self.thread.start()
+        logger.debug(f"Started capture worker for camera {self.camera_idx}")
+
+    def stop(self, timeout=1.0):
+        """Stop the worker thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+
+    def _run(self):
+        """Worker loop: no fixed sleep, cap.read() blocks until the camera delivers"""
+        while self.running and self.cap.isOpened():
+            if not self.read_once():
+                time.sleep(0.005)  # Back off briefly on read errors
+
+    def read_once(self):
+        """Read one frame from the camera and publish it, returns True on success"""
+        # Slots that own their memory (e.g. shared-memory rings) let us decode in place
+        next_buffer = getattr(self.slot, "next_buffer", None)
+        start = time.monotonic()
+        if next_buffer is not None:
+            ret, frame = self.cap.read(next_buffer())
+        else:
+            ret, frame = self.cap.read()
+        now = time.monotonic()
+
+        if not ret:
+            logger.warning(f"Failed to read frame from camera {self.camera_idx}")
+        self.publish(frame if ret else None, now, now - start)
+        return ret
+
+    def publish(self, frame, timestamp, read_latency):
+        """Publish a frame read by this worker or by a synchronized capture, None on failure"""
+        ref = self.slot.publish(frame, timestamp)
+        if frame is not None and ref is not None and self.on_frame is not None:
+            self.on_frame(self.camera_idx, ref)
+        with self.lock:
+            self.read_latencies.append(read_latency)
+            if frame is not None:
+                self.frames_read += 1
+                self.frame_times.append(timestamp)
+            else:
+                self.failed_reads += 1
+
+    def get_frame(self):
+        """Get the latest frame from this camera's slot"""
+        ref = self.slot.get()
+        return ref.frame if ref else None
+
+    def get_stats(self):
+        """Get frame rate, drop counters and read latency for this camera"""
+        with self.lock:
+            fps = 0.0
+            if len(self.frame_times) > 1:
+                elapsed = self.frame_times[-1] - self.frame_times[0]
+                if elapsed > 0:
+                    fps = (len(self.frame_times) - 1) / elapsed
+            latencies = list(self.read_latencies)
+            return CameraStats(
+                camera_idx=self.camera_idx,
+                fps=fps,
+                frames_read=self.frames_read,
+                dropped_frames=self.slot.dropped_frames,
+                failed_reads=self.failed_reads,
+                read_latency_ms=latencies[-1] * 1000 if latencies else 0.0,
+                mean_read_latency_ms=sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                max_read_latency_ms=max(latencies) * 1000 if latencies else 0.0,
+            )
+
 class CameraManager:
-    def __init__(self):
-        self.cameras = {}  # Dictionary to store camera captures {camera_idx: cv2.VideoCapture}
-        self.frames = {}   # Dictionary to store latest frames {camera_idx: frame}
+    def __init__(self, capture_mode="per_camera", passthrough=False):
+        if capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode {capture_mode!r}, expected one of {CAPTURE_MODES}")
+        self.capture_mode = capture_mode
+        self.passthrough = passthrough  # Deliver MJPG bitstreams instead of decoded frames
+        self.cameras = {}  # Dictionary to store camera captures {camera_idx: cv2.VideoCapture or source}
+        self.workers = {}  # Dictionary to store per-camera frame slots {camera_idx: CameraWorker}
         self.running = False
         self.capture_thread = None
-        self.lock = threading.Lock()
-        
-    def add_camera(self, camera_idx):
-        """Add a camera to the manager"""
+        self.sync_capture = None
+        self.frame_set = None  # Latest FrameSet in synchronized mode
+        self.frame_listeners = []  # Callbacks pushed every new frame from the capture threads
+        self.lock = threading.Lock()  # Guards camera membership, not frame reads
+
+    def add_camera(self, camera_idx, passthrough=None, source=None):
+        """Add a camera to the manager
+
+        source is anything open_source() accepts (a device, file or synthetic
+        spec, or an opened source); by default camera_idx itself is opened.
+        """
         try:
-            # Use DirectShow backend for better performance on Windows
-            cap = cv2.VideoCapture(camera_idx, cv2.CAP_DSHOW)
-            if cap.isOpened():
-                # Set camera properties in specific order
-                settings = [
-                    (cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G')),  # MJPG format
-                    (cv2.CAP_PROP_FRAME_WIDTH, 1280),
-                    (cv2.CAP_PROP_FRAME_HEIGHT, 720),
-                    (cv2.CAP_PROP_FPS, 60),
-                    (cv2.CAP_PROP_BUFFERSIZE, 1),  # Minimize latency
-                    (cv2.CAP_PROP_AUTOFOCUS, 0),   # Disable autofocus
-                    (cv2.CAP_PROP_AUTO_EXPOSURE, 0.75),  # Auto exposure
-                ]
-                
-                for prop, value in settings:
-                    if not cap.set(prop, value):
-                        logger.warning(f"Failed to set camera property {prop} to {value}")
-                
-                # Verify settings
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                logger.debug(f"Camera {camera_idx} initialized: {width}x{height} @ {fps}fps")
-                
+            if passthrough is None:
+                passthrough = self.passthrough
+            cap = open_source(camera_idx if source is None else source, passthrough)
+            if cap is not None:
+                pixel_format = PixelFormat.BGR
+                if passthrough:
+                    pixel_format = probe_pixel_format(cap)
+                    if pixel_format != PixelFormat.MJPEG:
+                        logger.warning(f"Camera {camera_idx} does not support MJPG passthrough, decoding instead")
+                worker = CameraWorker(camera_idx, cap, slot=FrameSlot(pixel_format),
+                                      on_frame=self._dispatch_frame)
                 with self.lock:
                     self.cameras[camera_idx] = cap
-                    self.frames[camera_idx] = None
+                    self.workers[camera_idx] = worker
+
+                # Cameras added while capturing start straight away
+                if self.running and self.capture_mode == "per_camera":
+                    worker.start()
                 return True
             else:
                 logger.error(f"Failed to open camera {camera_idx}")
@@ -50,49 +170,159 @@ class CameraManager:
         except Exception as e:
             logger.error(f"Error adding camera {camera_idx}: {str(e)}")
             return False
-            
+
     def start_capture(self):
         """Start capturing from all cameras"""
         if not self.running:
             self.running = True
-            self.capture_thread = threading.Thread(target=self._capture_loop)
-            self.capture_thread.daemon = True
-            self.capture_thread.start()
-            logger.debug("Started camera capture thread")
-            
+            if self.capture_mode == "per_camera":
+                with self.lock:
+                    workers = list(self.workers.values())
+                for worker in workers:
+                    worker.start()
+            else:
+                if self.capture_mode == "synchronized":
+                    with self.lock:
+                        self.sync_capture = SynchronizedCapture(self.cameras)
+                    target = self._synchronized_capture_loop
+                else:
+                    target = self._capture_loop
+                self.capture_thread = threading.Thread(target=target)
+                self.capture_thread.daemon = True
+                self.capture_thread.start()
+                logger.debug("Started camera capture thread")
+
     def stop_capture(self):
         """Stop capturing from all cameras"""
         self.running = False
         if self.capture_thread:
             self.capture_thread.join()
-        
+            self.capture_thread = None
+        if self.sync_capture:
+            self.sync_capture.close()
+            self.sync_capture = None
+
+        with self.lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.stop()
+
         # Release all cameras
         with self.lock:
             for cap in self.cameras.values():
                 cap.release()
             self.cameras.clear()
-            self.frames.clear()
+            self.workers.clear()
+            self.frame_set = None
         logger.debug("Stopped all cameras")
-            
+
     def _capture_loop(self):
-        """Main capture loop for all cameras"""
+        """Round-robin capture loop for all cameras"""
         while self.running:
             with self.lock:
-                for camera_idx, cap in self.cameras.items():
-                    if cap.isOpened():
-                        ret, frame = cap.read()
-                        if ret:
-                            self.frames[camera_idx] = frame
-                        else:
-                            logger.warning(f"Failed to read frame from camera {camera_idx}")
-                            self.frames[camera_idx] = None
+                workers = list(self.workers.values())
+            for worker in workers:
+                if worker.cap.isOpened():
+                    worker.read_once()
             time.sleep(0.016)  # ~60 FPS
-            
+
+    def _synchronized_capture_loop(self):
+        """Grab all cameras back to back, then decode them in parallel; paced by the devices"""
+        while self.running:
+            with self.lock:
+                workers = dict(self.workers)
+                if set(self.sync_capture.caps) != set(self.cameras):
+                    # Cameras were added while capturing
+                    self.sync_capture.close()
+                    self.sync_capture = SynchronizedCapture(self.cameras)
+                sync_capture = self.sync_capture
+            if not sync_capture.caps:
+                time.sleep(0.01)
+                continue
+
+            frame_set = sync_capture.capture()
+            for camera_idx, frame in frame_set.frames.items():
+                worker = workers.get(camera_idx)
+                if worker:
+                    timestamp = frame_set.timestamps.get(camera_idx, time.monotonic())
+                    worker.publish(frame, timestamp, frame_set.read_latencies.get(camera_idx, 0.0))
+            self.frame_set = frame_set
+            if not any(frame is not None for frame in frame_set.frames.values()):
+                time.sleep(0.005)  # Back off briefly when every camera failed
+
+    def add_frame_listener(self, callback):
+        """Push every new frame to callback(camera_idx, FrameRef) from the capture threads.
+
+        Callbacks run on the capture thread of the camera, so they must be quick
+        (e.g. enqueue) or they slow that camera down.
+        """
+        with self.lock:
+            self.frame_listeners = self.frame_listeners + [callback]
+
+    def remove_frame_listener(self, callback):
+        """Stop pushing frames to a callback registered with add_frame_listener"""
+        with self.lock:
+            self.frame_listeners = [listener for listener in self.frame_listeners if listener != callback]
+
+    def _dispatch_frame(self, camera_idx, ref):
+        for listener in self.frame_listeners:
+            try:
+                listener(camera_idx, ref)
+            except Exception as e:
+                logger.error(f"Frame listener failed for camera {camera_idx}: {str(e)}")
+
+    def get_frame_set(self):
+        """Get the latest synchronized FrameSet (frames, grab timestamps and skew), if any"""
+        return self.frame_set
+
+    def get_pixel_format(self, camera_idx):
+        """Layout of the frames a camera delivers"""
+        worker = self.workers.get(camera_idx)
+        return worker.slot.pixel_format if worker else PixelFormat.BGR
+
+    def get_sync_stats(self):
+        """Get inter-camera skew statistics for synchronized capture, None in other modes"""
+        sync_capture = self.sync_capture
+        return sync_capture.get_skew_stats() if sync_capture else None
+
     def get_frames(self):
-        """Get the latest frames from all cameras"""
+        """Get the latest frames from all cameras (read-only views, no copies)"""
+        with self.lock:
+            workers = list(self.workers.items())
+        return {camera_idx: worker.get_frame() for camera_idx, worker in workers}
+
+    def get_frame(self, camera_idx):
+        """Get the latest frame from a single camera"""
+        worker = self.workers.get(camera_idx)
+        return worker.get_frame() if worker else None
+
+    def get_frame_ref(self, camera_idx, newer_than=0):
+        """Get (seq, timestamp, frame) for a camera if its sequence number is above newer_than"""
+        worker = self.workers.get(camera_idx)
+        return worker.slot.get_if_newer(newer_than) if worker else None
+
+    def get_frames_since(self, last_seqs):
+        """Get frame refs only for cameras that published after the given {camera_idx: seq}"""
+        with self.lock:
+            workers = list(self.workers.items())
+        refs = {}
+        for camera_idx, worker in workers:
+            ref = worker.slot.get_if_newer(last_seqs.get(camera_idx, 0))
+            if ref is not None:
+                refs[camera_idx] = ref
+        return refs
+
+    def get_camera_stats(self):
+        """Get per-camera frame rate, drop counters and read latency"""
         with self.lock:
-            return self.frames.copy()
-            
+            workers = list(self.workers.items())
+        return {camera_idx: worker.get_stats() for camera_idx, worker in workers}
+
+    def is_camera_connected(self, camera_idx):
+        """Check if a camera is open"""
+        cap = self.cameras.get(camera_idx)
+        return cap is not None and cap.isOpened()
+
     def is_capturing(self):
         """Check if any cameras are capturing"""
         return self.running and bool(self.cameras)
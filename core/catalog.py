@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional
+
+from .frame_index import FRAME_INDEX_DTYPE, FRAME_INDEX_MAGIC, index_path_for
+from .incidents import read_markers
+from .segments import JOURNAL_NAME, SessionJournal, recover_metadata
+
+# Default catalog file, kept in the directory sessions are recorded into
+CATALOG_NAME = "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    start_time REAL,
+    duration REAL DEFAULT 0,
+    format TEXT,
+    status TEXT,                -- recording, complete or recovered
+    camera_count INTEGER DEFAULT 0,
+    total_bytes INTEGER DEFAULT 0,
+    protected INTEGER DEFAULT 0,
+    pixel_rate REAL DEFAULT 0   -- Pixels per second of all cameras together, 0 if unknown
+);
+CREATE TABLE IF NOT EXISTS cameras (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    camera_id INTEGER NOT NULL,
+    frame_count INTEGER DEFAULT 0,
+    duration REAL DEFAULT 0,
+    file_bytes INTEGER DEFAULT 0,
+    PRIMARY KEY (session_id, camera_id)
+);
+CREATE TABLE IF NOT EXISTS markers (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    time REAL NOT NULL,         -- Seconds on the session timeline
+    label TEXT,
+    camera_id INTEGER,          -- NULL when the marker applies to all cameras
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_start_time ON sessions(start_time);
+CREATE INDEX IF NOT EXISTS markers_session ON markers(session_id, time);
+"""
+
+@dataclass
+class SessionRecord:
+    id: int
+    path: str
+    start_time: float
+    duration: float
+    format: str
+    status: str
+    camera_count: int
+    total_bytes: int
+    protected: bool
+    marker_count: int = 0
+    pixel_rate: float = 0.0
+
+@dataclass
+class CameraRecord:
+    camera_id: int
+    frame_count: int
+    duration: float
+    file_bytes: int
+
+@dataclass
+class MarkerRecord:
+    id: int
+    time: float
+    label: str
+    camera_id: Optional[int]
+    created: float
+
+class SessionCatalog:
+    """SQLite index of recorded sessions, their cameras and incident markers.
+
+    Browsing and filtering only touch the database, never the video files.
+    One connection is shared by all threads behind a lock.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = Lock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            self.connection.executescript(_SCHEMA)
+            # Catalogs created before the column existed
+            columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(sessions)")}
+            if "pixel_rate" not in columns:
+                self.connection.execute("ALTER TABLE sessions ADD COLUMN pixel_rate REAL DEFAULT 0")
+
+    def _execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        with self.lock, self.connection:
+            return self.connection.execute(sql, parameters)
+
+    def _query(self, sql: str, parameters=()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def begin_session(self, session_path, start_time: float, recording_format: str,
+                      camera_ids: List[int], status: str = "recording", pixel_rate: float = 0.0) -> int:
+        """Register a session as it starts recording; returns its id.
+
+        pixel_rate is width * height * fps summed over the cameras, so later
+        size projections can scale this session's bytes to other formats.
+        """
+        session_path = str(Path(session_path).resolve())
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO sessions (path, start_time, format, status, camera_count, pixel_rate) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET start_time=excluded.start_time, format=excluded.format, "
+                "status=excluded.status, camera_count=excluded.camera_count, pixel_rate=excluded.pixel_rate",
+                (session_path, start_time, recording_format, status, len(camera_ids), pixel_rate)
+            )
+            session_id = self.connection.execute(
+                "SELECT id FROM sessions WHERE path = ?", (session_path,)).fetchone()["id"]
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO cameras (session_id, camera_id) VALUES (?, ?)",
+                [(session_id, camera_id) for camera_id in camera_ids]
+            )
+        return session_id
+
+    def update_camera(self, session_id: int, camera_id: int, frame_count: int, duration: float, file_bytes: int):
+        """Record a camera's progress, e.g. whenever one of its segments closes."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO cameras (session_id, camera_id, frame_count, duration, file_bytes) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id, camera_id) DO UPDATE SET frame_count=excluded.frame_count, "
+                "duration=excluded.duration, file_bytes=excluded.file_bytes",
+                (session_id, camera_id, frame_count, duration, file_bytes)
+            )
+            self.connection.execute(
+                "UPDATE sessions SET duration = MAX(duration, ?), "
+                "total_bytes = (SELECT COALESCE(SUM(file_bytes), 0) FROM cameras WHERE session_id = ?) WHERE id = ?",
+                (duration, session_id, session_id)
+            )
+
+    def finish_session(self, session_id: int, duration: float, status: str = "complete"):
+        self._execute("UPDATE sessions SET duration = ?, status = ? WHERE id = ?", (duration, status, session_id))
+
+    def session_id(self, session_path) -> Optional[int]:
+        rows = self._query("SELECT id FROM sessions WHERE path = ?", (str(Path(session_path).resolve()),))
+        return rows[0]["id"] if rows else None
+
+    def set_protected(self, session_id: int, protected: bool = True):
+        """Mark a session as one that must never be deleted to free space."""
+        self._execute("UPDATE sessions SET protected = ? WHERE id = ?", (int(protected), session_id))
+
+    def remove_session(self, session_id: int):
+        """Drop a session, its cameras and markers from the catalog (not from disk)."""
+        self._execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def add_marker(self, session_id: int, position: float, label: str = "",
+                   camera_id: Optional[int] = None) -> int:
+        """Index an incident marker at a position on the session timeline."""
+        cursor = self._execute(
+            "INSERT INTO markers (session_id, time, label, camera_id, created) VALUES (?, ?, ?, ?, ?)",
+            (session_id, position, label, camera_id, time.time())
+        )
+        return cursor.lastrowid
+
+    def list_sessions(self, since: Optional[float] = None, until: Optional[float] = None,
+                      min_duration: Optional[float] = None, status: Optional[str] = None,
+                      with_markers: bool = False, path_contains: Optional[str] = None,
+                      limit: int = 1000) -> List[SessionRecord]:
+        """Sessions matching all given filters, newest first."""
+        conditions, parameters = [], []
+        if since is not None:
+            conditions.append("s.start_time >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("s.start_time < ?")
+            parameters.append(until)
+        if min_duration is not None:
+            conditions.append("s.duration >= ?")
+            parameters.append(min_duration)
+        if status is not None:
+            conditions.append("s.status = ?")
+            parameters.append(status)
+        if path_contains:
+            conditions.append("s.path LIKE ?")
+            parameters.append(f"%{path_contains}%")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        having = "HAVING COUNT(m.id) > 0" if with_markers else ""
+        rows = self._query(
+            f"SELECT s.*, COUNT(m.id) AS marker_count FROM sessions s "
+            f"LEFT JOIN markers m ON m.session_id = s.id {where} "
+            f"GROUP BY s.id {having} ORDER BY s.start_time DESC LIMIT ?",
+            parameters + [limit]
+        )
+        return [SessionRecord(row["id"], row["path"], row["start_time"], row["duration"], row["format"],
+                              row["status"], row["camera_count"], row["total_bytes"], bool(row["protected"]),
+                              row["marker_count"], row["pixel_rate"]) for row in rows]
+
+    def get_cameras(self, session_id: int) -> List[CameraRecord]:
+        rows = self._query("SELECT * FROM cameras WHERE session_id = ? ORDER BY camera_id", (session_id,))
+        return [CameraRecord(row["camera_id"], row["frame_count"], row["duration"], row["file_bytes"])
+                for row in rows]
+
+    def get_markers(self, session_id: int) -> List[MarkerRecord]:
+        rows = self._query("SELECT * FROM markers WHERE session_id = ? ORDER BY time", (session_id,))
+        return [MarkerRecord(row["id"], row["time"], row["label"], row["camera_id"], row["created"])
+                for row in rows]
+
+    def index_directory(self, recordings_directory) -> int:
+        """Add sessions recorded before the catalog existed; returns how many were added.
+
+        Only metadata, journals, markers, index sidecars and file sizes are read.
+        """
+        added = 0
+        known = {row["path"] for row in self._query("SELECT path FROM sessions")}
+        for session_path in sorted(Path(recordings_directory).iterdir()):
+            if not session_path.is_dir() or str(session_path.resolve()) in known:
+                continue
+            metadata_path = session_path / "metadata.json"
+            if metadata_path.exists():
+                with open(metadata_path, "r") as f:
+                    metadata = json.load(f)
+            else:
+                metadata = recover_metadata(session_path, SessionJournal.read(session_path / JOURNAL_NAME))
+                if metadata is None:
+                    continue
+            recording_format = metadata.get("format", "mp4")
+            cameras = [int(camera_id) for camera_id in metadata.get("cameras", [])]
+            session_id = self.begin_session(session_path, metadata.get("start_time", 0.0), recording_format,
+                                            cameras, "recovered" if metadata.get("recovered") else "complete")
+            for camera_id in cameras:
+                files = list(session_path.glob(f"camera_{camera_id}.*")) + \
+                    list(session_path.glob(f"camera_{camera_id}_*"))
+                self.update_camera(session_id, camera_id,
+                                   _indexed_frame_count(session_path / f"camera_{camera_id}.{recording_format}"),
+                                   metadata.get("duration", 0.0),
+                                   sum(path.stat().st_size for path in files))
+            for marker in read_markers(session_path):
+                self.add_marker(session_id, marker.time, marker.label, marker.camera_id)
+            self.finish_session(session_id, metadata.get("duration", 0.0),
+                                "recovered" if metadata.get("recovered") else "complete")
+            added += 1
+        return added
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def _indexed_frame_count(video_path) -> int:
+    """Frames listed in a stream's index sidecar, from its size alone; 0 without one."""
+    path = index_path_for(video_path)
+    if not path.exists():
+        return 0
+    return max(0, path.stat().st_size - len(FRAME_INDEX_MAGIC)) // FRAME_INDEX_DTYPE.itemsize
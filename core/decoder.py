@@ -0,0 +1,93 @@
+import logging
+import numpy as np
+from threading import Thread, Condition
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class DecoderWorker:
+    """Decodes the frames of one camera on a dedicated thread.
+
+    It holds at most one request: submit() replaces whatever is pending and
+    returns a ticket to wait on. cancel() preempts the request in flight; the
+    decode function receives a callable that turns True once its request is
+    stale, so long grab runs can stop early, and stale results are discarded.
+    """
+    def __init__(self, camera_id: int,
+                 decode: Callable[[int, Callable[[], bool]], Optional[np.ndarray]]):
+        self.camera_id = camera_id
+        self.decode = decode
+        self.condition = Condition()
+        self.generation = 0
+        self.request: Optional[Tuple[int, int]] = None              # (ticket, frame number)
+        self.result: Optional[Tuple[int, Optional[np.ndarray]]] = None  # (ticket, frame)
+        self.running = False
+        self.thread: Optional[Thread] = None
+
+    def start(self):
+        """Start the decoder thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._decode_loop, daemon=True, name=f"decoder-{self.camera_id}")
+        self.thread.start()
+
+    def stop(self):
+        """Cancel any pending request and stop the decoder thread."""
+        with self.condition:
+            self.running = False
+            self.generation += 1
+            self.request = None
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, frame_number: int) -> int:
+        """Request a frame, superseding any earlier request. Returns the ticket to wait on."""
+        with self.condition:
+            self.generation += 1
+            self.request = (self.generation, frame_number)
+            self.result = None
+            self.condition.notify_all()
+            return self.generation
+
+    def cancel(self):
+        """Preempt the pending or in-flight request; its waiters return at once."""
+        with self.condition:
+            self.generation += 1
+            self.request = None
+            self.result = None
+            self.condition.notify_all()
+
+    def wait(self, ticket: int, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Block until the ticket's frame is decoded; (False, None) if it was cancelled."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.generation != ticket or (self.result is not None and self.result[0] == ticket),
+                timeout
+            )
+            if self.result is not None and self.result[0] == ticket:
+                return True, self.result[1]
+            return False, None
+
+    def _decode_loop(self):
+        """Decoder thread: serve the latest request until stopped."""
+        while True:
+            with self.condition:
+                while self.request is None and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                ticket, frame_number = self.request
+                self.request = None
+
+            try:
+                frame = self.decode(frame_number, lambda: self.generation != ticket)
+            except Exception as e:
+                logger.error(f"Error decoding frame {frame_number} of camera {self.camera_id}: {str(e)}")
+                frame = None
+            with self.condition:
+                if self.generation == ticket:
+                    self.result = (ticket, frame)
+                    self.condition.notify_all()
@@ -0,0 +1,149 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Thread, Condition
+from typing import Callable, Iterable, Optional
+
+from .frames import FrameRef
+
+logger = logging.getLogger(__name__)
+
+# What EncoderWorker.submit does when the queue is full
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+@dataclass
+class EncoderStats:
+    camera_id: int
+    queue_depth: int = 0
+    queue_capacity: int = 0
+    max_queue_depth: int = 0
+    frames_submitted: int = 0
+    frames_encoded: int = 0
+    dropped_frames: int = 0
+    encoded_fps: float = 0.0
+    mean_encode_ms: float = 0.0
+
+class EncoderWorker:
+    """Encodes the frames of one camera on a dedicated thread.
+
+    Frames are pushed in from capture through a bounded queue. When the queue is
+    full the policy decides: "block" applies backpressure to the producer,
+    "drop_oldest" evicts the oldest queued frame and "drop_newest" rejects the
+    incoming one. Every dropped frame is counted.
+    """
+    def __init__(self, camera_id: int, encode: Callable[[FrameRef], None],
+                 queue_size: int = 120, policy: str = "block", stats_window: int = 120):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}, expected one of {QUEUE_POLICIES}")
+        self.camera_id = camera_id
+        self.encode = encode
+        self.policy = policy
+        self.queue_size = max(1, queue_size)
+        self.queue = deque()
+        self.backlog = deque()  # Frames captured before start(), encoded first and not subject to the limit
+        self.condition = Condition()
+        self.running = False
+        self.thread: Optional[Thread] = None
+        self.frames_submitted = 0
+        self.frames_encoded = 0
+        self.dropped_frames = 0
+        self.max_queue_depth = 0
+        self.encode_times = deque(maxlen=stats_window)
+        self.encode_durations = deque(maxlen=stats_window)
+
+    def start(self, backlog: Iterable[FrameRef] = ()):
+        """Start the encoder thread, encoding the backlog frames (e.g. a pre-roll) before any submitted ones.
+
+        The backlog does not count against the queue size, so it never makes
+        submit() block or drop live frames on its own.
+        """
+        if self.running:
+            return
+        self.backlog.extend(backlog)
+        self.frames_submitted += len(self.backlog)
+        self.running = True
+        self.thread = Thread(target=self._encode_loop, daemon=True, name=f"encoder-{self.camera_id}")
+        self.thread.start()
+
+    def stop(self):
+        """Encode everything still queued, then stop the encoder thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, ref: FrameRef) -> bool:
+        """Queue a frame for encoding, returns False if a frame was dropped instead."""
+        with self.condition:
+            if not self.running:
+                return False
+            self.frames_submitted += 1
+            if len(self.queue) >= self.queue_size:
+                if self.policy == "drop_newest":
+                    self.dropped_frames += 1
+                    return False
+                if self.policy == "drop_oldest":
+                    self.queue.popleft()
+                    self.dropped_frames += 1
+                else:
+                    while len(self.queue) >= self.queue_size and self.running:
+                        self.condition.wait()
+                    if not self.running:
+                        self.dropped_frames += 1
+                        return False
+            self.queue.append(ref)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+            self.condition.notify_all()
+            return True
+
+    def _encode_loop(self):
+        """Encoder thread: drain the queue until stopped and empty."""
+        while True:
+            with self.condition:
+                if self.backlog:
+                    ref = self.backlog.popleft()
+                else:
+                    while not self.queue and self.running:
+                        self.condition.wait()
+                    if not self.queue:
+                        return
+                    ref = self.queue.popleft()
+                    self.condition.notify_all()  # Wake producers blocked on a full queue
+
+            start = time.monotonic()
+            try:
+                self.encode(ref)
+            except Exception as e:
+                logger.error(f"Error encoding frame {ref.seq} of camera {self.camera_id}: {str(e)}")
+                with self.condition:
+                    self.dropped_frames += 1
+                continue
+            now = time.monotonic()
+            with self.condition:
+                self.frames_encoded += 1
+                self.encode_times.append(now)
+                self.encode_durations.append(now - start)
+
+    def get_stats(self) -> EncoderStats:
+        """Queue depth, encoded FPS and drop counters for this camera."""
+        with self.condition:
+            encoded_fps = 0.0
+            if len(self.encode_times) > 1:
+                elapsed = self.encode_times[-1] - self.encode_times[0]
+                if elapsed > 0:
+                    encoded_fps = (len(self.encode_times) - 1) / elapsed
+            durations = self.encode_durations
+            return EncoderStats(
+                camera_id=self.camera_id,
+                queue_depth=len(self.queue) + len(self.backlog),
+                queue_capacity=self.queue_size,
+                max_queue_depth=self.max_queue_depth,
+                frames_submitted=self.frames_submitted,
+                frames_encoded=self.frames_encoded,
+                dropped_frames=self.dropped_frames,
+                encoded_fps=encoded_fps,
+                mean_encode_ms=sum(durations) / len(durations) * 1000 if durations else 0.0,
+            )
@@ -0,0 +1,179 @@
+import logging
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Thread, Lock, Event
+from typing import Callable, Optional
+
+from .frame_index import FrameIndex, seek_capture
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    entries: int = 0
+    memory_bytes: int = 0
+    budget_bytes: int = 0
+    evictions: int = 0
+
+class FrameCache:
+    """LRU cache of decoded frames of one camera, keyed by frame number, under a byte budget."""
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.frames: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, frame_number: int) -> Optional[np.ndarray]:
+        """Cached frame, counted as a hit or miss and marked most recently used."""
+        with self.lock:
+            frame = self.frames.get(frame_number)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.frames.move_to_end(frame_number)
+            self.hits += 1
+            return frame
+
+    def contains(self, frame_number: int) -> bool:
+        """Check for a frame without touching the statistics or the LRU order."""
+        with self.lock:
+            return frame_number in self.frames
+
+    def put(self, frame_number: int, frame: np.ndarray):
+        """Cache a frame (read-only, so consumers cannot corrupt it) and evict LRU entries over budget."""
+        if frame.nbytes > self.budget_bytes:
+            return
+        frame.flags.writeable = False
+        with self.lock:
+            previous = self.frames.pop(frame_number, None)
+            if previous is not None:
+                self.memory_bytes -= previous.nbytes
+            self.frames[frame_number] = frame
+            self.memory_bytes += frame.nbytes
+            while self.memory_bytes > self.budget_bytes:
+                _, evicted = self.frames.popitem(last=False)
+                self.memory_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def capacity_frames(self, frame_bytes: int) -> int:
+        """How many frames of the given size fit in the budget."""
+        return self.budget_bytes // frame_bytes if frame_bytes else 0
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.memory_bytes = 0
+
+    def get_stats(self) -> CacheStats:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                hit_rate=self.hits / lookups if lookups else 0.0,
+                entries=len(self.frames),
+                memory_bytes=self.memory_bytes,
+                budget_bytes=self.budget_bytes,
+                evictions=self.evictions,
+            )
+
+class ReadAheadWorker:
+    """Background decoder that keeps the frames around a camera's playhead cached.
+
+    It decodes with its own capture so it never contends with playback for a
+    decoder, and fills the window in contiguous runs: sequential decoding is
+    what long-GOP streams are cheap at. The forward side of the window is
+    filled first, then the frames behind the playhead for reverse stepping.
+    """
+    def __init__(self, camera_id: int, open_capture: Callable[[], object], cache: FrameCache,
+                 frame_index: Optional[FrameIndex], frame_count: int,
+                 behind: int = 120, ahead: int = 60):
+        self.camera_id = camera_id
+        self.open_capture = open_capture
+        self.cache = cache
+        self.frame_index = frame_index
+        self.frame_count = frame_count
+        self.behind = behind
+        self.ahead = ahead
+        self.playhead = 0
+        self.playhead_changed = Event()
+        self.running = False
+        self.thread: Optional[Thread] = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._run, daemon=True, name=f"read-ahead-{self.camera_id}")
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.playhead_changed.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def set_playhead(self, frame_number: int):
+        """Move the window; an in-progress run is abandoned at the next frame."""
+        if frame_number != self.playhead:
+            self.playhead = frame_number
+            self.playhead_changed.set()
+
+    def _window(self, frame_bytes: int):
+        """Forward and backward ranges to keep cached, shrunk to fit the cache budget."""
+        behind, ahead = self.behind, self.ahead
+        capacity = int(self.cache.capacity_frames(frame_bytes) * 0.8) if frame_bytes else behind + ahead
+        if behind + ahead > capacity:
+            scale = capacity / float(behind + ahead)
+            behind, ahead = int(behind * scale), int(ahead * scale)
+        playhead = self.playhead
+        last = self.frame_count - 1
+        return [(playhead, min(last, playhead + ahead)), (max(0, playhead - behind), playhead - 1)]
+
+    def _run(self):
+        cap = self.open_capture()
+        if cap is None or not cap.isOpened():
+            logger.error(f"Read-ahead could not open camera {self.camera_id}")
+            return
+        position = -1  # Frame number cap.read() returns next, -1 if unknown
+        frame_bytes = 0
+        try:
+            while self.running:
+                self.playhead_changed.clear()
+                decoded_any = False
+                for start, end in self._window(frame_bytes):
+                    missing = next((n for n in range(start, end + 1) if not self.cache.contains(n)), None)
+                    if missing is None:
+                        continue
+                    if position != missing:
+                        seek_capture(cap, self.frame_index, missing)
+                        position = missing
+                    for frame_number in range(missing, end + 1):
+                        if not self.running or self.playhead_changed.is_set():
+                            break
+                        if self.cache.contains(frame_number):
+                            ok = cap.grab()
+                        else:
+                            ok, frame = cap.read()
+                            if ok:
+                                self.cache.put(frame_number, frame)
+                                frame_bytes = frame.nbytes
+                                decoded_any = True
+                        if not ok:
+                            position = -1
+                            break
+                        position = frame_number + 1
+                    if self.playhead_changed.is_set():
+                        break
+                if not decoded_any and not self.playhead_changed.is_set():
+                    self.playhead_changed.wait(0.1)
+        finally:
+            cap.release()
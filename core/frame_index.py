@@ -0,0 +1,236 @@
+import cv2
+import logging
+import struct
+import numpy as np
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fixed-size little-endian record per frame, after an 8 byte magic header
+FRAME_INDEX_MAGIC = b"VARIDX1\0"
+FRAME_INDEX_DTYPE = np.dtype([
+    ("frame", "<u4"),       # Frame number within the stream
+    ("timestamp", "<f8"),   # Capture time in seconds since the recording started
+    ("offset", "<i8"),      # Byte offset of the frame in its file (segment), -1 if not known
+    ("size", "<u4"),        # Compressed size in bytes, 0 if unknown
+    ("keyframe", "u1"),     # 1 if the frame can be decoded on its own
+])
+
+def index_path_for(video_path) -> Path:
+    """Sidecar index next to a recorded stream, e.g. camera_0.mp4 -> camera_0.idx"""
+    return Path(video_path).with_suffix(".idx")
+
+def _mp4_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Dict[bytes, Tuple[int, int]]:
+    """First box of each type directly inside data[start:end], as type: (payload start, end)."""
+    end = len(data) if end is None else end
+    boxes = {}
+    while start + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, start)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", data, start + 8)[0], 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            break
+        boxes.setdefault(kind, (start + header, min(start + size, end)))
+        start += size
+    return boxes
+
+def mp4_sample_table(path) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Byte offset, size and keyframe flag of every video sample in an mp4 file.
+
+    Read from the sample table of the first video track (stsz, stsc,
+    stco/co64 and stss), so the flags are what the encoder actually
+    produced. Returns None if the file has no readable video track, e.g.
+    while its moov atom has not been written yet.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    moov = _mp4_boxes(data).get(b"moov")
+    if moov is None:
+        return None
+    start, end = moov
+    while start < end:
+        size, kind = struct.unpack_from(">I4s", data, start)
+        if size < 8:
+            return None
+        if kind == b"trak":
+            mdia = _mp4_boxes(data, start + 8, start + size).get(b"mdia")
+            boxes = _mp4_boxes(data, *mdia) if mdia else {}
+            handler = boxes.get(b"hdlr")
+            if handler and data[handler[0] + 8:handler[0] + 12] == b"vide" and b"minf" in boxes:
+                stbl = _mp4_boxes(data, *boxes[b"minf"]).get(b"stbl")
+                if stbl is not None:
+                    return _sample_table(data, _mp4_boxes(data, *stbl))
+        start += size
+    return None
+
+def _sample_table(data: bytes, stbl: Dict[bytes, Tuple[int, int]]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    if b"stsz" not in stbl or b"stsc" not in stbl or not (b"stco" in stbl or b"co64" in stbl):
+        return None
+    # Full boxes: 1 byte version and 3 bytes flags before the fields
+    position = stbl[b"stsz"][0] + 4
+    uniform_size, count = struct.unpack_from(">II", data, position)
+    if uniform_size:
+        sizes = np.full(count, uniform_size, dtype=np.int64)
+    else:
+        sizes = np.frombuffer(data, ">u4", count, position + 8).astype(np.int64)
+    if b"co64" in stbl:
+        position = stbl[b"co64"][0] + 4
+        chunk_offsets = np.frombuffer(data, ">u8", struct.unpack_from(">I", data, position)[0], position + 4)
+    else:
+        position = stbl[b"stco"][0] + 4
+        chunk_offsets = np.frombuffer(data, ">u4", struct.unpack_from(">I", data, position)[0], position + 4)
+    position = stbl[b"stsc"][0] + 4
+    entries = np.frombuffer(data, ">u4", 3 * struct.unpack_from(">I", data, position)[0],
+                            position + 4).reshape(-1, 3).astype(np.int64)
+
+    # Samples run back to back inside a chunk; stsc gives samples per chunk in runs of chunks
+    offsets = np.empty(count, dtype=np.int64)
+    sample = 0
+    for run, (first_chunk, samples_per_chunk, _) in enumerate(entries):
+        last_chunk = entries[run + 1][0] - 1 if run + 1 < len(entries) else len(chunk_offsets)
+        for chunk in range(first_chunk - 1, last_chunk):
+            chunk_sizes = sizes[sample:sample + samples_per_chunk]
+            offsets[sample:sample + len(chunk_sizes)] = int(chunk_offsets[chunk]) + np.concatenate(
+                ([0], np.cumsum(chunk_sizes)[:-1]))
+            sample += len(chunk_sizes)
+    if sample != count:
+        return None
+
+    if b"stss" in stbl:
+        position = stbl[b"stss"][0] + 4
+        sync = np.frombuffer(data, ">u4", struct.unpack_from(">I", data, position)[0], position + 4)
+        keyframes = np.zeros(count, dtype=bool)
+        keyframes[sync[(sync >= 1) & (sync <= count)].astype(np.int64) - 1] = True
+    else:
+        keyframes = np.ones(count, dtype=bool)  # No sync sample table: every sample is a sync sample
+    return offsets, sizes, keyframes
+
+def seek_capture(cap, frame_index: Optional["FrameIndex"], frame_number: int,
+                 cancelled: Optional[Callable[[], bool]] = None) -> bool:
+    """Position a capture so its next read() returns exactly frame_number.
+
+    With an index the capture jumps to the nearest keyframe and grabs (without
+    retrieving) at most one GOP, regardless of where in the file we land.
+    Returns False if the capture ran out or the seek was cancelled on the way.
+    """
+    keyframe = frame_index.keyframe_before(frame_number) if frame_index is not None else frame_number
+    cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+    for _ in range(frame_number - keyframe):
+        if (cancelled is not None and cancelled()) or not cap.grab():
+            return False
+    return True
+
+class FrameIndexWriter:
+    """Appends one record per recorded frame to a sidecar index file."""
+    def __init__(self, path, flush_interval: int = 60):
+        self.path = Path(path)
+        self.file = open(self.path, "w+b")
+        self.file.write(FRAME_INDEX_MAGIC)
+        self.flush_interval = flush_interval
+        self.frame_count = 0
+
+    def append(self, timestamp: float, offset: int = -1, size: int = 0, keyframe: bool = True) -> int:
+        """Record the next frame and return its frame number."""
+        frame_number = self.frame_count
+        record = np.array([(frame_number, timestamp, offset, size, keyframe)], dtype=FRAME_INDEX_DTYPE)
+        self.file.write(record.tobytes())
+        self.frame_count += 1
+        if self.frame_count % self.flush_interval == 0:
+            self.file.flush()
+        return frame_number
+
+    def update(self, first_frame: int, offsets: np.ndarray, sizes: np.ndarray, keyframes: np.ndarray):
+        """Replace offset, size and keyframe flag of frames already appended, from first_frame on."""
+        header = len(FRAME_INDEX_MAGIC)
+        count = min(len(offsets), self.frame_count - first_frame)
+        if count <= 0:
+            return
+        self.file.seek(header + first_frame * FRAME_INDEX_DTYPE.itemsize)
+        records = np.frombuffer(self.file.read(count * FRAME_INDEX_DTYPE.itemsize), dtype=FRAME_INDEX_DTYPE).copy()
+        records["offset"] = offsets[:count]
+        records["size"] = sizes[:count]
+        records["keyframe"] = keyframes[:count]
+        self.file.seek(header + first_frame * FRAME_INDEX_DTYPE.itemsize)
+        self.file.write(records.tobytes())
+        self.file.seek(0, 2)
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class FrameIndex:
+    """Memory-mapped sidecar index: exact time <-> frame lookups and keyframe search.
+
+    All lookups are binary searches, so their cost does not depend on where in
+    the recording they land.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = np.zeros(0, dtype=FRAME_INDEX_DTYPE)
+        header = len(FRAME_INDEX_MAGIC)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size > header:
+            with open(self.path, "rb") as f:
+                if f.read(header) != FRAME_INDEX_MAGIC:
+                    raise ValueError(f"{self.path} is not a frame index")
+            # A crash can leave a partial record at the end; map whole records only
+            count = (size - header) // FRAME_INDEX_DTYPE.itemsize
+            if count:
+                self.records = np.memmap(self.path, dtype=FRAME_INDEX_DTYPE, mode="r",
+                                         offset=header, shape=(count,))
+        self.timestamps = self.records["timestamp"]
+        self.keyframes = np.flatnonzero(self.records["keyframe"])
+
+    @classmethod
+    def load(cls, video_path) -> Optional["FrameIndex"]:
+        """Open the sidecar of a recorded stream, None if it has none."""
+        path = index_path_for(video_path)
+        return cls(path) if path.exists() else None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def frame_at_time(self, seconds: float) -> int:
+        """Number of the last frame captured at or before the given time."""
+        if not len(self.records):
+            return 0
+        frame_number = int(np.searchsorted(self.timestamps, seconds, side="right")) - 1
+        return max(0, min(frame_number, len(self.records) - 1))
+
+    def nearest_frame(self, seconds: float) -> int:
+        """Number of the frame whose capture time is closest to the given time."""
+        if not len(self.records):
+            return 0
+        after = int(np.searchsorted(self.timestamps, seconds, side="left"))
+        if after >= len(self.records):
+            return len(self.records) - 1
+        if after > 0 and seconds - self.timestamps[after - 1] <= self.timestamps[after] - seconds:
+            return after - 1
+        return after
+
+    def frame_rate(self) -> float:
+        """Measured mean frame rate, which can differ from the rate the camera was set to."""
+        if len(self.records) < 2:
+            return 0.0
+        span = float(self.timestamps[-1] - self.timestamps[0])
+        return (len(self.records) - 1) / span if span > 0 else 0.0
+
+    def time_of(self, frame_number: int) -> float:
+        """Capture time of a frame in seconds since the recording started."""
+        return float(self.timestamps[max(0, min(frame_number, len(self.records) - 1))])
+
+    def keyframe_before(self, frame_number: int) -> int:
+        """Nearest keyframe at or before frame_number, where decoding can start."""
+        position = int(np.searchsorted(self.keyframes, frame_number, side="right")) - 1
+        return int(self.keyframes[position]) if position >= 0 else 0
+
+    def duration(self) -> float:
+        return float(self.timestamps[-1]) if len(self.records) else 0.0
@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+from enum import Enum
+from typing import NamedTuple, Optional
+from threading import Lock
+import time
+
+class PixelFormat(Enum):
+    """Memory layout of a frame. OpenCV capture and decode produce BGR."""
+    BGR = "bgr"
+    RGB = "rgb"
+    MJPEG = "mjpeg"  # Compressed JPEG bitstream as delivered by the camera, a 1-D uint8 buffer
+
+# cv2 conversion codes between pixel formats
+_CONVERSIONS = {
+    (PixelFormat.BGR, PixelFormat.RGB): cv2.COLOR_BGR2RGB,
+    (PixelFormat.RGB, PixelFormat.BGR): cv2.COLOR_RGB2BGR,
+}
+
+def convert_frame(frame: np.ndarray, src: PixelFormat, dst: PixelFormat) -> np.ndarray:
+    """Convert a frame to another pixel format; returns the same array when no conversion is needed."""
+    if src == dst:
+        return frame
+    if src == PixelFormat.MJPEG:
+        return convert_frame(cv2.imdecode(frame, cv2.IMREAD_COLOR), PixelFormat.BGR, dst)
+    if dst == PixelFormat.MJPEG:
+        ok, jpeg = cv2.imencode(".jpg", convert_frame(frame, src, PixelFormat.BGR))
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return jpeg.reshape(-1)
+    return cv2.cvtColor(frame, _CONVERSIONS[(src, dst)])
+
+class FrameRef(NamedTuple):
+    """A published frame: sequence number, monotonic capture time, read-only view and its layout."""
+    seq: int
+    timestamp: float
+    frame: Optional[np.ndarray]
+    pixel_format: PixelFormat = PixelFormat.BGR
+
+class FrameSlot:
+    """Latest-frame slot with a monotonically increasing sequence number.
+
+    Publishing never copies pixels: consumers receive a read-only view of the
+    array handed to publish(), so the producer must not write into it again.
+    """
+    def __init__(self, pixel_format: PixelFormat = PixelFormat.BGR):
+        self.pixel_format = pixel_format
+        self.lock = Lock()
+        self.latest: Optional[FrameRef] = None
+        self.seq = 0
+        self.consumed = True
+        self.dropped_frames = 0  # Frames replaced before any consumer fetched them
+
+    def publish(self, frame: Optional[np.ndarray], timestamp: Optional[float] = None) -> FrameRef:
+        """Publish a new frame (or None for a failed read) and return its FrameRef."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if frame is not None:
+            frame = frame.view()
+            frame.flags.writeable = False
+        with self.lock:
+            if frame is not None and not self.consumed:
+                self.dropped_frames += 1
+            self.seq += 1
+            self.latest = FrameRef(self.seq, timestamp, frame, self.pixel_format)
+            self.consumed = frame is None
+            return self.latest
+
+    def get(self) -> Optional[FrameRef]:
+        """Get the latest frame regardless of whether it was seen before."""
+        with self.lock:
+            if self.latest is not None:
+                self.consumed = True
+            return self.latest
+
+    def get_if_newer(self, seq: int) -> Optional[FrameRef]:
+        """Get the latest frame only if its sequence number is greater than seq."""
+        with self.lock:
+            if self.latest is None or self.latest.seq <= seq:
+                return None
+            self.consumed = True
+            return self.latest
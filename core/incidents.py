@@ -0,0 +1,136 @@
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from threading import Condition, Thread
+from typing import Callable, Deque, List, Optional, Tuple
+
+from .frame_cache import FrameCache
+from .frame_index import FrameIndex, seek_capture
+from .segments import SessionJournal
+
+logger = logging.getLogger(__name__)
+
+# Incident markers of a session, one JSON object per line next to metadata.json
+MARKERS_NAME = "markers.jsonl"
+
+@dataclass
+class Marker:
+    time: float                       # Seconds on the session timeline
+    label: str = ""
+    camera_id: Optional[int] = None   # None when the incident concerns all cameras
+    created: float = field(default_factory=time.time)
+
+def read_markers(session_path) -> List[Marker]:
+    """Markers of a session in timeline order, empty if it has none."""
+    markers = [Marker(entry["time"], entry.get("label", ""), entry.get("camera_id"), entry.get("created", 0.0))
+               for entry in SessionJournal.read(Path(session_path) / MARKERS_NAME)
+               if entry.get("event") == "marker"]
+    return sorted(markers, key=lambda marker: marker.time)
+
+def append_marker(session_path, marker: Marker):
+    """Store a marker durably in its session, whether it is still recording or not."""
+    journal = SessionJournal(Path(session_path) / MARKERS_NAME)
+    try:
+        journal.append("marker", **asdict(marker))
+    finally:
+        journal.close()
+
+class IncidentWorker:
+    """Background decoder that keeps the frames around incident markers cached for one camera.
+
+    Each window is decoded from the marker forward, then from the start of
+    the window up to the marker, so an incident can be opened before its
+    whole window is done. Windows go to a cache of their own, which the
+    read-ahead around the playhead never evicts. An urgent window, such as
+    the incident being opened, interrupts the current one at the next frame.
+    """
+    def __init__(self, camera_id: int, open_capture: Callable[[], object], cache: FrameCache,
+                 frame_index: Optional[FrameIndex]):
+        self.camera_id = camera_id
+        self.open_capture = open_capture
+        self.cache = cache
+        self.frame_index = frame_index
+        self.windows: Deque[Tuple[int, int, int]] = deque()  # (marker frame, first frame, last frame)
+        self.condition = Condition()
+        self.interrupted = False
+        self.running = False
+        self.thread: Optional[Thread] = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._run, daemon=True, name=f"incidents-{self.camera_id}")
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def add_window(self, marker_frame: int, first: int, last: int, urgent: bool = False):
+        """Queue a window for decoding; urgent windows go first and preempt the current one."""
+        window = (marker_frame, first, last)
+        with self.condition:
+            if urgent:
+                self.windows.appendleft(window)
+                self.interrupted = True
+            else:
+                self.windows.append(window)
+            self.condition.notify_all()
+
+    def pending(self) -> int:
+        """Windows not completely decoded yet."""
+        with self.condition:
+            return len(self.windows)
+
+    def _run(self):
+        cap = self.open_capture()
+        if cap is None or not cap.isOpened():
+            logger.error(f"Incident decoder could not open camera {self.camera_id}")
+            return
+        position = -1  # Frame number cap.read() returns next, -1 if unknown
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.windows or not self.running)
+                    if not self.running:
+                        break
+                    window = self.windows[0]
+                    self.interrupted = False
+                marker_frame, first, last = window
+                completed = True
+                for start, end in ((marker_frame, last), (first, marker_frame - 1)):
+                    missing = next((n for n in range(start, end + 1) if not self.cache.contains(n)), None)
+                    if missing is None:
+                        continue
+                    if position != missing:
+                        seek_capture(cap, self.frame_index, missing)
+                        position = missing
+                    for frame_number in range(missing, end + 1):
+                        if not self.running or self.interrupted:
+                            completed = False
+                            break
+                        if self.cache.contains(frame_number):
+                            ok = cap.grab()
+                        else:
+                            ok, frame = cap.read()
+                            if ok:
+                                self.cache.put(frame_number, frame)
+                        if not ok:
+                            position = -1
+                            break
+                        position = frame_number + 1
+                    if not completed:
+                        break
+                if completed:
+                    with self.condition:
+                        if window in self.windows:
+                            self.windows.remove(window)
+        finally:
+            cap.release()
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .frame_index import FrameIndex, FrameIndexWriter, index_path_for
+
+def proxy_path_for(video_path) -> Path:
+    """Low-resolution proxy recorded next to a stream, e.g. camera_0.mp4 -> camera_0_proxy.mjpeg"""
+    video_path = Path(video_path)
+    return video_path.with_name(f"{video_path.stem}_proxy.mjpeg")
+
+class MjpegWriter:
+    """Append-only store of compressed JPEG frames plus a per-frame sidecar index.
+
+    Frames are written exactly as the camera delivered them, so recording costs
+    a file write instead of a decode and re-encode. The sidecar holds the byte
+    offset, size and capture timestamp of every frame, all of them keyframes.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.data_file = open(self.path, "wb")
+        self.index = FrameIndexWriter(index_path_for(self.path))
+        self.offset = 0
+
+    @property
+    def frame_count(self) -> int:
+        return self.index.frame_count
+
+    def write(self, jpeg: np.ndarray, timestamp: float):
+        """Append one JPEG bitstream (a uint8 buffer) captured at timestamp."""
+        data = memoryview(np.ascontiguousarray(jpeg)).cast("B")
+        self.data_file.write(data)
+        self.index.append(timestamp, offset=self.offset, size=len(data), keyframe=True)
+        self.offset += len(data)
+
+    def isOpened(self) -> bool:
+        return not self.data_file.closed
+
+    def release(self):
+        """Flush and close the bitstream and the index."""
+        if not self.data_file.closed:
+            self.data_file.close()
+            self.index.close()
+
+class MjpegReader:
+    """Random-access reader for MjpegWriter output with a cv2.VideoCapture-like interface.
+
+    Every frame is a keyframe, so seeking to any frame is O(1) and only the
+    frames that are actually retrieved get decoded.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.data: Optional[np.memmap] = None
+        self.index: Optional[FrameIndex] = None
+        self.frame_count = 0
+        self.position = 0       # Next frame read() or grab() returns
+        self.grabbed: Optional[int] = None
+        self.frame_size: Tuple[int, int] = (0, 0)
+
+        self.index = FrameIndex.load(self.path)
+        if self.index is None or not self.path.exists():
+            return
+        if len(self.index) and self.path.stat().st_size > 0:
+            self.data = np.memmap(self.path, dtype=np.uint8, mode="r")
+            # Ignore index records whose payload never made it to disk
+            ends = self.index.records["offset"] + self.index.records["size"]
+            self.frame_count = int(np.count_nonzero(ends <= len(self.data)))
+            first = self.decode(0)
+            if first is not None:
+                self.frame_size = (first.shape[1], first.shape[0])
+
+    def compressed(self, frame_number: int) -> np.ndarray:
+        """The JPEG bitstream of a frame, without decoding it."""
+        record = self.index.records[frame_number]
+        offset = int(record["offset"])
+        return self.data[offset:offset + int(record["size"])]
+
+    def decode(self, frame_number: int, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """Decode a single frame to BGR."""
+        if not 0 <= frame_number < self.frame_count:
+            return None
+        return cv2.imdecode(self.compressed(frame_number), flags)
+
+    def frame_at_time(self, seconds: float) -> int:
+        """Number of the last frame captured at or before the given time."""
+        return min(self.index.frame_at_time(seconds), max(0, self.frame_count - 1))
+
+    # cv2.VideoCapture compatible interface
+
+    def isOpened(self) -> bool:
+        return self.data is not None
+
+    def grab(self) -> bool:
+        if self.position >= self.frame_count:
+            return False
+        self.grabbed = self.position
+        self.position += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.grabbed is None:
+            return False, None
+        frame = self.decode(self.grabbed)
+        return frame is not None, frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            if not self.frame_count:
+                return 0.0
+            return self.index.time_of(min(self.position, self.frame_count - 1)) * 1000
+        if prop == cv2.CAP_PROP_FPS:
+            return self.index.frame_rate() if self.frame_count else 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size[1])
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = max(0, min(int(value), self.frame_count))
+            self.grabbed = None
+            return True
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            self.position = self.frame_at_time(value / 1000.0)
+            self.grabbed = None
+            return True
+        return False
+
+    def release(self):
+        self.data = None
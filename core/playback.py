@@ -1,14 +1,67 @@
 import cv2
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 import json
 import time
 from threading import Thread, Lock, Event
 
+from .frames import PixelFormat
+from .mjpeg_store import MjpegReader, proxy_path_for
+from .frame_index import FrameIndex, seek_capture
+from .frame_cache import FrameCache, ReadAheadWorker, CacheStats
+from .decoder import DecoderWorker
+from .thumbnails import ThumbnailAtlas, thumbnail_path_for
+from .incidents import IncidentWorker, Marker, append_marker, read_markers
+from .catalog import SessionCatalog
+from .segments import (Segment, SegmentedCapture, SessionJournal, JOURNAL_NAME,
+                       journal_segments, recover_metadata)
+
+@dataclass
+class PlaybackStats:
+    ticks: int = 0
+    presented_frames: int = 0
+    dropped_frames: int = 0   # Frames skipped (grabbed, never shown) to keep up with the clock
+    late_frames: int = 0      # Frames shown more than one frame interval after they were due
+
 class PlaybackManager:
-    def __init__(self):
+    def __init__(self, cache_budget_mb: int = 1024, read_ahead: bool = True,
+                 read_behind_seconds: float = 2.0, read_ahead_seconds: float = 1.0,
+                 display_fps: float = 60.0, parallel_decode: bool = True,
+                 incident_seconds: float = 5.0, incident_budget_mb: int = 512,
+                 catalog: Optional[SessionCatalog] = None):
         self.video_captures: Dict[int, cv2.VideoCapture] = {}
+        self.video_paths: Dict[int, Path] = {}
+        self.segments: Dict[int, List[Segment]] = {}  # Journaled mp4 segments, opened only when read
+        self.frame_indexes: Dict[int, FrameIndex] = {}  # Per-frame timestamp/keyframe sidecars
+        self.frame_positions: Dict[int, int] = {}     # Frame last presented per camera, -1 before the first
+        self.capture_positions: Dict[int, int] = {}   # Frame the capture's next read() returns, -1 if unknown
+        self.frame_caches: Dict[int, FrameCache] = {}
+        self.proxy_readers: Dict[int, MjpegReader] = {}  # Low-resolution all-keyframe streams, if recorded
+        self.proxy_presented: set = set()  # Cameras currently showing a proxy frame
+        self.thumbnail_atlases: Dict[int, ThumbnailAtlas] = {}
+        self.frame_counts: Dict[int, int] = {}
+        self.frame_rates: Dict[int, float] = {}       # Measured per camera, not the nominal container rate
+        self.camera_offsets: Dict[int, float] = {}    # Seconds added to a camera's timestamps to align it
+        self.session_path: Optional[Path] = None
+        self.session_cameras: List[int] = []  # All cameras of the session, opened or not
+        self.recording_format = "mp4"
+        self.read_ahead_workers: Dict[int, ReadAheadWorker] = {}
+        self.decoders: Dict[int, DecoderWorker] = {}   # One decoder thread per camera in parallel mode
+        self.parallel_decode = parallel_decode
+        self.seek_generation = 0  # Bumped by every seek; decodes started before it are discarded
+        self.cache_budget_bytes = cache_budget_mb * 1024 * 1024  # Split evenly between cameras
+        self.read_ahead = read_ahead
+        self.read_behind_seconds = read_behind_seconds
+        self.read_ahead_seconds = read_ahead_seconds
+        self.display_fps = display_fps  # Upper bound on presentation ticks; faster speeds skip frames
+        self.markers: List[Marker] = []
+        self.incident_seconds = incident_seconds  # Decoded ahead on both sides of every marker
+        self.incident_budget_bytes = incident_budget_mb * 1024 * 1024  # Split evenly between cameras
+        self.incident_caches: Dict[int, FrameCache] = {}
+        self.incident_workers: Dict[int, IncidentWorker] = {}
+        self.catalog = catalog  # Markers added during playback are indexed here too
         self.current_position: float = 0.0
         self.playback_speed: float = 1.0
         self.is_playing: bool = False
@@ -17,62 +70,492 @@ class PlaybackManager:
         self.playback_thread: Optional[Thread] = None
         self.stop_event = Event()
         self.frame_callbacks: List[callable] = []
+        self.stats = PlaybackStats()
+        self.pixel_format = PixelFormat.BGR  # Layout of the frames handed to callbacks, as decoded
         
-    def load_session(self, session_directory: str) -> bool:
-        """Load a recorded session for playback."""
+    def load_session(self, session_directory: str, camera_ids: Optional[List[int]] = None) -> bool:
+        """Load a recorded session for playback, opening only camera_ids (all cameras by default)."""
+        self.close()
         session_path = Path(session_directory)
         if not session_path.exists():
             return False
             
-        # Load metadata
+        # Load metadata; a session that never stopped cleanly only has its journal
+        journal = SessionJournal.read(session_path / JOURNAL_NAME)
         metadata_path = session_path / "metadata.json"
-        if not metadata_path.exists():
-            return False
-            
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
+        if metadata_path.exists():
+            with open(metadata_path, "r") as f:
+                metadata = json.load(f)
+        else:
+            metadata = recover_metadata(session_path, journal)
+            if metadata is None:
+                return False
+        self.segments = journal_segments(session_path, journal)
             
+        self.session_path = session_path
         self.duration = metadata["duration"]
+        recording_format = metadata.get("format", "mp4")
+        self.camera_offsets = {int(camera_id): offset
+                               for camera_id, offset in metadata.get("camera_offsets", {}).items()}
         
-        # Load video files
-        for camera_id in metadata["cameras"]:
-            video_path = session_path / f"camera_{camera_id}.mp4"
-            if not video_path.exists():
-                continue
+        self.markers = read_markers(session_path)
+        
+        # Open only the cameras being viewed; the others cost nothing until shown
+        self.session_cameras = [int(camera_id) for camera_id in metadata["cameras"]]
+        self.recording_format = recording_format
+        for camera_id in (self.session_cameras if camera_ids is None else camera_ids):
+            self._open_camera(camera_id)
+            
+        # A recovered session ends with its last playable frame
+        if metadata.get("recovered") and self.video_captures:
+            self.duration = max(self._time_of_frame(camera_id, self._frame_count(camera_id) - 1)
+                                for camera_id in self.video_captures)
+                                
+        return len(self.video_captures) > 0
+        
+    def view_cameras(self, camera_ids: List[int]):
+        """Open the given cameras of the loaded session and close the rest, e.g. on switching angles."""
+        was_playing = self.is_playing
+        if was_playing:
+            self._stop_playback()
+        for camera_id in list(self.video_captures):
+            if camera_id not in camera_ids:
+                self._close_camera(camera_id)
+        for camera_id in camera_ids:
+            if camera_id not in self.video_captures:
+                self._open_camera(camera_id)
+        if was_playing:
+            self.play()
+            
+    def _open_camera(self, camera_id: int) -> bool:
+        """Open one camera's stream, sidecars, cache, read-ahead and decoder."""
+        video_path = self.session_path / f"camera_{camera_id}.{self.recording_format}"
+        if camera_id not in self.session_cameras or (not video_path.exists() and camera_id not in self.segments):
+            return False
+            
+        cap = self._open_capture(camera_id, video_path)
+        if not cap.isOpened():
+            return False
+        self.video_captures[camera_id] = cap
+        self.video_paths[camera_id] = video_path
+        self.capture_positions[camera_id] = 0
+        frame_index = FrameIndex.load(video_path)
+        if frame_index is not None and len(frame_index):
+            self.frame_indexes[camera_id] = frame_index
+        self.frame_counts[camera_id] = self._count_frames(camera_id)
+        self.frame_rates[camera_id] = self._measure_frame_rate(camera_id)
+        proxy = MjpegReader(str(proxy_path_for(video_path)))
+        if proxy.isOpened() and proxy.frame_count:
+            self.proxy_readers[camera_id] = proxy
+        thumbnails = ThumbnailAtlas(thumbnail_path_for(video_path))
+        if len(thumbnails):
+            self.thumbnail_atlases[camera_id] = thumbnails
+            
+        # Decoded-frame cache, with read-ahead around the playhead in both directions
+        cache = FrameCache(self.cache_budget_bytes // len(self.session_cameras))
+        self.frame_caches[camera_id] = cache
+        if self.read_ahead:
+            fps = self.frame_rates[camera_id]
+            worker = ReadAheadWorker(
+                camera_id,
+                lambda: self._open_capture(camera_id, video_path),
+                cache,
+                self.frame_indexes.get(camera_id),
+                self._frame_count(camera_id),
+                behind=int(self.read_behind_seconds * fps),
+                ahead=int(self.read_ahead_seconds * fps)
+            )
+            self.read_ahead_workers[camera_id] = worker
+            worker.start()
+            
+        # Per-camera decoder: a tick costs the slowest camera's decode, not the sum
+        if self.parallel_decode:
+            decoder = DecoderWorker(
+                camera_id,
+                lambda frame_number, cancelled: self._read_frame(camera_id, frame_number, cancelled)
+            )
+            self.decoders[camera_id] = decoder
+            decoder.start()
+            
+        # Windows around the incident markers, decoded once in the background
+        if self.incident_seconds > 0:
+            incidents = FrameCache(self.incident_budget_bytes // len(self.session_cameras))
+            self.incident_caches[camera_id] = incidents
+            worker = IncidentWorker(camera_id, lambda: self._open_capture(camera_id, video_path), incidents,
+                                    self.frame_indexes.get(camera_id))
+            self.incident_workers[camera_id] = worker
+            worker.start()
+            for marker in reversed(self.markers):  # The latest incidents are the likeliest to be reviewed
+                self._queue_incident(marker, camera_ids=[camera_id])
                 
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                self.video_captures[camera_id] = cap
+        # Join at the current position
+        with self.lock:
+            frame_number = self._frame_at_time(camera_id, self.current_position)
+            self.frame_positions[camera_id] = frame_number - 1
+            if camera_id in self.read_ahead_workers:
+                self.read_ahead_workers[camera_id].set_playhead(frame_number)
+        return True
+        
+    def _close_camera(self, camera_id: int):
+        """Stop one camera's workers and release its files."""
+        with self.lock:
+            self.frame_positions.pop(camera_id, None)
+        decoder = self.decoders.pop(camera_id, None)
+        if decoder:
+            decoder.stop()
+        worker = self.read_ahead_workers.pop(camera_id, None)
+        if worker:
+            worker.stop()
+        incident_worker = self.incident_workers.pop(camera_id, None)
+        if incident_worker:
+            incident_worker.stop()
+        for readers in (self.video_captures, self.proxy_readers):
+            cap = readers.pop(camera_id, None)
+            if cap is not None:
+                cap.release()
+        for per_camera in (self.video_paths, self.frame_indexes, self.frame_counts, self.frame_rates,
+                           self.capture_positions, self.frame_caches, self.incident_caches,
+                           self.thumbnail_atlases):
+            per_camera.pop(camera_id, None)
+        self.proxy_presented.discard(camera_id)
+        
+    def _open_capture(self, camera_id: int, video_path: Path):
+        """Open a recorded stream with the reader that suits its container."""
+        if camera_id in self.segments:
+            # Segments are opened lazily, one at a time, as reads reach them
+            return SegmentedCapture(self.segments[camera_id])
+        if video_path.suffix == ".mjpeg":
+            # Every frame is a keyframe: O(1) seeks and reverse steps, decode on demand
+            return MjpegReader(str(video_path))
+        return cv2.VideoCapture(str(video_path))
+        
+    def _frame_count(self, camera_id: int) -> int:
+        return self.frame_counts[camera_id]
+        
+    def _count_frames(self, camera_id: int) -> int:
+        """Playable frames; after a crash the index can list frames of a segment that was lost."""
+        frame_count = int(self.video_captures[camera_id].get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_index = self.frame_indexes.get(camera_id)
+        if frame_index is not None:
+            return min(len(frame_index), frame_count) if frame_count > 0 else len(frame_index)
+        return frame_count
+        
+    def _measure_frame_rate(self, camera_id: int) -> float:
+        """Rate the camera really delivered, from its timestamps or its frame count.
+        
+        Cameras set to the same rate drift apart by a few frames per minute, and
+        the rate stored in the container is only the nominal one.
+        """
+        frame_index = self.frame_indexes.get(camera_id)
+        if frame_index is not None and frame_index.frame_rate() > 0:
+            return frame_index.frame_rate()
+        frame_count = self._frame_count(camera_id)
+        if frame_count > 1 and self.duration > 0:
+            return frame_count / self.duration
+        return self.video_captures[camera_id].get(cv2.CAP_PROP_FPS) or 30.0
+        
+    def _frame_at_time(self, camera_id: int, position: float) -> int:
+        """Frame of a camera captured closest to a position on the shared timeline.
+        
+        Recorded timestamps all come from one monotonic clock, so choosing by
+        timestamp keeps the angles aligned however their frame rates differ.
+        """
+        position -= self.camera_offsets.get(camera_id, 0.0)
+        frame_index = self.frame_indexes.get(camera_id)
+        if frame_index is not None:
+            return min(frame_index.nearest_frame(position), self._frame_count(camera_id) - 1)
+        return max(0, min(int(round(position * self.frame_rates[camera_id])), self._frame_count(camera_id) - 1))
+        
+    def _time_of_frame(self, camera_id: int, frame_number: int) -> float:
+        """Position of a frame on the shared timeline."""
+        offset = self.camera_offsets.get(camera_id, 0.0)
+        frame_index = self.frame_indexes.get(camera_id)
+        if frame_index is not None:
+            return frame_index.time_of(frame_number) + offset
+        return frame_number / self.frame_rates[camera_id] + offset
+        
+    def set_camera_offset(self, camera_id: int, offset: float, persist: bool = True):
+        """Shift a camera on the shared timeline, e.g. to compensate its capture latency.
+        
+        A positive offset shows the camera's frames later. The offset is saved
+        to the session metadata so the calibration survives reloading.
+        """
+        with self.lock:
+            self.camera_offsets[camera_id] = offset
+            if camera_id in self.frame_positions:
+                self.frame_positions[camera_id] = self._frame_at_time(camera_id, self.current_position) - 1
+        if persist and self.session_path is not None:
+            metadata_path = self.session_path / "metadata.json"
+            with open(metadata_path, "r") as f:
+                metadata = json.load(f)
+            metadata["camera_offsets"] = {str(camera_id): offset for camera_id, offset in self.camera_offsets.items()}
+            with open(metadata_path, "w") as f:
+                json.dump(metadata, f)
                 
-        return len(self.video_captures) > 0
+    def get_thumbnail(self, camera_id: int, position: float) -> Optional[np.ndarray]:
+        """Filmstrip tile closest to a position on the timeline, in O(1) and without decoding video."""
+        thumbnails = self.thumbnail_atlases.get(camera_id)
+        if thumbnails is None:
+            return None
+        return thumbnails.nearest(position - self.camera_offsets.get(camera_id, 0.0))
+        
+    def get_filmstrip(self, camera_id: int) -> Optional[ThumbnailAtlas]:
+        """The whole memory-mapped filmstrip of a camera, None if the session has none."""
+        return self.thumbnail_atlases.get(camera_id)
+        
+    def get_alignment(self) -> Dict[int, float]:
+        """How far each camera's presented frame is from the playhead, in seconds."""
+        with self.lock:
+            return {camera_id: self._time_of_frame(camera_id, frame_number) - self.current_position
+                    for camera_id, frame_number in self.frame_positions.items() if frame_number >= 0}
         
+    def get_markers(self) -> List[Marker]:
+        """Incident markers of the loaded session in timeline order."""
+        return list(self.markers)
+        
+    def add_marker(self, label: str = "", camera_id: Optional[int] = None,
+                   position: Optional[float] = None) -> Optional[Marker]:
+        """Flag an incident at a position (the playhead by default) and start decoding around it."""
+        if self.session_path is None:
+            return None
+        marker = Marker(self.current_position if position is None else position, label, camera_id)
+        append_marker(self.session_path, marker)
+        if self.catalog is not None:
+            session_id = self.catalog.session_id(self.session_path)
+            if session_id is not None:
+                self.catalog.add_marker(session_id, marker.time, label, camera_id)
+        self.markers.append(marker)
+        self.markers.sort(key=lambda marker: marker.time)
+        self._queue_incident(marker)
+        return marker
+        
+    def open_incident(self, marker: Marker) -> bool:
+        """Pause at a marker and show its frames; stepping through its window needs no decoding.
+        
+        If the window is still being decoded it jumps the queue, and the frame
+        at the marker is decoded right away.
+        """
+        self._stop_playback()
+        self._queue_incident(marker, urgent=True)
+        self.seek_to(marker.time)
+        with self.lock:
+            generation = self.seek_generation
+            targets = {camera_id: self._frame_at_time(camera_id, self.current_position)
+                       for camera_id in self.frame_positions}
+        frames_dict = self._read_frames(targets)
+        with self.lock:
+            if generation != self.seek_generation:
+                return False
+            self._present_frames(targets, frames_dict)
+        if frames_dict:
+            self._notify_callbacks(frames_dict)
+        return bool(frames_dict)
+        
+    def _queue_incident(self, marker: Marker, urgent: bool = False, camera_ids: Optional[List[int]] = None):
+        """Have every open camera (or camera_ids) decode the window around a marker."""
+        for camera_id in (list(self.incident_workers) if camera_ids is None else camera_ids):
+            worker = self.incident_workers.get(camera_id)
+            if worker is None:
+                continue
+            last = self._frame_count(camera_id) - 1
+            worker.add_window(self._frame_at_time(camera_id, marker.time),
+                              self._frame_at_time(camera_id, marker.time - self.incident_seconds),
+                              min(last, self._frame_at_time(camera_id, marker.time + self.incident_seconds)),
+                              urgent)
+                              
     def play(self):
         """Start playback."""
         if self.is_playing or not self.video_captures:
             return
             
         self.is_playing = True
+        self.stats = PlaybackStats()
         self.stop_event.clear()
         self.playback_thread = Thread(target=self._playback_loop, daemon=True)
         self.playback_thread.start()
         
     def pause(self):
-        """Pause playback."""
+        """Pause playback, replacing any proxy frames on screen with full-resolution ones."""
+        self._stop_playback()
+        self._refine_proxies()
+        
+    def _stop_playback(self):
         self.is_playing = False
         self.stop_event.set()
+        self._cancel_decodes()
         if self.playback_thread:
             self.playback_thread.join()
             self.playback_thread = None
             
+    def scrub_to(self, position: float):
+        """Seek and show the frames at the position at once, from the proxies when recorded.
+        
+        Meant to be called for every move of a scrub bar; call end_scrub() on
+        release to replace the proxies with full-resolution frames.
+        """
+        self.seek_to(position)
+        if self.is_playing:
+            return  # The playback loop presents the new position itself
+        with self.lock:
+            generation = self.seek_generation
+            targets = {camera_id: self._frame_at_time(camera_id, self.current_position)
+                       for camera_id in self.frame_positions}
+        frames_dict = self._read_frames(targets, proxy=True)
+        with self.lock:
+            if generation != self.seek_generation:
+                return
+            self._present_frames(targets, frames_dict, proxy=True)
+        if frames_dict:
+            self._notify_callbacks(frames_dict)
+            
+    def end_scrub(self):
+        """Scrubbing finished: show the full-resolution frames."""
+        if not self.is_playing:
+            self._refine_proxies()
+            
+    def _refine_proxies(self):
+        """Re-present the cameras showing a proxy frame at full resolution."""
+        with self.lock:
+            generation = self.seek_generation
+            targets = {camera_id: self.frame_positions[camera_id] for camera_id in self.proxy_presented
+                       if self.frame_positions.get(camera_id, -1) >= 0}
+        if not targets:
+            return
+        frames_dict = self._read_frames(targets)
+        with self.lock:
+            if generation != self.seek_generation:
+                return
+            self._present_frames(targets, frames_dict)
+        if frames_dict:
+            self._notify_callbacks(frames_dict)
+            
     def seek_to(self, position: float):
         """Seek to a specific position in seconds."""
         with self.lock:
             position = max(0, min(position, self.duration))
             self.current_position = position
+            self.seek_generation += 1
+            self._cancel_decodes()
+            
+            # The next frame presented is the one at the position; captures are
+            # only moved when that frame is not already cached
+            for camera_id in self.video_captures:
+                frame_number = self._frame_at_time(camera_id, position)
+                self.frame_positions[camera_id] = frame_number - 1
+                worker = self.read_ahead_workers.get(camera_id)
+                if worker:
+                    worker.set_playhead(frame_number)
+                
+    def _cancel_decodes(self):
+        """Preempt in-flight decodes so seeks and pauses do not wait for them."""
+        for decoder in self.decoders.values():
+            decoder.cancel()
+            
+    def _seek_frame(self, camera_id: int, frame_number: int,
+                    cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Position a capture so its next read() returns exactly frame_number."""
+        if seek_capture(self.video_captures[camera_id], self.frame_indexes.get(camera_id),
+                        frame_number, cancelled):
+            self.capture_positions[camera_id] = frame_number
+            return True
+        self.capture_positions[camera_id] = -1
+        return False
+        
+    def _read_frame(self, camera_id: int, frame_number: int,
+                    cancelled: Optional[Callable[[], bool]] = None) -> Optional[np.ndarray]:
+        """Decoded frame from the cache, or from the capture (seeking only if needed).
+        
+        A cancelled read stops between grabs and returns None.
+        """
+        cache = self.frame_caches[camera_id]
+        frame = cache.get(frame_number)
+        if frame is not None:
+            return frame
+        incidents = self.incident_caches.get(camera_id)
+        if incidents is not None and incidents.contains(frame_number):
+            frame = incidents.get(frame_number)
+            if frame is not None:
+                return frame
             
-            # Seek all videos to the position
-            for cap in self.video_captures.values():
-                cap.set(cv2.CAP_PROP_POS_MSEC, position * 1000)
+        cap = self.video_captures[camera_id]
+        capture_position = self.capture_positions.get(camera_id, -1)
+        if capture_position != frame_number:
+            frame_index = self.frame_indexes.get(camera_id)
+            keyframe = frame_index.keyframe_before(frame_number) if frame_index is not None else frame_number
+            if keyframe <= capture_position < frame_number:
+                # Already inside the target's GOP: grab past the skipped frames
+                # instead of seeking back to the keyframe
+                while capture_position < frame_number:
+                    if (cancelled is not None and cancelled()) or not cap.grab():
+                        self.capture_positions[camera_id] = capture_position
+                        return None
+                    capture_position += 1
+            elif not self._seek_frame(camera_id, frame_number, cancelled):
+                return None
+        if cancelled is not None and cancelled():
+            self.capture_positions[camera_id] = frame_number
+            return None
+        ret, frame = cap.read()
+        if not ret:
+            self.capture_positions[camera_id] = -1
+            return None
+        self.capture_positions[camera_id] = frame_number + 1
+        cache.put(frame_number, frame)
+        return frame
+        
+    def _read_proxy(self, camera_id: int, frame_number: int) -> Optional[np.ndarray]:
+        """Proxy frame captured closest to a full-resolution frame; every proxy frame is a keyframe."""
+        proxy = self.proxy_readers[camera_id]
+        timestamp = self._time_of_frame(camera_id, frame_number) - self.camera_offsets.get(camera_id, 0.0)
+        return proxy.decode(proxy.index.nearest_frame(timestamp))
+        
+    def _read_frames(self, targets: Dict[int, int], proxy: bool = False) -> Dict[int, np.ndarray]:
+        """Read the target frame of every camera, in parallel when each has a decoder.
+        
+        The results are joined, so the set is always complete for one tick; a
+        seek or pause cancels the decodes and leaves out the cameras not done.
+        With proxy set, cameras that have a proxy stream are read from it instead.
+        """
+        frames_dict = {}
+        if proxy:
+            for camera_id in self._proxy_cameras(targets):
+                frame = self._read_proxy(camera_id, targets[camera_id])
+                if frame is not None:
+                    frames_dict[camera_id] = frame
+            targets = {camera_id: frame_number for camera_id, frame_number in targets.items()
+                       if camera_id not in self.proxy_readers}
+        if self.decoders:
+            tickets = {camera_id: self.decoders[camera_id].submit(frame_number)
+                       for camera_id, frame_number in targets.items()}
+            for camera_id, ticket in tickets.items():
+                ok, frame = self.decoders[camera_id].wait(ticket)
+                if ok and frame is not None:
+                    frames_dict[camera_id] = frame
+        else:
+            for camera_id, frame_number in targets.items():
+                frame = self._read_frame(camera_id, frame_number)
+                if frame is not None:
+                    frames_dict[camera_id] = frame
+        return frames_dict
+        
+    def _proxy_cameras(self, camera_ids) -> set:
+        """The cameras among camera_ids that _read_frames(proxy=True) reads from proxies."""
+        return {camera_id for camera_id in camera_ids if camera_id in self.proxy_readers}
+        
+    def _present_frames(self, targets: Dict[int, int], frames_dict: Dict[int, np.ndarray],
+                        proxy: bool = False):
+        """Make the decoded target frames the presented ones and move the read-ahead with them."""
+        proxies = self._proxy_cameras(frames_dict) if proxy else set()
+        for camera_id in frames_dict:
+            frame_number = targets[camera_id]
+            self.frame_positions[camera_id] = frame_number
+            if camera_id in proxies:
+                self.proxy_presented.add(camera_id)
+            else:
+                self.proxy_presented.discard(camera_id)
+            worker = self.read_ahead_workers.get(camera_id)
+            if worker:
+                worker.set_playhead(frame_number)
                 
     def set_playback_speed(self, speed: float):
         """Set playback speed (1.0 is normal speed)."""
@@ -83,69 +566,156 @@ class PlaybackManager:
         """Step one frame forward or backward."""
         was_playing = self.is_playing
         if was_playing:
-            self.pause()
+            self._stop_playback()
             
         with self.lock:
-            frames_dict = {}
-            for camera_id, cap in self.video_captures.items():
+            generation = self.seek_generation
+            targets = {}
+            if self.frame_positions:
+                # One frame of the first camera; the others follow with the frame
+                # captured closest to it, so stepping never lets the angles drift apart
+                reference = next(iter(self.frame_positions))
+                current_frame = self.frame_positions[reference]
                 if forward:
-                    ret, frame = cap.read()
-                    if ret:
-                        frames_dict[camera_id] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    target = min(current_frame + 1, self._frame_count(reference) - 1)
                 else:
-                    # Get current frame position
-                    current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                    if current_frame > 1:
-                        # Seek to previous frame
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame - 2)
-                        ret, frame = cap.read()
-                        if ret:
-                            frames_dict[camera_id] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                            
+                    # Previous frame: normally served by the read-ahead cache
+                    target = max(current_frame - 1, 0)
+                position = self._time_of_frame(reference, target)
+                targets[reference] = target
+                for camera_id, current_frame in self.frame_positions.items():
+                    frame_number = self._frame_at_time(camera_id, position)
+                    if camera_id != reference and frame_number != current_frame:
+                        targets[camera_id] = frame_number
+                        
+        # Decode without the lock so a seek can preempt the step
+        frames_dict = self._read_frames(targets)
+        
+        with self.lock:
+            if generation != self.seek_generation:
+                frames_dict = {}  # A seek arrived meanwhile and takes precedence
+            self._present_frames(targets, frames_dict)
             if frames_dict:
-                self._notify_callbacks(frames_dict)
+                self.current_position = position
+                
+        # Outside the lock, so callbacks may call back into the manager
+        if frames_dict:
+            self._notify_callbacks(frames_dict)
                 
         if was_playing:
             self.play()
             
     def register_frame_callback(self, callback: callable):
-        """Register a callback to receive frames during playback."""
+        """Register a callback to receive {camera_id: frame} dicts in self.pixel_format."""
         self.frame_callbacks.append(callback)
         
     def _playback_loop(self):
-        """Main playback loop."""
-        last_update = time.time()
+        """Presentation-clock loop.
+        
+        The clock advances with wall time times the playback speed. On every
+        tick each camera shows the frame recorded at the clock position: frames
+        the clock has already passed are skipped with grab(), and only the frame
+        that will be shown is decoded. Decoding runs outside the lock, so seeks
+        are served immediately; a tick overtaken by a seek is dropped.
+        """
+        last_update = time.monotonic()
         
         while not self.stop_event.is_set():
-            current_time = time.time()
-            delta_time = (current_time - last_update) * self.playback_speed
-            self.current_position += delta_time
-            
-            if self.current_position >= self.duration:
-                self.current_position = 0
-                for cap in self.video_captures.values():
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    
-            frames_dict = {}
+            tick_start = time.monotonic()
+            
+            # The clock moves under the lock, so a seek in between is never overwritten
             with self.lock:
-                for camera_id, cap in self.video_captures.items():
-                    ret, frame = cap.read()
-                    if ret:
-                        frames_dict[camera_id] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                speed = self.playback_speed
+                self.current_position += (tick_start - last_update) * speed
+                last_update = tick_start
+                
+                if self.current_position >= self.duration:
+                    self.current_position = 0
+                    for camera_id in self.frame_positions:
+                        self.frame_positions[camera_id] = -1
+                        
+                generation = self.seek_generation
+                position = self.current_position
+                targets = {}
+                for camera_id, current_frame in self.frame_positions.items():
+                    target = self._frame_at_time(camera_id, position)
+                    if target != current_frame:
+                        targets[camera_id] = target  # Otherwise still showing the right frame
+                        
+            # Faster than real time the eye cannot resolve full resolution anyway
+            use_proxies = speed > 1.0
+            frames_dict = self._read_frames(targets, proxy=use_proxies)
+            if self.stop_event.is_set():
+                break
+                
+            with self.lock:
+                if generation != self.seek_generation:
+                    continue
+                for camera_id in frames_dict:
+                    current_frame = self.frame_positions[camera_id]
+                    if current_frame >= 0 and targets[camera_id] > current_frame + 1:
+                        self.stats.dropped_frames += targets[camera_id] - current_frame - 1
+                self._present_frames(targets, frames_dict, proxy=use_proxies)
+                
+                # A frame is late if it appears after the next one was already due;
+                # waiting for the next display tick does not count as lateness
+                presented_at = time.monotonic()
+                min_tick = 1.0 / self.display_fps
+                for camera_id, frame_number in targets.items():
+                    if camera_id not in frames_dict:
+                        continue
+                    overdue = (position - self._time_of_frame(camera_id, frame_number)) / speed
+                    lateness = (presented_at - tick_start) + max(0.0, overdue - min_tick)
+                    if lateness > self._frame_interval(camera_id) / speed:
+                        self.stats.late_frames += 1
+                self.stats.presented_frames += len(frames_dict)
+                self.stats.ticks += 1
+                
+                # Sleep until the next frame of any camera is due (halfway to its
+                # timestamp, as the nearest frame is shown), but never tick faster
+                # than the display can show. A camera that has not shown a frame
+                # yet (-1) is due right away.
+                next_due = max(min_tick, min(
+                    [((self._time_of_frame(camera_id, current_frame) +
+                       self._time_of_frame(camera_id, current_frame + 1)) / 2 - position) / speed
+                     if current_frame >= 0 else 0.0
+                     for camera_id, current_frame in self.frame_positions.items()] or [min_tick]
+                ))
                         
             if frames_dict:
                 self._notify_callbacks(frames_dict)
                 
-            last_update = current_time
-            time.sleep(1/60)  # Limit to 60 FPS max
-            
+            remaining = next_due - (time.monotonic() - tick_start)
+            if remaining > 0:
+                self.stop_event.wait(remaining)
+                
+    def _frame_interval(self, camera_id: int) -> float:
+        return 1.0 / self.frame_rates[camera_id]
+        
+    def get_playback_stats(self) -> PlaybackStats:
+        """Presented, dropped (skipped) and late frame counts since play() was called."""
+        return PlaybackStats(**vars(self.stats))
+        
+    def get_cache_stats(self) -> Dict[int, CacheStats]:
+        """Hit rate and memory use of each camera's decoded-frame cache."""
+        return {camera_id: cache.get_stats() for camera_id, cache in self.frame_caches.items()}
+        
     def _notify_callbacks(self, frames: Dict[int, np.ndarray]):
         """Notify all registered callbacks with new frames."""
         for callback in self.frame_callbacks:
             callback(frames)
             
+    def close(self):
+        """Stop playback and read-ahead and release the loaded session."""
+        self._stop_playback()
+        for camera_id in list(self.video_captures):
+            self._close_camera(camera_id)
+        self.segments.clear()
+        self.camera_offsets.clear()
+        self.markers = []
+        self.session_cameras = []
+        self.session_path = None
+        
     def __del__(self):
         """Cleanup resources."""
-        self.pause()
-        for cap in self.video_captures.values():
-            cap.release()
+        self.close()
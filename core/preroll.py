@@ -0,0 +1,170 @@
+import cv2
+import logging
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Condition
+from typing import Deque, Dict, List, Tuple
+
+from .frames import FrameRef, PixelFormat, convert_frame
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PrerollStats:
+    camera_id: int
+    frames: int = 0
+    seconds: float = 0.0
+    memory_bytes: int = 0
+    budget_bytes: int = 0         # Shared by all cameras
+    pending: int = 0              # Frames waiting for or in compression
+    dropped_frames: int = 0       # Frames skipped because compression could not keep up
+    evicted_frames: int = 0       # Frames pushed out by the time window or the byte budget
+
+class PrerollBuffer:
+    """Always-on rolling buffer of the last seconds of every camera, JPEG-compressed in memory.
+
+    Register on_frame as a frame listener. Capture threads only hand frames to
+    a pool of compression threads; when the pool falls behind, frames are
+    skipped rather than stalling capture. Each camera keeps the frames within
+    the window of its own newest frame, and the oldest frames across all
+    cameras are dropped whenever the total size goes over the byte budget.
+    While a recording runs the buffer is paused: the recording already holds
+    those frames, so compressing them again would only cost CPU.
+    """
+    def __init__(self, seconds: float = 10.0, budget_bytes: int = 256 * 1024 * 1024,
+                 quality: int = 85, workers: int = 2, max_pending: int = 8):
+        self.seconds = seconds
+        self.budget_bytes = budget_bytes
+        self.quality = quality
+        self.max_pending = max_pending  # Per camera
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preroll")
+        self.condition = Condition()
+        self.frames: Dict[int, Deque[Tuple[float, np.ndarray]]] = {}  # Oldest first
+        self.memory_bytes = 0
+        self.camera_bytes: Dict[int, int] = {}  # Running total per camera, so stats need no walk
+        self.in_flight: Dict[int, List[float]] = {}  # Timestamps of frames being compressed
+        self.dropped_frames: Dict[int, int] = {}
+        self.evicted_frames: Dict[int, int] = {}
+        self.closed = False
+        self.paused = False
+
+    def on_frame(self, camera_id: int, ref: FrameRef):
+        """Capture-thread listener: queue the frame for compression, or skip it if the pool is behind."""
+        with self.condition:
+            if self.closed or self.paused:
+                return
+            if camera_id not in self.frames:
+                self.frames[camera_id] = deque()
+                self.camera_bytes[camera_id] = 0
+                self.in_flight[camera_id] = []
+                self.dropped_frames[camera_id] = 0
+                self.evicted_frames[camera_id] = 0
+            if len(self.in_flight[camera_id]) >= self.max_pending:
+                self.dropped_frames[camera_id] += 1
+                return
+            self.in_flight[camera_id].append(ref.timestamp)
+        self.executor.submit(self._compress, camera_id, ref)
+
+    def _compress(self, camera_id: int, ref: FrameRef):
+        """Pool thread: compress one frame and insert it in timestamp order."""
+        try:
+            if ref.pixel_format == PixelFormat.MJPEG:
+                jpeg = np.array(ref.frame)  # Already compressed by the camera
+            else:
+                bgr = convert_frame(ref.frame, ref.pixel_format, PixelFormat.BGR)
+                ok, jpeg = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if not ok:
+                    raise ValueError("JPEG encoding failed")
+                jpeg = jpeg.reshape(-1)
+        except Exception as e:
+            logger.error(f"Error compressing pre-roll frame of camera {camera_id}: {str(e)}")
+            jpeg = None
+
+        with self.condition:
+            self.in_flight[camera_id].remove(ref.timestamp)
+            if jpeg is not None and not self.closed and not self.paused:
+                frames = self.frames[camera_id]
+                # Workers finish out of order, but only by a few frames
+                position = len(frames)
+                while position > 0 and frames[position - 1][0] > ref.timestamp:
+                    position -= 1
+                frames.insert(position, (ref.timestamp, jpeg))
+                self.memory_bytes += jpeg.nbytes
+                self.camera_bytes[camera_id] += jpeg.nbytes
+                self._evict(camera_id)
+            self.condition.notify_all()
+
+    def _evict(self, camera_id: int):
+        """Drop the camera's frames outside its own window, then the oldest frames of any camera over budget."""
+        frames = self.frames[camera_id]
+        newest = frames[-1][0]
+        while frames and frames[0][0] < newest - self.seconds:
+            self._pop_oldest(camera_id)
+        while self.memory_bytes > self.budget_bytes:
+            self._pop_oldest(min((camera_id for camera_id, frames in self.frames.items() if frames),
+                                 key=lambda camera_id: self.frames[camera_id][0][0]))
+
+    def _pop_oldest(self, camera_id: int):
+        jpeg = self.frames[camera_id].popleft()[1]
+        self.memory_bytes -= jpeg.nbytes
+        self.camera_bytes[camera_id] -= jpeg.nbytes
+        self.evicted_frames[camera_id] += 1
+
+    def snapshot(self, until: float, timeout: float = 1.0) -> Dict[int, List[Tuple[float, np.ndarray]]]:
+        """Buffered (timestamp, jpeg) frames captured before until, per camera, oldest first.
+
+        Waits for frames captured before until that are still being compressed,
+        so none falls into the gap between the pre-roll and a recording
+        starting at until.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: all(timestamp >= until for in_flight in self.in_flight.values() for timestamp in in_flight),
+                timeout
+            )
+            return {camera_id: [(timestamp, jpeg) for timestamp, jpeg in frames if timestamp < until]
+                    for camera_id, frames in self.frames.items()}
+
+    def get_stats(self) -> Dict[int, PrerollStats]:
+        """Buffered frames, seconds and bytes per camera against the shared budget."""
+        with self.condition:
+            stats = {}
+            for camera_id, frames in self.frames.items():
+                stats[camera_id] = PrerollStats(
+                    camera_id=camera_id,
+                    frames=len(frames),
+                    seconds=frames[-1][0] - frames[0][0] if frames else 0.0,
+                    memory_bytes=self.camera_bytes[camera_id],
+                    budget_bytes=self.budget_bytes,
+                    pending=len(self.in_flight[camera_id]),
+                    dropped_frames=self.dropped_frames[camera_id],
+                    evicted_frames=self.evicted_frames[camera_id],
+                )
+            return stats
+
+    def pause(self):
+        """Stop buffering, e.g. while a recording holds the frames, and release the buffered ones."""
+        with self.condition:
+            self.paused = True
+            self._clear()
+
+    def resume(self):
+        """Start buffering again from the next frame."""
+        with self.condition:
+            self.paused = False
+
+    def _clear(self):
+        for camera_id, frames in self.frames.items():
+            frames.clear()
+            self.camera_bytes[camera_id] = 0
+        self.memory_bytes = 0
+
+    def close(self):
+        """Stop accepting frames and release the buffered ones."""
+        with self.condition:
+            self.closed = True
+        self.executor.shutdown(wait=True)
+        with self.condition:
+            self._clear()
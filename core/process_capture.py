@@ -0,0 +1,529 @@
+import cv2
+import numpy as np
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .camera_manager import CameraStats, CameraWorker
+from .frames import FrameRef, PixelFormat
+from .sources import open_source
+
+logger = logging.getLogger(__name__)
+
+# Capture statistics mirrored from the capture process into shared memory
+STATS_FIELDS = ("fps", "frames_read", "failed_reads", "read_latency_ms",
+                "mean_read_latency_ms", "max_read_latency_ms")
+
+# Capture properties reported back to the GUI process once per camera
+REMOTE_PROPERTIES = (cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_WIDTH,
+                     cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FOURCC)
+
+def _ring_layout(ring_size: int, shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+    """Byte offsets of timestamps, stats and frames, plus the total size of a ring."""
+    timestamps_offset = 8 * (ring_size + 1)
+    stats_offset = timestamps_offset + 8 * ring_size
+    frames_offset = (stats_offset + 8 * len(STATS_FIELDS) + 63) // 64 * 64  # Cache-line align pixels
+    frame_bytes = int(np.prod(shape))
+    return timestamps_offset, stats_offset, frames_offset, frames_offset + ring_size * frame_bytes
+
+class SharedFrameRing:
+    """Ring of frame slots in a shared memory block, written by one capture process.
+
+    Layout: int64 header [latest_seq, seq of each slot], float64 capture
+    timestamps, float64 capture stats, then the uint8 frames themselves. The
+    writer marks a slot with -1 while decoding into it. Readers copy a slot
+    and check its sequence number again afterwards, so they never hand out a
+    half-written frame or one the writer started to overwrite while it was
+    being copied; frames returned to readers are private copies.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, ring_size: int, shape: Tuple[int, ...]):
+        self.shm = shm
+        self.ring_size = ring_size
+        self.shape = tuple(shape)
+        timestamps_offset, stats_offset, frames_offset, _ = _ring_layout(ring_size, self.shape)
+        self.header = np.ndarray((ring_size + 1,), dtype=np.int64, buffer=shm.buf)
+        self.timestamps = np.ndarray((ring_size,), dtype=np.float64, buffer=shm.buf,
+                                     offset=timestamps_offset)
+        self.stats = np.ndarray((len(STATS_FIELDS),), dtype=np.float64, buffer=shm.buf,
+                                offset=stats_offset)
+        self.frames = np.ndarray((ring_size,) + self.shape, dtype=np.uint8, buffer=shm.buf,
+                                 offset=frames_offset)
+        self.pixel_format = PixelFormat.BGR  # Set to RGB to convert in the capture process
+        self.write_seq = int(self.header[0])
+        self.read_lock = threading.Lock()  # Guards reads and the read counters against close()
+        self.last_read_seq = 0
+        self.dropped_frames = 0  # Frames overwritten before any reader fetched them
+
+    @classmethod
+    def create(cls, ring_size: int, shape: Tuple[int, ...]) -> "SharedFrameRing":
+        """Allocate a new ring, owned (and eventually unlinked) by the caller."""
+        size = _ring_layout(ring_size, tuple(shape))[3]
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), ring_size, shape)
+        ring.header[:] = 0
+        ring.stats[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, ring_size: int, shape: Tuple[int, ...]) -> "SharedFrameRing":
+        """Attach to a ring created by another process."""
+        return cls(shared_memory.SharedMemory(name=name), ring_size, shape)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def next_buffer(self) -> np.ndarray:
+        """Writer side: claim the slot the next frame will be decoded into."""
+        slot = (self.write_seq + 1) % self.ring_size
+        self.header[1 + slot] = -1
+        return self.frames[slot]
+
+    def publish(self, frame: Optional[np.ndarray], timestamp: float) -> Optional[FrameRef]:
+        """Writer side: commit the frame decoded into the claimed slot."""
+        if frame is None:
+            return None  # Readers keep seeing the last good frame
+
+        seq = self.write_seq + 1
+        slot = seq % self.ring_size
+        target = self.frames[slot]
+        if not np.shares_memory(frame, target):
+            # The backend allocated its own buffer, e.g. after a format change
+            if frame.shape != self.shape:
+                logger.warning(f"Dropping frame of shape {frame.shape}, ring expects {self.shape}")
+                return None
+            np.copyto(target, frame)
+        if self.pixel_format == PixelFormat.RGB:
+            cv2.cvtColor(target, cv2.COLOR_BGR2RGB, dst=target)
+
+        self.timestamps[slot] = timestamp
+        self.header[1 + slot] = seq
+        self.header[0] = seq
+        self.write_seq = seq
+        return FrameRef(seq, timestamp, target, self.pixel_format)
+
+    def write_stats(self, stats: CameraStats):
+        """Writer side: mirror the capture worker's statistics."""
+        self.stats[:] = [getattr(stats, field) for field in STATS_FIELDS]
+
+    def read_stats(self) -> Optional[Dict[str, float]]:
+        """Reader side: the capture worker's statistics by field, None once closed."""
+        with self.read_lock:
+            if self.stats is None:
+                return None
+            return dict(zip(STATS_FIELDS, self.stats.tolist()))
+
+    def get_if_newer(self, seq: int) -> Optional[FrameRef]:
+        """Reader side: latest frame if its sequence number is greater than seq."""
+        with self.read_lock:
+            if self.header is None:
+                return None  # Closed
+            latest = int(self.header[0])
+            if latest <= seq:
+                return None
+            slot = latest % self.ring_size
+            if int(self.header[1 + slot]) != latest:
+                return None  # The writer lapped the ring before we got to it
+            timestamp = float(self.timestamps[slot])
+            frame = self.frames[slot].copy()
+            if int(self.header[1 + slot]) != latest:
+                return None  # The writer claimed the slot while we were copying it
+
+            if latest > self.last_read_seq:
+                if self.last_read_seq:
+                    self.dropped_frames += latest - self.last_read_seq - 1
+                self.last_read_seq = latest
+        return FrameRef(latest, timestamp, frame, self.pixel_format)
+
+    def get(self) -> Optional[FrameRef]:
+        """Reader side: latest frame regardless of whether it was seen before."""
+        return self.get_if_newer(0)
+
+    def close(self, unlink: bool = False):
+        """Detach from the shared memory block, unlinking it if we own it."""
+        with self.read_lock:
+            self.header = self.timestamps = self.stats = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A consumer still holds a view; the mapping goes away with it
+            logger.debug(f"Shared frame ring {self.name} still referenced at close")
+        if unlink:
+            self.shm.unlink()
+
+def _capture_process_main(conn, ring_size: int):
+    """Entry point of a capture process serving one group of cameras."""
+    caps = {}
+    rings: Dict[int, SharedFrameRing] = {}
+    workers: Dict[int, CameraWorker] = {}
+    try:
+        while True:
+            if conn.poll(0.25):
+                command, *args = conn.recv()
+                if command == "open":
+                    request_id, camera_idx, source, pixel_format = args
+                    if camera_idx in workers:
+                        # Opened again: stop the old reader before its device is reopened
+                        workers.pop(camera_idx).stop()
+                        rings.pop(camera_idx).close()
+                    if camera_idx in caps:
+                        # Also covers a camera opened for a request the GUI process gave up waiting for
+                        caps.pop(camera_idx)[0].release()
+                    cap = open_source(source)
+                    ret, frame = cap.read() if cap is not None else (False, None)
+                    if not ret:
+                        if cap is not None:
+                            cap.release()
+                        conn.send((request_id, "failed", camera_idx, None, None))
+                        continue
+                    caps[camera_idx] = (cap, pixel_format)
+                    properties = {prop: cap.get(prop) for prop in REMOTE_PROPERTIES}
+                    conn.send((request_id, "opened", camera_idx, frame.shape, properties))
+                elif command == "attach":
+                    camera_idx, name, shape = args
+                    cap, pixel_format = caps[camera_idx]
+                    ring = SharedFrameRing.attach(name, ring_size, shape)
+                    ring.pixel_format = pixel_format
+                    rings[camera_idx] = ring
+                    workers[camera_idx] = CameraWorker(camera_idx, cap, slot=ring)
+                elif command == "start":
+                    workers[args[0]].start()
+                elif command == "stop":
+                    break
+
+            for camera_idx, worker in workers.items():
+                rings[camera_idx].write_stats(worker.get_stats())
+    except (EOFError, KeyboardInterrupt):
+        pass  # GUI process went away
+    finally:
+        for worker in workers.values():
+            worker.stop()
+        for cap, _ in caps.values():
+            cap.release()
+        for ring in rings.values():
+            ring.close()
+
+class RemoteCapture:
+    """GUI-side stand-in for a cv2.VideoCapture owned by a capture process."""
+    def __init__(self, properties: Dict[int, float]):
+        self.properties = properties
+        self.opened = True
+
+    def get(self, prop: int) -> float:
+        return self.properties.get(prop, 0.0)
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+class _CaptureProcess:
+    """GUI-side handle on one capture process and the cameras it serves."""
+    def __init__(self, context, ring_size: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_capture_process_main,
+                                       args=(child_conn, ring_size), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.camera_ids: List[int] = []
+        self.lock = threading.Lock()          # Guards sending; held only while a message is written
+        self.reply_lock = threading.Lock()    # One request waits for its reply at a time
+        self.last_request_id = 0
+
+    def send(self, message: tuple):
+        with self.lock:
+            self.conn.send(message)
+
+    def request(self, message: tuple, timeout: float) -> tuple:
+        """Send (command, *args) with a request id and wait for the reply carrying the same id.
+
+        Replies to earlier requests that timed out are discarded on the way.
+        Other messages can be sent while the reply is awaited.
+        """
+        with self.reply_lock:
+            self.last_request_id += 1
+            request_id = self.last_request_id
+            self.send((message[0], request_id) + tuple(message[1:]))
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    raise TimeoutError(f"Capture process did not answer {message[0]!r} in {timeout}s")
+                reply_id, *reply = self.conn.recv()
+                if reply_id == request_id:
+                    return tuple(reply)
+                logger.warning(f"Discarding late reply to capture process request {reply_id}")
+
+    def shutdown(self, timeout: float = 2.0):
+        try:
+            self.send(("stop",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+class ProcessCameraManager:
+    """CameraManager backend that reads cameras in separate processes.
+
+    Each capture process serves up to cameras_per_process cameras and decodes
+    straight into shared memory rings, so frames reach the GUI process without
+    pickling and capture no longer competes with the UI for the GIL. The public
+    interface matches CameraManager.
+    """
+    def __init__(self, cameras_per_process: int = 1, ring_size: int = 4, open_timeout: float = 3.0):
+        self.cameras_per_process = max(1, cameras_per_process)
+        self.ring_size = max(3, ring_size)
+        self.open_timeout = open_timeout
+        self.cameras: Dict[int, RemoteCapture] = {}
+        self.rings: Dict[int, SharedFrameRing] = {}
+        self.camera_processes: Dict[int, _CaptureProcess] = {}
+        self.processes: List[_CaptureProcess] = []
+        self.running = False
+        self.lock = threading.Lock()
+        self.frame_listeners = []
+        self.dispatch_thread: Optional[threading.Thread] = None
+        # Spawn rather than fork: forking a process that already runs Qt and capture threads is unsafe
+        self.context = mp.get_context("spawn")
+
+    def _process_with_room(self) -> _CaptureProcess:
+        for process in self.processes:
+            if len(process.camera_ids) < self.cameras_per_process and process.process.is_alive():
+                return process
+        process = _CaptureProcess(self.context, self.ring_size)
+        self.processes.append(process)
+        return process
+
+    def add_camera(self, camera_idx, passthrough=None, source=None,
+                   pixel_format: PixelFormat = PixelFormat.BGR) -> bool:
+        """Add a camera, opened inside a capture process that delivers pixel_format
+
+        Takes the same arguments as CameraManager.add_camera. source is a
+        device index or source spec string (see open_source), by default
+        camera_idx; opened source objects cannot cross into a process.
+        Shared memory rings hold fixed-size decoded frames, so passthrough
+        is not available and cameras are always decoded. Blocks the caller
+        for at most open_timeout while the process opens the device; a
+        camera that answers later is released on the next open.
+        """
+        with self.lock:
+            if camera_idx in self.cameras:
+                logger.error(f"Camera {camera_idx} is already open")
+                return False
+        if passthrough:
+            logger.warning(f"Camera {camera_idx}: MJPG passthrough is not supported by process capture, "
+                           f"decoding instead")
+        try:
+            process = self._process_with_room()
+            source = camera_idx if source is None else source
+            status, _, shape, properties = process.request(("open", camera_idx, source, pixel_format),
+                                                           self.open_timeout)
+            if status != "opened":
+                logger.error(f"Failed to open camera {camera_idx}")
+                return False
+
+            ring = SharedFrameRing.create(self.ring_size, shape)
+            ring.pixel_format = pixel_format
+            process.send(("attach", camera_idx, ring.name, shape))
+            process.camera_ids.append(camera_idx)
+            with self.lock:
+                self.cameras[camera_idx] = RemoteCapture(properties)
+                self.rings[camera_idx] = ring
+                self.camera_processes[camera_idx] = process
+
+            if self.running:
+                process.send(("start", camera_idx))
+            logger.debug(f"Camera {camera_idx} attached to capture process {process.process.pid}")
+            return True
+        except Exception as e:
+            logger.error(f"Error adding camera {camera_idx}: {str(e)}")
+            return False
+
+    def start_capture(self):
+        """Start capturing from all cameras"""
+        if not self.running:
+            self.running = True
+            with self.lock:
+                camera_processes = list(self.camera_processes.items())
+            for camera_idx, process in camera_processes:
+                process.send(("start", camera_idx))
+            self._start_dispatch()
+            logger.debug(f"Started capture in {len(self.processes)} processes")
+
+    def stop_capture(self):
+        """Stop capturing and shut down all capture processes
+
+        Rings are closed under their read locks, so readers still holding one
+        get None instead of touching unmapped memory.
+        """
+        self.running = False
+        if self.dispatch_thread:
+            self.dispatch_thread.join()
+            self.dispatch_thread = None
+        for process in self.processes:
+            process.shutdown()
+        self.processes.clear()
+
+        with self.lock:
+            for cap in self.cameras.values():
+                cap.release()
+            for ring in self.rings.values():
+                ring.close(unlink=True)
+            self.cameras.clear()
+            self.rings.clear()
+            self.camera_processes.clear()
+        logger.debug("Stopped all capture processes")
+
+    def get_frames(self):
+        """Get the latest frames from all cameras (copies out of shared memory)"""
+        with self.lock:
+            rings = list(self.rings.items())
+        frames = {}
+        for camera_idx, ring in rings:
+            ref = ring.get()
+            frames[camera_idx] = ref.frame if ref else None
+        return frames
+
+    def get_frame(self, camera_idx):
+        """Get the latest frame from a single camera"""
+        ref = self.get_frame_ref(camera_idx)
+        return ref.frame if ref else None
+
+    def get_frame_ref(self, camera_idx, newer_than=0):
+        """Get (seq, timestamp, frame) for a camera if its sequence number is above newer_than"""
+        ring = self.rings.get(camera_idx)
+        return ring.get_if_newer(newer_than) if ring else None
+
+    def get_frames_since(self, last_seqs):
+        """Get frame refs only for cameras that published after the given {camera_idx: seq}"""
+        with self.lock:
+            rings = list(self.rings.items())
+        refs = {}
+        for camera_idx, ring in rings:
+            ref = ring.get_if_newer(last_seqs.get(camera_idx, 0))
+            if ref is not None:
+                refs[camera_idx] = ref
+        return refs
+
+    def get_camera_stats(self):
+        """Get per-camera frame rate, drop counters and read latency"""
+        with self.lock:
+            rings = list(self.rings.items())
+        stats = {}
+        for camera_idx, ring in rings:
+            values = ring.read_stats()
+            if values is None:
+                continue
+            stats[camera_idx] = CameraStats(
+                camera_idx=camera_idx,
+                fps=values["fps"],
+                frames_read=int(values["frames_read"]),
+                dropped_frames=ring.dropped_frames,
+                failed_reads=int(values["failed_reads"]),
+                read_latency_ms=values["read_latency_ms"],
+                mean_read_latency_ms=values["mean_read_latency_ms"],
+                max_read_latency_ms=values["max_read_latency_ms"],
+            )
+        return stats
+
+    def add_frame_listener(self, callback):
+        """Push every new frame to callback(camera_idx, FrameRef) from a dispatch thread.
+
+        Listeners may queue frames for longer than the ring keeps them; like
+        every reader of the rings they receive private copies.
+        """
+        with self.lock:
+            self.frame_listeners = self.frame_listeners + [callback]
+        if self.running:
+            self._start_dispatch()
+
+    def remove_frame_listener(self, callback):
+        """Stop pushing frames to a callback registered with add_frame_listener"""
+        with self.lock:
+            self.frame_listeners = [listener for listener in self.frame_listeners if listener != callback]
+
+    def _start_dispatch(self):
+        with self.lock:
+            if self.dispatch_thread is None and self.frame_listeners:
+                self.dispatch_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+                self.dispatch_thread.start()
+
+    def _dispatch_loop(self):
+        """Poll the rings and hand new frames to the frame listeners"""
+        last_seqs = {}
+        while self.running:
+            refs = self.get_frames_since(last_seqs)
+            if not refs:
+                time.sleep(0.001)
+                continue
+            for camera_idx, ref in refs.items():
+                last_seqs[camera_idx] = ref.seq
+                for listener in self.frame_listeners:
+                    try:
+                        listener(camera_idx, ref)
+                    except Exception as e:
+                        logger.error(f"Frame listener failed for camera {camera_idx}: {str(e)}")
+
+    def get_pixel_format(self, camera_idx):
+        """Layout of the frames a camera delivers"""
+        ring = self.rings.get(camera_idx)
+        return ring.pixel_format if ring else PixelFormat.BGR
+
+    def get_frame_set(self):
+        """Synchronized frame sets are only produced by CameraManager"""
+        return None
+
+    def get_sync_stats(self):
+        """Synchronized capture is only available in CameraManager"""
+        return None
+
+    def is_camera_connected(self, camera_idx):
+        """Check if a camera is open and its capture process is alive"""
+        process = self.camera_processes.get(camera_idx)
+        return process is not None and process.process.is_alive()
+
+    def is_capturing(self):
+        """Check if any cameras are capturing"""
+        return self.running and bool(self.cameras)
+
+class ProcessFrameReader:
+    """Drop-in replacement for AsyncFrameReader that reads in a capture process.
+
+    Frames are delivered in pixel_format; a conversion, if one is requested,
+    happens once in the capture process, directly in shared memory.
+    """
+    def __init__(self, camera_id, ring_size: int = 4, pixel_format: PixelFormat = PixelFormat.BGR):
+        self.camera_id = camera_id
+        self.pixel_format = pixel_format
+        self.manager = ProcessCameraManager(ring_size=ring_size)
+        self.running = False
+        self.logger = logging.getLogger(f"{__name__}.ProcessFrameReader.{camera_id}")
+
+    def start(self, cap=None):
+        """Start reading in a capture process"""
+        if self.running:
+            return
+        if cap is not None:
+            # The device can only be opened by one process at a time
+            cap.release()
+        if not self.manager.add_camera(self.camera_id, pixel_format=self.pixel_format):
+            self.logger.error("Capture process could not open the camera")
+            return
+        self.manager.start_capture()
+        self.running = True
+        self.logger.debug("Frame reader started")
+
+    def stop(self):
+        """Stop reading and shut down the capture process"""
+        self.running = False
+        self.manager.stop_capture()
+        self.logger.debug("Frame reader stopped")
+
+    def get_frame(self):
+        """Get the latest frame"""
+        return self.manager.get_frame(self.camera_id)
@@ -1,7 +1,7 @@
 import cv2
 import numpy as np
 from typing import Dict, List, Optional
-from threading import Thread, Lock, Event
+from threading import Lock
 import time
 from pathlib import Path
 import json
@@ -9,60 +9,186 @@ from datetime import datetime
 
 from .video_sync import VideoSync
 from .camera_manager import CameraManager
+from .encoder import EncoderWorker, EncoderStats
+from .frames import FrameRef, PixelFormat, convert_frame
+from .mjpeg_store import MjpegWriter, proxy_path_for
+from .segments import Segment, SegmentedVideoWriter, SessionJournal, JOURNAL_NAME
+from .catalog import SessionCatalog
+from .incidents import Marker, append_marker
+from .storage import StorageManager, StorageStats
+from .preroll import PrerollBuffer, PrerollStats
+from .thumbnails import ThumbnailWriter, thumbnail_path_for
+
+# "mp4" re-encodes with mp4v, "mjpeg" stores the camera's JPEG bitstream as-is
+RECORDING_MODES = ("mp4", "mjpeg")
 
 class Recorder:
-    def __init__(self, camera_manager: CameraManager):
+    def __init__(self, camera_manager: CameraManager, queue_size: int = 120, queue_policy: str = "block",
+                 recording_mode: str = "mp4", sync_frames: bool = False, sync_capacity: int = 300,
+                 sync_budget_mb: int = 512, preroll_seconds: float = 0.0, preroll_budget_mb: int = 256,
+                 proxy_height: int = 0, proxy_quality: int = 70,
+                 thumbnail_interval: float = 1.0, thumbnail_height: int = 72,
+                 segment_seconds: float = 60.0, catalog: Optional[SessionCatalog] = None,
+                 storage: Optional[StorageManager] = None):
+        if recording_mode not in RECORDING_MODES:
+            raise ValueError(f"Unknown recording mode {recording_mode!r}, expected one of {RECORDING_MODES}")
         self.camera_manager = camera_manager
-        self.video_sync = VideoSync()
+        self.recording_mode = recording_mode
+        # Most recent frames per camera, in memory: sync_capacity at most, fewer if they exceed the budget.
+        # Off by default, as it costs the encoder thread a copy of every frame.
+        self.sync_frames = sync_frames
+        self.video_sync = VideoSync(sync_capacity, sync_budget_mb * 1024 * 1024)
         self.recording = False
-        self.recording_thread = None
-        self.stop_event = Event()
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy  # "block", "drop_oldest" or "drop_newest"
         self.lock = Lock()
-        self.output_writers: Dict[int, cv2.VideoWriter] = {}
+        self.output_writers: Dict[int, object] = {}  # SegmentedVideoWriter or MjpegWriter
+        self.encoders: Dict[int, EncoderWorker] = {}
+        self.segment_seconds = segment_seconds  # Length of each mp4 file, 0 for one file per camera
+        self.journal: Optional[SessionJournal] = None
+        self.session_info: Dict = {}
+        self.catalog = catalog  # Indexed as sessions record, for browsing without opening them
+        self.catalog_session_id: Optional[int] = None
+        self.storage = storage  # Free space check before recording, throughput monitor during it
+        self.proxy_height = proxy_height  # Height of the all-keyframe scrubbing proxies, 0 for none
+        self.proxy_quality = proxy_quality
+        self.proxy_writers: Dict[int, MjpegWriter] = {}
+        self.proxy_encoders: Dict[int, EncoderWorker] = {}
+        self.thumbnail_interval = thumbnail_interval  # Seconds between filmstrip tiles, 0 for none
+        self.thumbnail_height = thumbnail_height
+        self.thumbnail_writers: Dict[int, ThumbnailWriter] = {}
         self.recording_start_time: Optional[float] = None
+        self.recording_start_monotonic: Optional[float] = None
         self.recording_path: Optional[Path] = None
+        self.live_start_monotonic: Optional[float] = None   # Frames before this come from the pre-roll
+        self.held_frames: Optional[Dict[int, List[FrameRef]]] = None  # Live frames while encoders start
+        self.live_formats: Dict[int, PixelFormat] = {}  # What each camera delivers, kept by VideoSync too
+        
+        # Always-on buffer of the last seconds, so a recording can start in the past
+        self.preroll: Optional[PrerollBuffer] = None
+        if preroll_seconds > 0:
+            self.preroll = PrerollBuffer(preroll_seconds, preroll_budget_mb * 1024 * 1024)
+            self.camera_manager.add_frame_listener(self.preroll.on_frame)
         
     def start_recording(self, output_directory: str):
         """Start recording from all active cameras."""
         if self.recording:
             return False
             
+        # Project the recording's size before committing to it
+        bytes_per_second = 0.0
+        if self.storage is not None:
+            check = self.storage.check(self._camera_formats(), self.recording_mode)
+            if not check.fits and self.storage.policy == "refuse":
+                return False
+            bytes_per_second = check.bytes_per_second
+            
         # Create output directory with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.recording_path = Path(output_directory) / timestamp
         self.recording_path.mkdir(parents=True, exist_ok=True)
+        self.journal = SessionJournal(self.recording_path / JOURNAL_NAME)
         
         # Initialize video writers for each camera
         active_cameras = []
         for camera_id in self.camera_manager.cameras.keys():
             if self.camera_manager.is_camera_connected(camera_id):
-                video_path = self.recording_path / f"camera_{camera_id}.mp4"
-                cap = self.camera_manager.cameras[camera_id]
-                fps = int(cap.get(cv2.CAP_PROP_FPS))
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                
-                writer = cv2.VideoWriter(
-                    str(video_path),
-                    cv2.VideoWriter_fourcc(*'mp4v'),
-                    fps,
-                    (width, height)
-                )
+                if self.recording_mode == "mjpeg":
+                    writer = MjpegWriter(str(self.recording_path / f"camera_{camera_id}.mjpeg"))
+                else:
+                    video_path = self.recording_path / f"camera_{camera_id}.mp4"
+                    cap = self.camera_manager.cameras[camera_id]
+                    fps = int(cap.get(cv2.CAP_PROP_FPS))
+                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    
+                    writer = SegmentedVideoWriter(
+                        video_path,
+                        fps,
+                        (width, height),
+                        camera_id,
+                        self.journal,
+                        self.segment_seconds,
+                        on_segment=self._on_segment_closed
+                    )
                 self.output_writers[camera_id] = writer
+                if self.thumbnail_interval > 0:
+                    main_path = self.recording_path / f"camera_{camera_id}.{self.recording_mode}"
+                    self.thumbnail_writers[camera_id] = ThumbnailWriter(
+                        thumbnail_path_for(main_path), self.thumbnail_interval, self.thumbnail_height
+                    )
+                if self.proxy_height > 0:
+                    # Best effort on its own thread: a slow proxy drops frames, never
+                    # holds up capture or the full-resolution encode
+                    main_path = self.recording_path / f"camera_{camera_id}.{self.recording_mode}"
+                    self.proxy_writers[camera_id] = MjpegWriter(str(proxy_path_for(main_path)))
+                    self.proxy_encoders[camera_id] = EncoderWorker(
+                        camera_id,
+                        lambda ref, camera_id=camera_id: self._encode_proxy(camera_id, ref),
+                        queue_size=self.queue_size,
+                        policy="drop_oldest"
+                    )
+                self.encoders[camera_id] = EncoderWorker(
+                    camera_id,
+                    lambda ref, camera_id=camera_id: self._encode_frame(camera_id, ref),
+                    queue_size=self.queue_size,
+                    policy=self.queue_policy
+                )
                 active_cameras.append(camera_id)
         
         if not active_cameras:
+            self.journal.close()
+            self.journal = None
             return False
             
-        # Start recording
+        # Start recording. Live frames are held back until the encoders start,
+        # so that the pre-roll is encoded first and nothing falls in between
         self.recording = True
-        self.recording_start_time = time.time()
-        self.stop_event.clear()
+        self.live_start_monotonic = time.monotonic()
+        self.held_frames = {camera_id: [] for camera_id in active_cameras}
+        self.camera_manager.add_frame_listener(self._on_frame)
+        
+        preroll = {}
+        if self.preroll is not None:
+            preroll = self.preroll.snapshot(until=self.live_start_monotonic)
+            self.preroll.pause()  # The recording has the frames from here on
+        preroll_start = min([frames[0][0] for camera_id, frames in preroll.items()
+                             if frames and camera_id in self.encoders] + [self.live_start_monotonic])
+        self.recording_start_monotonic = preroll_start
+        self.recording_start_time = time.time() - (time.monotonic() - preroll_start)
+        self.live_formats = {camera_id: self.camera_manager.get_pixel_format(camera_id) for camera_id in active_cameras}
         self.video_sync.start_recording(active_cameras)
         
-        # Start recording thread
-        self.recording_thread = Thread(target=self._record_loop, daemon=True)
-        self.recording_thread.start()
+        # Everything needed to play the session back if it never stops cleanly
+        self.session_info = {
+            "start_time": self.recording_start_time,
+            "cameras": active_cameras,
+            "format": self.recording_mode,
+            "segment_seconds": self.segment_seconds if self.recording_mode == "mp4" else 0,
+            "preroll_seconds": self.live_start_monotonic - self.recording_start_monotonic,
+            "proxy_height": self.proxy_height if self.proxy_writers else 0,
+            "thumbnail_interval": self.thumbnail_interval if self.thumbnail_writers else 0,
+        }
+        self.journal.append("start", **self.session_info)
+        if self.catalog is not None:
+            formats = self._camera_formats()
+            self.catalog_session_id = self.catalog.begin_session(
+                self.recording_path, self.recording_start_time, self.recording_mode, active_cameras,
+                pixel_rate=sum(width * height * fps for camera_id, (width, height, fps) in formats.items()
+                               if camera_id in active_cameras)
+            )
+        
+        # Start one encoder per camera, fed directly by the capture threads
+        with self.lock:
+            for camera_id, encoder in self.encoders.items():
+                backlog = [FrameRef(0, timestamp, jpeg, PixelFormat.MJPEG)
+                           for timestamp, jpeg in preroll.get(camera_id, [])]
+                encoder.start(backlog + self.held_frames[camera_id])
+                if camera_id in self.proxy_encoders:
+                    self.proxy_encoders[camera_id].start(backlog + self.held_frames[camera_id])
+            self.held_frames = None
+        if self.storage is not None:
+            self.storage.start_monitoring(self.recording_path, self.get_encoder_stats, bytes_per_second)
         return True
         
     def stop_recording(self):
@@ -70,41 +196,164 @@ class Recorder:
         if not self.recording:
             return
             
-        self.stop_event.set()
-        if self.recording_thread:
-            self.recording_thread.join()
+        # Stop feeding the encoders, then let them drain their queues
+        self.camera_manager.remove_frame_listener(self._on_frame)
+        duration = time.time() - self.recording_start_time
+        for encoder in list(self.encoders.values()) + list(self.proxy_encoders.values()):
+            encoder.stop()
+        if self.storage is not None:
+            self.storage.stop_monitoring()
             
         self.video_sync.stop_recording()
         
+        # Close the last segments (journaling them) before the session is declared complete
+        for writer in self.output_writers.values():
+            writer.release()
+            
         # Save metadata
         if self.recording_path:
+            encoder_stats = self.get_encoder_stats()
             metadata = {
-                "start_time": self.recording_start_time,
-                "duration": time.time() - self.recording_start_time,
-                "cameras": list(self.output_writers.keys())
+                **self.session_info,
+                "duration": duration,
+                "frames_encoded": {camera_id: stats.frames_encoded for camera_id, stats in encoder_stats.items()},
+                "dropped_frames": {camera_id: stats.dropped_frames for camera_id, stats in encoder_stats.items()}
             }
             
             with open(self.recording_path / "metadata.json", "w") as f:
                 json.dump(metadata, f)
+            self.journal.append("stop", duration=duration)
+            if self.catalog_session_id is not None:
+                for camera_id, writer in self.output_writers.items():
+                    self._update_catalog(camera_id, writer.frame_count, duration)
+                self.catalog.finish_session(self.catalog_session_id, duration)
         
         # Cleanup
-        for writer in self.output_writers.values():
+        self.journal.close()
+        self.journal = None
+        self.catalog_session_id = None
+        for writer in self.proxy_writers.values():
             writer.release()
+        for thumbnails in self.thumbnail_writers.values():
+            thumbnails.close()
         self.output_writers.clear()
+        self.encoders.clear()
+        self.proxy_writers.clear()
+        self.thumbnail_writers.clear()
+        self.proxy_encoders.clear()
         self.recording = False
         self.recording_start_time = None
+        self.recording_start_monotonic = None
+        self.live_start_monotonic = None
+        if self.preroll is not None:
+            self.preroll.resume()
+        
+    def _camera_formats(self) -> Dict[int, tuple]:
+        """(width, height, fps) of every connected camera."""
+        formats = {}
+        for camera_id, cap in self.camera_manager.cameras.items():
+            if self.camera_manager.is_camera_connected(camera_id):
+                formats[camera_id] = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                                      cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        return formats
+        
+    def _on_segment_closed(self, camera_id: int, segment: Segment):
+        """Encoder-thread callback once a segment is durable: keep the catalog current."""
+        if self.catalog_session_id is not None:
+            self._update_catalog(camera_id, segment.first_frame + segment.frame_count, segment.end)
+            
+    def _update_catalog(self, camera_id: int, frame_count: int, duration: float):
+        file_bytes = sum(path.stat().st_size for path in self.recording_path.glob(f"camera_{camera_id}[._]*"))
+        self.catalog.update_camera(self.catalog_session_id, camera_id, frame_count, duration, file_bytes)
+        
+    def _on_frame(self, camera_id: int, ref: FrameRef):
+        """Capture-thread callback: hand the frame to that camera's encoder queue."""
+        live_start = self.live_start_monotonic
+        if live_start is None:
+            return
+        if ref.timestamp < live_start and self.preroll is not None:
+            return  # Already in the pre-roll
+        if self.held_frames is not None:
+            with self.lock:
+                if self.held_frames is not None:
+                    if camera_id in self.held_frames:
+                        self.held_frames[camera_id].append(ref)
+                    return
+        encoder = self.encoders.get(camera_id)
+        if encoder is not None:
+            encoder.submit(ref)
+        proxy_encoder = self.proxy_encoders.get(camera_id)
+        if proxy_encoder is not None:
+            proxy_encoder.submit(ref)
+            
+    def _encode_frame(self, camera_id: int, ref: FrameRef):
+        """Encoder-thread work for one frame."""
+        writer = self.output_writers[camera_id]
+        timestamp = ref.timestamp - self.recording_start_monotonic
+        if self.recording_mode == "mjpeg":
+            # Passthrough cameras already deliver JPEG, everything else is compressed here
+            jpeg = convert_frame(ref.frame, ref.pixel_format, PixelFormat.MJPEG)
+            writer.write(jpeg, timestamp)
+        else:
+            # VideoWriter wants BGR, which is what capture delivers, so this is normally a no-op
+            writer.write(convert_frame(ref.frame, ref.pixel_format, PixelFormat.BGR), timestamp)
+        thumbnails = self.thumbnail_writers.get(camera_id)
+        if thumbnails is not None:
+            thumbnails.offer(ref, timestamp)
+        if self.sync_frames:
+            # Pre-roll frames are stored as JPEG; VideoSync keeps one layout per camera, the live one
+            live_format = self.live_formats.get(camera_id, ref.pixel_format)
+            self.video_sync.add_frame(camera_id, convert_frame(ref.frame, ref.pixel_format, live_format),
+                                      ref.timestamp, live_format)
+        
+    def _encode_proxy(self, camera_id: int, ref: FrameRef):
+        """Proxy-encoder work for one frame: downscale and store as a standalone JPEG."""
+        frame = convert_frame(ref.frame, ref.pixel_format, PixelFormat.BGR)
+        height, width = frame.shape[:2]
+        if height > self.proxy_height:
+            proxy_width = max(1, round(width * self.proxy_height / height))
+            frame = cv2.resize(frame, (proxy_width, self.proxy_height), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.proxy_quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        self.proxy_writers[camera_id].write(jpeg.reshape(-1), ref.timestamp - self.recording_start_monotonic)
+            
+    def add_marker(self, label: str = "", camera_id: Optional[int] = None) -> Optional[Marker]:
+        """Flag an incident at this moment of the recording, stored in the session and the catalog."""
+        start = self.recording_start_monotonic
+        recording_path = self.recording_path
+        if not self.recording or start is None:
+            return None
+        marker = Marker(time.monotonic() - start, label, camera_id)
+        append_marker(recording_path, marker)
+        session_id = self.catalog_session_id
+        if session_id is not None:
+            self.catalog.add_marker(session_id, marker.time, label, camera_id)
+        return marker
+        
+    def get_encoder_stats(self) -> Dict[int, EncoderStats]:
+        """Live queue depth, encoded FPS and dropped frame counts per camera."""
+        return {camera_id: encoder.get_stats() for camera_id, encoder in self.encoders.items()}
+        
+    def get_proxy_encoder_stats(self) -> Dict[int, EncoderStats]:
+        """Same as get_encoder_stats for the proxy streams, empty if proxies are disabled."""
+        return {camera_id: encoder.get_stats() for camera_id, encoder in self.proxy_encoders.items()}
+        
+    def get_preroll_stats(self) -> Dict[int, PrerollStats]:
+        """Buffered seconds and memory of the pre-roll per camera, empty if it is disabled."""
+        return self.preroll.get_stats() if self.preroll is not None else {}
+        
+    def get_storage_stats(self) -> Optional[StorageStats]:
+        """Free space, write throughput against what the encoders need, and recording time left."""
+        return self.storage.get_stats() if self.storage is not None else None
         
-    def _record_loop(self):
-        """Main recording loop."""
-        while not self.stop_event.is_set():
-            for camera_id, writer in self.output_writers.items():
-                frame = self.camera_manager.get_frame(camera_id)
-                if frame is not None:
-                    # Convert RGB back to BGR for OpenCV
-                    frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                    writer.write(frame_bgr)
-                    self.video_sync.add_frame(camera_id, frame)
-            time.sleep(1/60)  # Limit to 60 FPS max
+    def close(self):
+        """Stop any recording and the pre-roll buffer."""
+        self.stop_recording()
+        if self.preroll is not None:
+            self.camera_manager.remove_frame_listener(self.preroll.on_frame)
+            self.preroll.close()
+            self.preroll = None
             
     def is_recording(self) -> bool:
         """Check if currently recording."""
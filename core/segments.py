@@ -0,0 +1,267 @@
+import cv2
+import json
+import logging
+import os
+import struct
+import numpy as np
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .frame_index import FrameIndexWriter, index_path_for, mp4_sample_table
+
+logger = logging.getLogger(__name__)
+
+# Append-only session log, one JSON object per line, next to metadata.json
+JOURNAL_NAME = "journal.jsonl"
+
+class Segment(NamedTuple):
+    """A closed, independently playable piece of a camera's recording."""
+    path: Path
+    first_frame: int   # Frame number of its first frame in the camera's whole recording
+    frame_count: int
+    start: float       # Capture time of its first and last frame since the recording started
+    end: float
+
+def segment_path_for(video_path, segment: int) -> Path:
+    """File of one segment of a stream, e.g. camera_0.mp4 -> camera_0_00003.mp4"""
+    video_path = Path(video_path)
+    return video_path.with_name(f"{video_path.stem}_{segment:05d}{video_path.suffix}")
+
+class SessionJournal:
+    """Append-only log of a recording: what was started and every segment that was completed.
+
+    Each entry is flushed and fsynced before append() returns, so after a
+    crash the journal names exactly the segments that are safe to play.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, "a")
+        self.lock = Lock()
+
+    def append(self, event: str, **fields):
+        line = json.dumps({"event": event, **fields})
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    @staticmethod
+    def read(path) -> List[dict]:
+        """Entries of a journal, ignoring a last line cut short by a crash."""
+        path = Path(path)
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated journal entry in {path}")
+                    break
+        return entries
+
+def journal_segments(session_path, entries: List[dict]) -> Dict[int, List[Segment]]:
+    """Completed segments per camera, in order."""
+    segments: Dict[int, List[Segment]] = {}
+    for entry in entries:
+        if entry.get("event") == "segment":
+            segments.setdefault(int(entry["camera"]), []).append(Segment(
+                Path(session_path) / entry["file"], entry["first_frame"], entry["frame_count"],
+                entry["start"], entry["end"]
+            ))
+    for camera_segments in segments.values():
+        camera_segments.sort(key=lambda segment: segment.first_frame)
+    return segments
+
+def recover_metadata(session_path, entries: List[dict]) -> Optional[dict]:
+    """Rebuild metadata.json's contents for a session that never stopped cleanly."""
+    start = next((entry for entry in entries if entry.get("event") == "start"), None)
+    if start is None:
+        return None
+    metadata = {key: value for key, value in start.items() if key != "event"}
+    ends = [segment.end for camera_segments in journal_segments(session_path, entries).values()
+            for segment in camera_segments]
+    metadata["duration"] = max(ends) if ends else 0.0
+    metadata["recovered"] = True
+    return metadata
+
+class SegmentedVideoWriter:
+    """mp4v writer that rolls over to a new file every segment_seconds, with a sidecar frame index.
+
+    Closing a segment writes its moov atom, so every closed segment is a
+    complete file. The segment is then recorded in the journal; a crash
+    loses at most the segment being written. With segment_seconds <= 0 the
+    whole recording goes to video_path itself.
+    """
+    def __init__(self, video_path, fps: float, frame_size: Tuple[int, int], camera_id: int,
+                 journal: Optional[SessionJournal] = None, segment_seconds: float = 60.0,
+                 on_segment: Optional[Callable[[int, Segment], None]] = None):
+        self.video_path = Path(video_path)
+        self.fps = fps
+        self.frame_size = frame_size
+        self.camera_id = camera_id
+        self.journal = journal
+        self.segment_seconds = segment_seconds
+        self.on_segment = on_segment  # Called with (camera_id, segment) once a segment is durable
+        self.index = FrameIndexWriter(index_path_for(self.video_path))
+        self.writer: Optional[cv2.VideoWriter] = None
+        self.segment = -1
+        self.segment_path: Optional[Path] = None
+        self.segment_first_frame = 0
+        self.segment_start = 0.0
+        self.last_timestamp = 0.0
+        self.closed = False
+
+    @property
+    def frame_count(self) -> int:
+        return self.index.frame_count
+
+    def _open_segment(self, segment: int, timestamp: float):
+        self.segment = segment
+        self.segment_path = segment_path_for(self.video_path, segment) if self.segment_seconds > 0 else self.video_path
+        self.writer = cv2.VideoWriter(str(self.segment_path), cv2.VideoWriter_fourcc(*'mp4v'),
+                                      self.fps, self.frame_size)
+        self.segment_first_frame = self.frame_count
+        self.segment_start = timestamp
+
+    def _close_segment(self):
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        frame_count = self.frame_count - self.segment_first_frame
+        if not frame_count:
+            return
+        # The closed file's sample table says where every frame is and which are intra frames
+        try:
+            table = mp4_sample_table(self.segment_path)
+        except (OSError, struct.error, ValueError) as e:
+            logger.warning(f"Could not read the sample table of {self.segment_path}: {e}")
+            table = None
+        if table is not None and len(table[0]) == frame_count:
+            self.index.update(self.segment_first_frame, *table)
+        else:
+            logger.warning(f"Keeping provisional keyframes for {self.segment_path}; seeks decode from its start")
+        # Make the segment durable before the journal vouches for it
+        self.index.flush()
+        with open(self.segment_path, "rb") as f:
+            os.fsync(f.fileno())
+        if self.journal is not None:
+            self.journal.append("segment", camera=self.camera_id, segment=self.segment,
+                                file=self.segment_path.name, first_frame=self.segment_first_frame,
+                                frame_count=frame_count, start=self.segment_start, end=self.last_timestamp)
+        if self.on_segment is not None:
+            self.on_segment(self.camera_id, Segment(self.segment_path, self.segment_first_frame, frame_count,
+                                                    self.segment_start, self.last_timestamp))
+
+    def write(self, frame: np.ndarray, timestamp: float):
+        """Append one BGR frame captured at timestamp (seconds since the recording started)."""
+        segment = int(timestamp // self.segment_seconds) if self.segment_seconds > 0 else 0
+        if self.writer is None or segment > self.segment:
+            self._close_segment()
+            self._open_segment(max(segment, self.segment + 1), timestamp)
+        self.writer.write(frame)
+        # Provisional until the segment closes and its sample table is read: only the
+        # first frame of a file is known to be an intra frame, and offsets are unknown
+        self.index.append(timestamp, keyframe=self.frame_count == self.segment_first_frame)
+        self.last_timestamp = timestamp
+
+    def isOpened(self) -> bool:
+        return not self.closed
+
+    def release(self):
+        """Close the current segment and the index."""
+        if not self.closed:
+            self._close_segment()
+            self.index.close()
+            self.closed = True
+
+class SegmentedCapture:
+    """cv2.VideoCapture-compatible reader over a camera's segments.
+
+    Only the segment a read lands in is open, so loading a session does not
+    depend on its length and a seek opens at most one file.
+    """
+    def __init__(self, segments: List[Segment]):
+        self.segments = segments
+        self.first_frames = np.array([segment.first_frame for segment in segments], dtype=np.int64)
+        self.frame_count = sum(segment.frame_count for segment in segments)
+        self.cap: Optional[cv2.VideoCapture] = None
+        self.current = -1          # Segment self.cap has open
+        self.position = 0          # Frame number the next grab() returns
+        self.positioned = False    # Whether self.cap's next frame is self.position
+        self.cap_position = 0      # Frame within the open segment that self.cap returns next
+
+    def _segment_of(self, frame_number: int) -> int:
+        return max(0, int(np.searchsorted(self.first_frames, frame_number, side="right")) - 1)
+
+    def _open(self, segment: int):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = cv2.VideoCapture(str(self.segments[segment].path))
+        self.current = segment
+        self.cap_position = 0
+        self.positioned = False
+
+    def isOpened(self) -> bool:
+        return bool(self.segments)
+
+    def grab(self) -> bool:
+        if self.position >= self.frame_count:
+            return False
+        segment = self._segment_of(self.position)
+        if segment != self.current:
+            self._open(segment)
+        offset = self.position - self.segments[segment].first_frame
+        if not self.positioned and offset != self.cap_position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, offset)
+        self.positioned = True
+        self.position += 1
+        self.cap_position = offset + 1
+        return self.cap.grab()
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.cap is None:
+            return False, None
+        return self.cap.retrieve()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop == cv2.CAP_PROP_FPS:
+            span = self.segments[-1].end - self.segments[0].start if self.segments else 0.0
+            return (self.frame_count - 1) / span if span > 0 else 0.0
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT) and self.segments:
+            if self.cap is None:
+                self._open(0)
+            return self.cap.get(prop)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = max(0, min(int(value), self.frame_count))
+            self.positioned = False
+            return True
+        return False
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+            self.current = -1
@@ -0,0 +1,229 @@
+import logging
+import platform
+import time
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Source specs accepted by open_source() besides device indices and bare paths:
+# "device:N", "file:PATH" and "synthetic:WIDTHxHEIGHT@FPS[/SEED]"
+SOURCE_KINDS = ("device", "file", "synthetic")
+
+# Frame numbers are stamped into synthetic frames as a row of black and white blocks
+STAMP_BITS = 32
+STAMP_BLOCK = 8
+
+def device_backend():
+    """Capture backend for camera devices on this operating system."""
+    system = platform.system().lower()
+    if system == "windows":
+        # Force DirectShow backend and disable RealSense checks
+        return cv2.CAP_DSHOW
+    elif system == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    else:
+        return cv2.CAP_V4L2
+
+def open_device(index: int, passthrough: bool = False):
+    """Open and configure a camera device, returns the capture or None if it could not be opened
+
+    With passthrough the camera's MJPG bitstream is delivered undecoded.
+    """
+    cap = cv2.VideoCapture(index, device_backend())
+    if not cap.isOpened():
+        return None
+
+    # Set camera properties in specific order
+    settings = [
+        (cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G')),  # MJPG format
+        (cv2.CAP_PROP_FRAME_WIDTH, 1280),
+        (cv2.CAP_PROP_FRAME_HEIGHT, 720),
+        (cv2.CAP_PROP_FPS, 60),
+        (cv2.CAP_PROP_BUFFERSIZE, 1),  # Minimize latency
+        (cv2.CAP_PROP_AUTOFOCUS, 0),   # Disable autofocus
+        (cv2.CAP_PROP_AUTO_EXPOSURE, 0.75),  # Auto exposure
+    ]
+
+    if passthrough:
+        settings.append((cv2.CAP_PROP_CONVERT_RGB, 0))  # Hand out the raw MJPG buffers
+
+    for prop, value in settings:
+        if not cap.set(prop, value):
+            logger.warning(f"Failed to set camera property {prop} to {value}")
+
+    # Verify settings
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    logger.debug(f"Camera {index} initialized: {width}x{height} @ {fps}fps")
+    return cap
+
+class PacedSource:
+    """Base of sources that deliver frames on a fixed schedule, like a camera.
+
+    Sources mimic cv2.VideoCapture (isOpened, grab, retrieve, read, get, set,
+    release), so capture workers, synchronized capture and the recorder use
+    them unchanged. grab() blocks until the next frame is due. A reader that
+    falls more than a frame behind restarts the schedule instead of getting
+    a burst of frames.
+    """
+    def __init__(self, fps: float):
+        self.fps = fps if fps > 0 else 30.0
+        self.opened = True
+        self.frame_number = 0          # Frames grabbed so far
+        self.schedule_start: Optional[float] = None
+        self.schedule_frame = 0
+
+    def _wait_for_frame(self):
+        now = time.monotonic()
+        if self.schedule_start is None:
+            self.schedule_start, self.schedule_frame = now, self.frame_number
+        due = self.schedule_start + (self.frame_number - self.schedule_frame) / self.fps
+        if due > now:
+            time.sleep(due - now)
+        elif now - due > 1.0 / self.fps:
+            self.schedule_start, self.schedule_frame = now, self.frame_number
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def set(self, prop: int, value) -> bool:
+        return False  # Format and rate are fixed when the source is created
+
+    def release(self):
+        self.opened = False
+
+class FileSource(PacedSource):
+    """A video file played at its native frame rate, from the start again when it ends."""
+    def __init__(self, path: str, loop: bool = True):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0.0)
+        self.opened = self.cap.isOpened()
+
+    def grab(self) -> bool:
+        if not self.opened:
+            return False
+        self._wait_for_frame()
+        ok = self.cap.grab()
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok = self.cap.grab()
+        if ok:
+            self.frame_number += 1
+        return ok
+
+    def retrieve(self, image=None):
+        return self.cap.retrieve(image) if image is not None else self.cap.retrieve()
+
+    def get(self, prop: int) -> float:
+        return self.cap.get(prop)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+class SyntheticSource(PacedSource):
+    """Deterministic generated frames at a fixed resolution and rate.
+
+    Each frame is a gradient tinted by the seed with a bar that moves one
+    step per frame, and the frame number stamped top left (read it back with
+    read_frame_number()), so a source with the same parameters always yields
+    the same frames. frame_count ends the source after that many frames, 0
+    runs forever.
+    """
+    def __init__(self, width: int = 1920, height: int = 1080, fps: float = 60.0, seed: int = 0,
+                 frame_count: int = 0):
+        super().__init__(fps)
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.frame_count = frame_count
+        self.pattern: Optional[np.ndarray] = None  # Built on the first frame, in the reading thread
+
+    def _build_pattern(self):
+        tint = np.random.default_rng(self.seed).integers(64, 256, size=3)
+        x = np.linspace(0.0, 1.0, self.width, dtype=np.float32)[None, :, None]
+        y = np.linspace(0.0, 1.0, self.height, dtype=np.float32)[:, None, None]
+        self.pattern = ((0.25 + 0.5 * x + 0.25 * y) * tint).astype(np.uint8)
+
+    def grab(self) -> bool:
+        if not self.opened or (self.frame_count and self.frame_number >= self.frame_count):
+            return False
+        self._wait_for_frame()
+        self.frame_number += 1
+        return True
+
+    def retrieve(self, image=None):
+        if self.pattern is None:
+            self._build_pattern()
+        if image is None or image.shape != self.pattern.shape:
+            image = self.pattern.copy()
+        else:
+            np.copyto(image, self.pattern)
+        frame_number = self.frame_number - 1
+        bar = (frame_number * 8) % self.width
+        image[:, bar:bar + 16] = 255
+        for bit in range(STAMP_BITS):
+            value = 255 if frame_number >> bit & 1 else 0
+            image[:STAMP_BLOCK, bit * STAMP_BLOCK:(bit + 1) * STAMP_BLOCK] = value
+        return True, image
+
+    def get(self, prop: int) -> float:
+        return {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_POS_FRAMES: self.frame_number,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+        }.get(prop, 0.0)
+
+def read_frame_number(frame: np.ndarray) -> int:
+    """Frame number stamped into a decoded synthetic frame, tolerant of lossy compression."""
+    blocks = frame[:STAMP_BLOCK, :STAMP_BITS * STAMP_BLOCK].reshape(STAMP_BLOCK, STAMP_BITS, STAMP_BLOCK, -1)
+    bits = blocks.mean(axis=(0, 2, 3)) > 127
+    return int(sum(1 << bit for bit in range(STAMP_BITS) if bits[bit]))
+
+def parse_synthetic(spec: str) -> SyntheticSource:
+    """SyntheticSource from "WIDTHxHEIGHT@FPS[/SEED]", e.g. "1920x1080@60/3"."""
+    size, _, rest = spec.partition("@")
+    fps, _, seed = rest.partition("/")
+    width, height = (int(value) for value in size.split("x"))
+    return SyntheticSource(width, height, float(fps or 60.0), int(seed or 0))
+
+def open_source(source, passthrough: bool = False):
+    """Open a frame source, returns a cv2.VideoCapture-like object or None if it could not be opened
+
+    source is a device index, a "device:N", "file:PATH" or
+    "synthetic:WIDTHxHEIGHT@FPS[/SEED]" spec, a bare path or stream URL
+    (read as fast as it decodes), or an object that is already a source.
+    Specs are plain strings, so they can be handed to capture processes.
+    """
+    if hasattr(source, "read"):
+        return source
+    if isinstance(source, int):
+        return open_device(source, passthrough)
+    kind, _, argument = source.partition(":")
+    if kind == "device":
+        return open_device(int(argument), passthrough)
+    if kind == "file":
+        cap = FileSource(argument)
+    elif kind == "synthetic":
+        cap = parse_synthetic(argument)
+    else:
+        # Video files and stream URLs are opened with the default backend
+        cap = cv2.VideoCapture(source)
+    return cap if cap.isOpened() else None
+
+def synthetic_sources(count: int, width: int = 1920, height: int = 1080, fps: float = 60.0) -> Dict[int, str]:
+    """Specs for count distinct synthetic cameras, keyed by camera id."""
+    return {camera_id: f"synthetic:{width}x{height}@{fps:g}/{camera_id}" for camera_id in range(count)}
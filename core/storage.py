@@ -0,0 +1,222 @@
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .catalog import SessionCatalog
+from .encoder import EncoderStats
+
+logger = logging.getLogger(__name__)
+
+# What StorageManager does when a recording will not fit: log a warning,
+# refuse to start it, or delete the oldest unprotected sessions until it fits
+STORAGE_POLICIES = ("warn", "refuse", "evict")
+
+# Bytes per pixel per frame when no earlier session tells us better:
+# OpenCV's mp4v at its default quality, and camera or quality-85 JPEG
+DEFAULT_BYTES_PER_PIXEL = {"mp4": 0.08, "mjpeg": 0.25}
+
+@dataclass
+class StorageCheck:
+    """Whether a recording is expected to fit, decided before it starts."""
+    fits: bool
+    free_bytes: int
+    required_bytes: int           # Projected size of the recording plus the reserve
+    bytes_per_second: float       # Projected rate of all cameras together
+    seconds: float                # Recording length the projection is for
+    evicted_sessions: List[str] = field(default_factory=list)
+
+@dataclass
+class StorageStats:
+    free_bytes: int = 0
+    written_bytes: int = 0             # Size of the current recording so far
+    write_bytes_per_second: float = 0.0  # Sustained over the sampling window
+    required_bytes_per_second: float = 0.0  # What the encoders need to keep up with capture
+    seconds_remaining: float = 0.0     # Until the reserve is reached at the current rate
+    stalled: bool = False              # Writes fall short of what capture produces
+    evicted_sessions: int = 0
+
+class StorageManager:
+    """Free space, retention and write throughput of the disk sessions are recorded on.
+
+    Before a recording, check() projects its size from the cameras' pixel rate
+    (calibrated by earlier sessions in the catalog) and applies the policy.
+    While it records, a monitor thread samples the session's size and the
+    encoder counters: the sustained write rate is compared with the rate
+    capture produces, so a slow disk shows up before encoder queues overflow,
+    and free space is kept above the reserve for the rest of the recording.
+    Eviction deletes the oldest unprotected sessions known to the catalog.
+    """
+    def __init__(self, recordings_directory, catalog: Optional[SessionCatalog] = None,
+                 policy: str = "warn", reserve_bytes: int = 1024 * 1024 * 1024,
+                 max_total_bytes: Optional[int] = None, expected_seconds: float = 2 * 3600,
+                 low_space_seconds: float = 600.0, sample_interval: float = 1.0, window: int = 10,
+                 stall_tolerance: float = 0.1):
+        if policy not in STORAGE_POLICIES:
+            raise ValueError(f"Unknown storage policy {policy!r}, expected one of {STORAGE_POLICIES}")
+        if policy == "evict" and catalog is None:
+            raise ValueError("The evict policy needs a catalog to know which sessions are protected")
+        self.recordings_directory = Path(recordings_directory)
+        self.catalog = catalog
+        self.policy = policy
+        self.reserve_bytes = reserve_bytes        # Free space never to be recorded into
+        self.max_total_bytes = max_total_bytes    # Retention quota for all sessions, None for no quota
+        self.expected_seconds = expected_seconds  # Length a recording is assumed to run for
+        self.low_space_seconds = low_space_seconds  # Recording time left that triggers eviction or a warning
+        self.sample_interval = sample_interval
+        self.stall_tolerance = stall_tolerance
+        self.lock = Lock()
+        self.samples: Deque[Tuple[float, int, int, int]] = deque(maxlen=max(2, window))
+        self.recording_path: Optional[Path] = None
+        self.encoder_stats: Optional[Callable[[], Dict[int, EncoderStats]]] = None
+        self.bytes_per_second = 0.0   # Projection for the current recording
+        self.evicted_sessions = 0
+        self.low_space_warned = False
+        self.stop_event = Event()
+        self.monitor_thread: Optional[Thread] = None
+
+    def free_bytes(self) -> int:
+        return shutil.disk_usage(self.recordings_directory).free
+
+    def estimate_bytes_per_second(self, cameras: Dict[int, Tuple[int, int, float]], recording_format: str) -> float:
+        """Projected write rate of cameras given as {camera_id: (width, height, fps)}."""
+        pixel_rate = sum(width * height * fps for width, height, fps in cameras.values())
+        bytes_per_pixel = DEFAULT_BYTES_PER_PIXEL.get(recording_format, DEFAULT_BYTES_PER_PIXEL["mjpeg"])
+        if self.catalog is not None:
+            # The last finished session in this format says how the scene compresses per pixel;
+            # scaled by the pixel rate, it holds for other resolutions, frame rates and camera counts
+            for session in self.catalog.list_sessions(status="complete", limit=20):
+                if (session.format == recording_format and session.pixel_rate > 0
+                        and session.duration > 0 and session.total_bytes > 0):
+                    bytes_per_pixel = session.total_bytes / session.duration / session.pixel_rate
+                    break
+        return pixel_rate * bytes_per_pixel
+
+    def check(self, cameras: Dict[int, Tuple[int, int, float]], recording_format: str,
+              seconds: Optional[float] = None) -> StorageCheck:
+        """Whether a recording of the given cameras fits, evicting sessions first under the evict policy."""
+        self.recordings_directory.mkdir(parents=True, exist_ok=True)
+        seconds = self.expected_seconds if seconds is None else seconds
+        bytes_per_second = self.estimate_bytes_per_second(cameras, recording_format)
+        required = int(bytes_per_second * seconds) + self.reserve_bytes
+        evicted = []
+        if self.policy == "evict":
+            evicted = self.enforce_retention(required)
+        free = self.free_bytes()
+        result = StorageCheck(free >= required, free, required, bytes_per_second, seconds, evicted)
+        if not result.fits:
+            logger.warning(f"Recording needs {required / 1e9:.1f} GB for {seconds / 60:.0f} min "
+                           f"but only {free / 1e9:.1f} GB are free in {self.recordings_directory}")
+        return result
+
+    def enforce_retention(self, required_bytes: int = 0, exclude: Optional[Path] = None) -> List[str]:
+        """Delete the oldest unprotected sessions until required_bytes are free and the quota holds.
+
+        Returns the paths of the deleted sessions.
+        """
+        if self.catalog is None:
+            return []
+        exclude = str(exclude.resolve()) if exclude is not None else None
+        directory = self.recordings_directory.resolve()
+        sessions = [session for session in reversed(self.catalog.list_sessions(limit=1_000_000))
+                    if Path(session.path).parent == directory]
+        total = sum(session.total_bytes for session in sessions)
+        sessions = [session for session in sessions
+                    if not session.protected and session.status != "recording" and session.path != exclude]
+        evicted = []
+        for session in sessions:
+            over_quota = self.max_total_bytes is not None and total > self.max_total_bytes
+            if not over_quota and self.free_bytes() >= required_bytes:
+                break
+            shutil.rmtree(session.path, ignore_errors=True)
+            self.catalog.remove_session(session.id)
+            total -= session.total_bytes
+            evicted.append(session.path)
+            logger.info(f"Deleted session {session.path} ({session.total_bytes / 1e6:.0f} MB) to free space")
+        with self.lock:
+            self.evicted_sessions += len(evicted)
+        return evicted
+
+    def start_monitoring(self, recording_path, encoder_stats: Callable[[], Dict[int, EncoderStats]],
+                         bytes_per_second: float = 0.0):
+        """Sample a recording's size and its encoders until stop_monitoring()."""
+        self.stop_monitoring()
+        with self.lock:
+            self.recording_path = Path(recording_path)
+            self.encoder_stats = encoder_stats
+            self.bytes_per_second = bytes_per_second
+            self.samples.clear()
+            self.low_space_warned = False
+        self.stop_event.clear()
+        self.monitor_thread = Thread(target=self._monitor_loop, daemon=True, name="storage-monitor")
+        self.monitor_thread.start()
+
+    def stop_monitoring(self):
+        self.stop_event.set()
+        if self.monitor_thread:
+            self.monitor_thread.join()
+            self.monitor_thread = None
+        with self.lock:
+            self.recording_path = None
+            self.encoder_stats = None
+
+    def _written_bytes(self) -> int:
+        with os.scandir(self.recording_path) as entries:
+            return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+    def _monitor_loop(self):
+        while not self.stop_event.wait(self.sample_interval):
+            try:
+                encoder_stats = self.encoder_stats().values()
+                sample = (time.monotonic(), self._written_bytes(),
+                          sum(stats.frames_submitted for stats in encoder_stats),
+                          sum(stats.frames_encoded for stats in encoder_stats))
+                with self.lock:
+                    self.samples.append(sample)
+                self._check_space()
+            except Exception as e:
+                logger.error(f"Error monitoring storage: {str(e)}")
+
+    def _check_space(self):
+        """Keep the rest of the recording's writes clear of the reserve."""
+        stats = self.get_stats()
+        if stats.seconds_remaining >= self.low_space_seconds:
+            return
+        if self.policy == "evict":
+            rate = max(stats.write_bytes_per_second, stats.required_bytes_per_second)
+            needed = int(rate * self.low_space_seconds * 2) + self.reserve_bytes
+            self.enforce_retention(needed, exclude=self.recording_path)
+        elif not self.low_space_warned:
+            logger.warning(f"Only {stats.seconds_remaining / 60:.1f} min of recording space left "
+                           f"in {self.recordings_directory}")
+            self.low_space_warned = True
+
+    def get_stats(self) -> StorageStats:
+        """Free space, sustained write rate against the rate capture needs, and time left."""
+        with self.lock:
+            samples = list(self.samples)
+            evicted = self.evicted_sessions
+            bytes_per_second = self.bytes_per_second
+        stats = StorageStats(free_bytes=self.free_bytes(), evicted_sessions=evicted,
+                             required_bytes_per_second=bytes_per_second)
+        if samples:
+            stats.written_bytes = samples[-1][1]
+        if len(samples) > 1:
+            (t0, written0, submitted0, encoded0), (t1, written1, submitted1, encoded1) = samples[0], samples[-1]
+            elapsed = t1 - t0
+            if elapsed > 0:
+                stats.write_bytes_per_second = (written1 - written0) / elapsed
+                if encoded1 > 0:
+                    # Bytes each frame costs, at the rate capture hands frames over
+                    stats.required_bytes_per_second = written1 / encoded1 * (submitted1 - submitted0) / elapsed
+                stats.stalled = (stats.required_bytes_per_second > 0 and stats.write_bytes_per_second <
+                                 stats.required_bytes_per_second * (1 - self.stall_tolerance))
+        rate = max(stats.write_bytes_per_second, stats.required_bytes_per_second)
+        spare = max(0, stats.free_bytes - self.reserve_bytes)
+        stats.seconds_remaining = spare / rate if rate > 0 else float("inf")
+        return stats
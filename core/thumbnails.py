@@ -0,0 +1,117 @@
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .frames import FrameRef, PixelFormat, convert_frame
+from .frame_index import FrameIndex, FrameIndexWriter, index_path_for
+
+# Atlas header: magic, tile width and height, slot interval in seconds
+THUMBNAIL_MAGIC = b"VARTHM1\0"
+THUMBNAIL_HEADER_DTYPE = np.dtype([
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("reserved", "<u4"),
+    ("interval", "<f8"),
+])
+THUMBNAIL_HEADER_SIZE = len(THUMBNAIL_MAGIC) + THUMBNAIL_HEADER_DTYPE.itemsize
+
+def thumbnail_path_for(video_path) -> Path:
+    """Thumbnail atlas of a recorded stream, e.g. camera_0.mp4 -> camera_0_thumbs.atlas"""
+    video_path = Path(video_path)
+    return video_path.with_name(f"{video_path.stem}_thumbs.atlas")
+
+class ThumbnailWriter:
+    """Builds a camera's filmstrip while it records: one BGR tile per interval, in one atlas file.
+
+    Tile k shows the first frame captured at or after k * interval. Slots a
+    camera skipped repeat the previous tile, so tile k always belongs to time
+    k * interval. The tile's real capture time, byte offset and size go into
+    a frame index sidecar next to the atlas.
+    """
+    def __init__(self, path, interval: float = 1.0, height: int = 72):
+        self.path = Path(path)
+        self.interval = interval
+        self.height = height
+        self.width = 0
+        self.file = open(self.path, "wb")
+        self.index = FrameIndexWriter(index_path_for(self.path), flush_interval=1)
+        self.previous: Optional[Tuple[np.ndarray, float]] = None  # Last tile and its capture time
+
+    @property
+    def tile_count(self) -> int:
+        return self.index.frame_count
+
+    def offer(self, ref: FrameRef, timestamp: float):
+        """Consider a recorded frame; only the frames that open a new slot are scaled down."""
+        if timestamp < self.tile_count * self.interval:
+            return
+        tile = self._tile(ref)
+        # Fill the slots this camera skipped with the last tile before the gap,
+        # or with this one if the camera started late
+        filler, filler_timestamp = self.previous or (tile, timestamp)
+        while (self.tile_count + 1) * self.interval <= timestamp:
+            self._append(filler, filler_timestamp)
+        self._append(tile, timestamp)
+        self.previous = (tile, timestamp)
+
+    def _tile(self, ref: FrameRef) -> np.ndarray:
+        if ref.pixel_format == PixelFormat.MJPEG:
+            # libjpeg can decode at 1/8 scale, far cheaper than a full decode
+            frame = cv2.imdecode(ref.frame, cv2.IMREAD_REDUCED_COLOR_8)
+        else:
+            frame = convert_frame(ref.frame, ref.pixel_format, PixelFormat.BGR)
+        if not self.width:
+            self.width = max(1, round(frame.shape[1] * self.height / frame.shape[0]))
+            header = np.array([(self.width, self.height, 0, self.interval)], dtype=THUMBNAIL_HEADER_DTYPE)
+            self.file.write(THUMBNAIL_MAGIC + header.tobytes())
+        return cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def _append(self, tile: np.ndarray, timestamp: float):
+        offset = self.file.tell()
+        self.file.write(np.ascontiguousarray(tile).tobytes())
+        self.file.flush()  # Once per interval, so a session is browsable while it records
+        self.index.append(timestamp, offset=offset, size=tile.nbytes, keyframe=True)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            self.index.close()
+
+class ThumbnailAtlas:
+    """Memory-mapped filmstrip written by ThumbnailWriter; lookups are O(1) slot arithmetic."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tiles = np.zeros((0, 0, 0, 3), dtype=np.uint8)
+        self.interval = 0.0
+        self.index = FrameIndex.load(self.path)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size < THUMBNAIL_HEADER_SIZE:
+            return
+        with open(self.path, "rb") as f:
+            if f.read(len(THUMBNAIL_MAGIC)) != THUMBNAIL_MAGIC:
+                raise ValueError(f"{self.path} is not a thumbnail atlas")
+            header = np.frombuffer(f.read(THUMBNAIL_HEADER_DTYPE.itemsize), dtype=THUMBNAIL_HEADER_DTYPE)[0]
+        width, height = int(header["width"]), int(header["height"])
+        self.interval = float(header["interval"])
+        # Map whole tiles only; a recording in progress may have a partial one
+        count = (size - THUMBNAIL_HEADER_SIZE) // (width * height * 3)
+        if count:
+            self.tiles = np.memmap(self.path, dtype=np.uint8, mode="r", offset=THUMBNAIL_HEADER_SIZE,
+                                   shape=(count, height, width, 3))
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def nearest(self, seconds: float) -> Optional[np.ndarray]:
+        """Tile closest to a time in seconds since the recording started, None if empty."""
+        if not len(self.tiles) or self.interval <= 0:
+            return None
+        slot = int(round(seconds / self.interval))
+        return self.tiles[max(0, min(slot, len(self.tiles) - 1))]
+
+    def time_of(self, slot: int) -> float:
+        """Capture time of the frame a tile shows."""
+        if self.index is not None and len(self.index):
+            return self.index.time_of(slot)
+        return slot * self.interval
@@ -1,19 +1,110 @@
 import cv2
+import logging
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from threading import Lock
 import time
 
+from .frames import PixelFormat
+
+logger = logging.getLogger(__name__)
+
 @dataclass
 class VideoFrame:
     frame: np.ndarray
     timestamp: float
     camera_id: int
+    pixel_format: PixelFormat = PixelFormat.BGR
 
+class FrameRecording:
+    """Columnar ring of one camera's frames: a preallocated slab plus a timestamp array.
+    
+    Raw frames are copied into a (capacity, height, width, channels) slab that
+    is allocated on the first frame. Compressed frames vary in size, so they
+    go into an object column instead. The first frame also sizes the ring to
+    the byte budget: at most capacity frames, fewer at high resolutions.
+    Once full, the oldest frames are overwritten; the ring then holds two
+    sorted timestamp runs.
+    """
+    def __init__(self, camera_id: int, capacity: int, budget_bytes: int = 0):
+        self.camera_id = camera_id
+        self.capacity = max(1, capacity)
+        self.budget_bytes = budget_bytes  # 0 for no budget
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.frames: Optional[np.ndarray] = None
+        self.pixel_format = PixelFormat.BGR
+        self.head = 0    # Physical slot of the oldest frame
+        self.count = 0
+        self.overwritten = 0
+        
+    def append(self, frame: np.ndarray, timestamp: float, pixel_format: PixelFormat):
+        if self.frames is None:
+            self.pixel_format = pixel_format
+            # JPEG sizes vary with the scene; leave room for frames twice the first one
+            self._fit_budget(frame.nbytes * 2 if pixel_format == PixelFormat.MJPEG else frame.nbytes)
+            if pixel_format == PixelFormat.MJPEG:
+                self.frames = np.empty(self.capacity, dtype=object)
+            else:
+                self.frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+        slot = (self.head + self.count) % self.capacity
+        if self.frames.dtype == object:
+            self.frames[slot] = np.array(frame)  # Capture reuses its buffers
+        else:
+            self.frames[slot] = frame
+        self.timestamps[slot] = timestamp
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.head = (self.head + 1) % self.capacity
+            self.overwritten += 1
+            
+    def _fit_budget(self, frame_bytes: int):
+        """Shrink the ring, still empty, to the frames of frame_bytes that fit in the budget."""
+        if not self.budget_bytes or not frame_bytes:
+            return
+        capacity = max(1, min(self.capacity, self.budget_bytes // frame_bytes))
+        if capacity < self.capacity:
+            logger.info(f"Camera {self.camera_id}: keeping {capacity} of {self.capacity} frames in memory "
+                        f"to stay within {self.budget_bytes / 1e6:.0f} MB")
+            self.capacity = capacity
+            self.timestamps = np.zeros(capacity, dtype=np.float64)
+            
+    def slots(self, indices: np.ndarray) -> np.ndarray:
+        """Physical slots of logical (oldest first) frame indices."""
+        return (self.head + indices) % self.capacity
+        
+    def time_of(self, index: int) -> float:
+        return float(self.timestamps[(self.head + index) % self.capacity])
+        
+    def nearest(self, positions: np.ndarray) -> np.ndarray:
+        """Logical index of the frame closest to each position, -1 if empty."""
+        if not self.count:
+            return np.full(np.shape(positions), -1, dtype=np.int64)
+        if self.head == 0:
+            after = np.searchsorted(self.timestamps[:self.count], positions, side="left")
+        else:
+            # Wrapped: the older run sits at [head, capacity), the newer one at [0, head)
+            older = self.timestamps[self.head:]
+            newer = self.timestamps[:self.head]
+            after = np.where(positions >= newer[0],
+                             len(older) + np.searchsorted(newer, positions, side="left"),
+                             np.searchsorted(older, positions, side="left"))
+        after = np.minimum(after, self.count - 1)
+        before = np.maximum(after - 1, 0)
+        before_closer = (np.abs(positions - self.timestamps[self.slots(before)]) <=
+                         np.abs(self.timestamps[self.slots(after)] - positions))
+        return np.where(before_closer, before, after)
+        
+    def shift(self, offset: float):
+        """Move every stored timestamp by offset seconds."""
+        self.timestamps[:] -= offset
+        
 class VideoSync:
-    def __init__(self):
-        self.recordings: Dict[int, List[VideoFrame]] = {}
+    def __init__(self, capacity: int = 300, budget_bytes: int = 512 * 1024 * 1024):
+        self.recordings: Dict[int, FrameRecording] = {}
+        self.capacity = capacity  # Frames kept per camera; older ones are overwritten
+        self.budget_bytes = budget_bytes  # Shared by all cameras, 0 for no budget
         self.current_position: float = 0.0
         self.playback_speed: float = 1.0
         self.is_playing: bool = False
@@ -22,30 +113,29 @@ class VideoSync:
     def start_recording(self, camera_ids: List[int]):
         """Start recording for specified cameras."""
         with self.lock:
+            per_camera = self.budget_bytes // max(1, len(camera_ids))
             for camera_id in camera_ids:
-                self.recordings[camera_id] = []
+                self.recordings[camera_id] = FrameRecording(camera_id, self.capacity, per_camera)
                 
-    def add_frame(self, camera_id: int, frame: np.ndarray):
-        """Add a frame to the recording with current timestamp."""
+    def add_frame(self, camera_id: int, frame: np.ndarray, timestamp: Optional[float] = None,
+                  pixel_format: PixelFormat = PixelFormat.BGR):
+        """Add a frame to the recording with its capture timestamp (defaults to now)."""
         if camera_id in self.recordings:
-            timestamp = time.time()
-            video_frame = VideoFrame(frame, timestamp, camera_id)
+            if timestamp is None:
+                timestamp = time.monotonic()
             with self.lock:
-                self.recordings[camera_id].append(video_frame)
+                self.recordings[camera_id].append(frame, timestamp, pixel_format)
     
     def stop_recording(self):
         """Stop recording and finalize the recordings."""
         with self.lock:
             # Normalize timestamps relative to the earliest frame
-            min_timestamp = float('inf')
-            for frames in self.recordings.values():
-                if frames and frames[0].timestamp < min_timestamp:
-                    min_timestamp = frames[0].timestamp
-            
-            # Adjust all timestamps relative to start
-            for frames in self.recordings.values():
-                for frame in frames:
-                    frame.timestamp -= min_timestamp
+            firsts = [recording.time_of(0) for recording in self.recordings.values() if recording.count]
+            if not firsts:
+                return
+            min_timestamp = min(firsts)
+            for recording in self.recordings.values():
+                recording.shift(min_timestamp)
     
     def seek_to(self, position: float):
         """Seek to a specific position in seconds."""
@@ -54,23 +144,43 @@ class VideoSync:
     
     def get_frames_at_position(self) -> Dict[int, np.ndarray]:
         """Get frames from all cameras at current position."""
-        frames = {}
+        return self.get_frames_at_positions([self.current_position])[0]
+        
+    def frame_indices_at(self, positions) -> Dict[int, np.ndarray]:
+        """Resolve many positions at once: per camera, the index of the closest frame to each.
+        
+        Indices have the shape of positions; -1 where a camera has no frames.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
         with self.lock:
-            for camera_id, recording in self.recordings.items():
-                # Find the closest frame to current position
-                closest_frame = None
-                min_diff = float('inf')
-                
-                for frame in recording:
-                    diff = abs(frame.timestamp - self.current_position)
-                    if diff < min_diff:
-                        min_diff = diff
-                        closest_frame = frame
-                
-                if closest_frame:
-                    frames[camera_id] = closest_frame.frame
+            return self._frame_indices_at(positions)
+            
+    def _frame_indices_at(self, positions: np.ndarray) -> Dict[int, np.ndarray]:
+        return {camera_id: recording.nearest(positions) for camera_id, recording in self.recordings.items()}
+    
+    def get_frames_at_positions(self, positions) -> List[Dict[int, np.ndarray]]:
+        """Frames from all cameras at each position, e.g. for a scrub bar's worth of thumbnails."""
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.float64))
+        frame_sets = [{} for _ in range(len(positions))]
+        # One lock for both steps, so the ring cannot move between finding and reading a frame
+        with self.lock:
+            indices = self._frame_indices_at(positions)
+            for camera_id, camera_indices in indices.items():
+                recording = self.recordings[camera_id]
+                for frame_set, index in zip(frame_sets, camera_indices):
+                    if index >= 0:
+                        frame_set[camera_id] = recording.frames[recording.slots(index)]
+        return frame_sets
         
-        return frames
+    def get_frame(self, camera_id: int, index: int) -> Optional[VideoFrame]:
+        """A stored frame by its index, oldest first."""
+        with self.lock:
+            recording = self.recordings.get(camera_id)
+            if recording is None or not 0 <= index < recording.count:
+                return None
+            slot = recording.slots(index)
+            return VideoFrame(recording.frames[slot], float(recording.timestamps[slot]),
+                              camera_id, recording.pixel_format)
     
     def set_playback_speed(self, speed: float):
         """Set playback speed (1.0 is normal speed)."""
@@ -83,8 +193,8 @@ class VideoSync:
             # Find the smallest frame interval across all recordings
             min_interval = float('inf')
             for recording in self.recordings.values():
-                if len(recording) > 1:
-                    interval = recording[1].timestamp - recording[0].timestamp
+                if recording.count > 1:
+                    interval = recording.time_of(1) - recording.time_of(0)
                     min_interval = min(min_interval, interval)
             
             if min_interval != float('inf'):
@@ -95,8 +205,7 @@ class VideoSync:
         """Get total duration of the recordings in seconds."""
         max_duration = 0
         for recording in self.recordings.values():
-            if recording:
-                duration = recording[-1].timestamp
+            if recording.count:
+                duration = recording.time_of(recording.count - 1)
                 max_duration = max(max_duration, duration)
         return max_duration
-
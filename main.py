@@ -15,6 +15,19 @@ if src_path not in sys.path:
     logger.debug(f"Added {src_path} to Python path")
 
 from src.ui.main_window import MainWindow
+from src.core.sources import synthetic_sources
+
+def parse_sources(argv):
+    """Frame sources from --source SPEC (repeatable) and --synthetic COUNT, keyed by camera id"""
+    sources = {}
+    for flag, value in zip(argv, argv[1:]):
+        if flag == "--source":
+            sources[len(sources)] = int(value) if value.isdigit() else value
+        elif flag == "--synthetic":
+            # COUNT distinct 1080p60 generated cameras, for running without webcams
+            for spec in synthetic_sources(int(value)).values():
+                sources[len(sources)] = spec
+    return sources
 
 def main():
     try:
@@ -27,7 +40,11 @@ def main():
         # Create main window with error catching
         logger.debug("Creating MainWindow")
         try:
-            window = MainWindow()
+            # --process-capture reads each camera in its own process
+            capture_backend = "process" if "--process-capture" in sys.argv else "thread"
+            # --source file:match.mp4 / --synthetic 8 replace the camera selection
+            sources = parse_sources(sys.argv)
+            window = MainWindow(capture_backend=capture_backend, sources=sources)
         except Exception as e:
             logger.error(f"Failed to create MainWindow: {str(e)}", exc_info=True)
             raise
@@ -35,6 +52,8 @@ def main():
         # Show window
         logger.debug("Showing window")
         window.show()
+        if window.sources:
+            window.start_cameras(window.sources)
         
         # Start event loop
         logger.debug("Starting event loop")
@@ -0,0 +1,128 @@
+"""Stand-ins for camera devices, shared by the tests."""
+import time
+
+import cv2
+import numpy as np
+
+STAMP_BITS = 16
+STAMP_BLOCK = 8
+
+def stamp(frame: np.ndarray, number: int) -> np.ndarray:
+    """Write number into the top left of a frame as black and white blocks."""
+    for bit in range(STAMP_BITS):
+        frame[:STAMP_BLOCK, bit * STAMP_BLOCK:(bit + 1) * STAMP_BLOCK] = 255 if number >> bit & 1 else 0
+    return frame
+
+def read_stamp(frame: np.ndarray) -> int:
+    """Number stamped into a frame, tolerant of lossy compression."""
+    blocks = frame[:STAMP_BLOCK, :STAMP_BITS * STAMP_BLOCK].reshape(STAMP_BLOCK, STAMP_BITS, STAMP_BLOCK, -1)
+    bits = blocks.mean(axis=(0, 2, 3)) > 127
+    return int(sum(1 << bit for bit in range(STAMP_BITS) if bits[bit]))
+
+class FakeCamera:
+    """cv2.VideoCapture stand-in delivering numbered frames at fps, paced like a device.
+
+    With jpeg it delivers the compressed bitstream, like an MJPG camera in passthrough.
+    """
+    def __init__(self, width: int = 160, height: int = 120, fps: float = 60.0, value: int = 96,
+                 jpeg: bool = False):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.value = value
+        self.jpeg = jpeg
+        self.count = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def grab(self):
+        time.sleep(1.0 / self.fps)
+        self.count += 1
+        return self.opened
+
+    def retrieve(self, image=None):
+        frame = stamp(np.full((self.height, self.width, 3), self.value, dtype=np.uint8), self.count - 1)
+        if self.jpeg:
+            frame = cv2.imencode(".jpg", frame)[1].reshape(-1)
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FPS: self.fps, cv2.CAP_PROP_FRAME_WIDTH: self.width,
+                cv2.CAP_PROP_FRAME_HEIGHT: self.height}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+
+def fake_manager(count: int = 2, **camera_kwargs):
+    """CameraManager whose cameras are FakeCameras, not started yet."""
+    from core.camera_manager import CameraManager, CameraWorker
+    from core.frames import FrameSlot, PixelFormat
+    manager = CameraManager()
+    for camera_idx in range(count):
+        cap = FakeCamera(**camera_kwargs)
+        slot = FrameSlot(PixelFormat.MJPEG if cap.jpeg else PixelFormat.BGR)
+        manager.cameras[camera_idx] = cap
+        manager.workers[camera_idx] = CameraWorker(camera_idx, cap, slot=slot, on_frame=manager._dispatch_frame)
+    return manager
+
+class FakeVideo:
+    """cv2.VideoCapture stand-in for a recorded file of numbered frames.
+
+    Counts decoded (read) and skipped (grab) frames and seeks, and can be made
+    slow per decoded frame.
+    """
+    def __init__(self, frame_count: int = 100, width: int = 160, height: int = 48, decode_time: float = 0.0):
+        self.frame_count = frame_count
+        self.width = width
+        self.height = height
+        self.decode_time = decode_time
+        self.position = 0
+        self.decoded = 0
+        self.grabbed = 0
+        self.seeks = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def grab(self):
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        self.grabbed += 1
+        return True
+
+    def read(self, image=None):
+        if self.position >= self.frame_count:
+            return False, None
+        if self.decode_time:
+            time.sleep(self.decode_time)
+        frame = stamp(np.zeros((self.height, self.width, 3), dtype=np.uint8), self.position)
+        self.position += 1
+        self.decoded += 1
+        return True, frame
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FPS: 30.0, cv2.CAP_PROP_FRAME_COUNT: float(self.frame_count),
+                cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_POS_FRAMES: float(self.position)}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            self.seeks += 1
+            return True
+        return False
+
+    def release(self):
+        self.opened = False
@@ -0,0 +1,107 @@
+import time
+from threading import Event
+
+import pytest
+
+import utils.camera_discovery as camera_discovery
+from utils.camera_discovery import CameraDevice, CameraDiscovery, CameraInfo
+
+@pytest.fixture
+def devices(monkeypatch):
+    """Two fake devices whose probes are counted and can be held up."""
+    devices = [CameraDevice(0, "/dev/video0", "front", ("usb-1", 1)),
+               CameraDevice(2, "/dev/video2", "side", ("usb-2", 1))]
+    probes = []
+    release = Event()
+    release.set()
+
+    def probe(device):
+        probes.append(device.path)
+        release.wait()
+        return CameraInfo(device, True, 640, 480, 30)
+    monkeypatch.setattr(camera_discovery, "enumerate_cameras", lambda max_cameras=16: list(devices))
+    monkeypatch.setattr(camera_discovery, "probe_camera", probe)
+    return devices, probes, release
+
+def test_results_are_cached_per_device(devices):
+    devices, probes, _ = devices
+    discovery = CameraDiscovery()
+    first = discovery.discover()
+    assert [info.device.index for info in first] == [0, 2] and all(info.available for info in first)
+    assert discovery.discover() == first
+    assert sorted(probes) == ["/dev/video0", "/dev/video2"]
+    discovery.discover(force=True)
+    assert len(probes) == 4
+
+def test_replugged_device_is_probed_again(devices):
+    devices, probes, _ = devices
+    discovery = CameraDiscovery()
+    discovery.discover()
+    devices[1] = CameraDevice(2, "/dev/video2", "side", ("usb-3", 2))
+    discovery.discover()
+    assert probes.count("/dev/video2") == 2 and probes.count("/dev/video0") == 1
+
+def test_unplugged_devices_leave_the_cache(devices):
+    devices, _, _ = devices
+    discovery = CameraDiscovery()
+    discovery.discover()
+    del devices[0]
+    discovery.discover()
+    assert list(discovery.cache) == ["/dev/video2"]
+
+def test_slow_probe_times_out_and_fills_the_cache_later(devices):
+    devices, probes, release = devices
+    release.clear()
+    discovery = CameraDiscovery(probe_timeout=0.1)
+    started = time.monotonic()
+    results = discovery.discover()
+    assert time.monotonic() - started < 1.0
+    assert all(info.timed_out and not info.available for info in results)
+
+    # A discovery while the probes still run waits for them instead of starting new ones
+    release.set()
+    results = discovery.discover()
+    assert all(info.available for info in results) and len(probes) == 2
+
+def test_results_are_reported_as_they_arrive(devices):
+    discovery = CameraDiscovery()
+    reported = []
+    discovery.discover(on_result=reported.append)
+    assert sorted(info.device.index for info in reported) == [0, 2]
+
+def test_camera_utils_keeps_get_available_cameras(devices):
+    from utils.camera_utils import get_available_cameras
+    assert get_available_cameras(2) == [(0, True, (640, 480, 30)), (2, True, (640, 480, 30))]
+
+def test_dialog_detaches_discovery_when_closed(devices):
+    pytest.importorskip("PyQt6.QtWidgets")
+    from PyQt6.QtWidgets import QApplication
+    from ui.camera_dialog import CameraSelectionDialog
+    app = QApplication.instance() or QApplication([])
+    _, _, release = devices
+    release.clear()
+    discovery = CameraDiscovery(probe_timeout=0.2)
+    dialog = CameraSelectionDialog(discovery=discovery)
+    (worker,) = dialog.workers
+    dialog.reject()
+    assert not worker.thread.is_alive() and not dialog.workers
+    release.set()
+    app.processEvents()
+    assert dialog.camera_list.count() == 0
+    dialog.deleteLater()
+    app.processEvents()
+
+def test_dialog_lists_discovered_cameras(devices):
+    pytest.importorskip("PyQt6.QtWidgets")
+    from PyQt6.QtWidgets import QApplication
+    from ui.camera_dialog import CameraSelectionDialog
+    app = QApplication.instance() or QApplication([])
+    dialog = CameraSelectionDialog(discovery=CameraDiscovery())
+    deadline = time.monotonic() + 5.0
+    while dialog.workers and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert [dialog.camera_list.item(row).text() for row in range(dialog.camera_list.count())] == [
+        "Camera 0 (640x480, 30 FPS)", "Camera 2 (640x480, 30 FPS)"]
+    assert dialog.refresh_btn.isEnabled()
+    dialog.reject()
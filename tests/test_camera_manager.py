@@ -0,0 +1,92 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.camera_manager import CameraManager, CameraWorker, probe_pixel_format
+from core.frames import PixelFormat
+
+from .fakes import FakeCamera
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: delivers a numbered frame every interval seconds."""
+    def __init__(self, interval=0.0, fail=False):
+        self.interval = interval
+        self.fail = fail
+        self.opened = True
+        self.count = 0
+        self.threads = set()
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.interval)
+        if self.fail:
+            return False, None
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, dtype=np.uint8)
+
+    def release(self):
+        self.opened = False
+
+def manager_with(captures, capture_mode="per_camera"):
+    manager = CameraManager(capture_mode)
+    for camera_idx, cap in captures.items():
+        manager.cameras[camera_idx] = cap
+        manager.workers[camera_idx] = CameraWorker(camera_idx, cap)
+    return manager
+
+def test_unknown_capture_mode():
+    with pytest.raises(ValueError):
+        CameraManager("everything_at_once")
+
+def test_unread_frames_count_as_dropped():
+    worker = CameraWorker(0, FakeCapture())
+    assert worker.read_once() and worker.read_once()
+    assert int(worker.get_frame()[0, 0, 0]) == 2
+    worker.read_once()
+    stats = worker.get_stats()
+    assert (stats.frames_read, stats.dropped_frames, stats.failed_reads) == (3, 1, 0)
+
+def test_failed_read_clears_the_slot():
+    worker = CameraWorker(0, FakeCapture(fail=True))
+    assert not worker.read_once()
+    assert worker.get_frame() is None
+    assert worker.get_stats().failed_reads == 1
+
+def test_slow_camera_does_not_hold_back_fast_one():
+    fast, slow = FakeCapture(0.005), FakeCapture(0.1)
+    manager = manager_with({0: fast, 1: slow})
+    manager.start_capture()
+    time.sleep(0.3)
+    manager.stop_capture()
+    assert fast.count > 3 * slow.count
+    # Each camera is read from its own thread
+    assert fast.threads == {"camera-worker-0"} and slow.threads == {"camera-worker-1"}
+
+def test_round_robin_reads_every_camera():
+    captures = {0: FakeCapture(), 1: FakeCapture()}
+    manager = manager_with(captures, "round_robin")
+    manager.start_capture()
+    time.sleep(0.1)
+    frames = manager.get_frames()
+    manager.stop_capture()
+    assert set(frames) == {0, 1} and all(frame is not None for frame in frames.values())
+
+def test_stop_capture_releases_cameras():
+    captures = {0: FakeCapture(0.001), 1: FakeCapture(0.001)}
+    manager = manager_with(captures)
+    manager.start_capture()
+    assert manager.is_capturing()
+    manager.stop_capture()
+    assert not manager.is_capturing()
+    assert not any(cap.opened for cap in captures.values())
+    assert manager.get_camera_stats() == {}
+
+def test_probe_pixel_format():
+    assert probe_pixel_format(FakeCamera(jpeg=True)) == PixelFormat.MJPEG
+    assert probe_pixel_format(FakeCamera()) == PixelFormat.BGR
+    assert probe_pixel_format(FakeCapture(fail=True)) == PixelFormat.BGR
@@ -0,0 +1,79 @@
+import time
+
+from core.catalog import CATALOG_NAME, SessionCatalog
+from core.playback import PlaybackManager
+from core.recorder import Recorder
+
+from .fakes import fake_manager
+
+def record(tmp_path, catalog=None, seconds=0.3, count=2):
+    manager = fake_manager(count)
+    manager.start_capture()
+    recorder = Recorder(manager, catalog=catalog)
+    try:
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(seconds)
+        recorder.stop_recording()
+    finally:
+        manager.stop_capture()
+    return recorder.recording_path
+
+def test_recorder_catalogs_the_session(tmp_path):
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    try:
+        session = record(tmp_path, catalog)
+        (record_,) = catalog.list_sessions()
+        assert record_.path == str(session.resolve())
+        assert record_.status == "complete" and record_.camera_count == 2
+        assert record_.duration > 0 and record_.total_bytes > 0
+        cameras = catalog.get_cameras(record_.id)
+        assert [camera.camera_id for camera in cameras] == [0, 1]
+        assert all(camera.frame_count > 5 for camera in cameras)
+        assert catalog.session_id(session) == record_.id
+    finally:
+        catalog.close()
+
+def test_index_directory_adds_uncatalogued_sessions_once(tmp_path):
+    session = record(tmp_path)
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    try:
+        assert catalog.index_directory(tmp_path) == 1
+        assert catalog.index_directory(tmp_path) == 0
+        (record_,) = catalog.list_sessions()
+        assert record_.path == str(session.resolve())
+        assert sum(camera.file_bytes for camera in catalog.get_cameras(record_.id)) == record_.total_bytes
+    finally:
+        catalog.close()
+
+def test_sessions_are_filtered_without_opening_them(tmp_path):
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    try:
+        short = catalog.begin_session(tmp_path / "short", 100.0, "mp4", [0])
+        catalog.finish_session(short, 5.0)
+        long = catalog.begin_session(tmp_path / "long", 200.0, "mp4", [0, 1])
+        catalog.finish_session(long, 60.0)
+        catalog.add_marker(long, 12.5, "offside")
+        assert [s.id for s in catalog.list_sessions()] == [long, short]
+        assert [s.id for s in catalog.list_sessions(min_duration=10.0)] == [long]
+        assert [s.id for s in catalog.list_sessions(until=150.0)] == [short]
+        (marked,) = catalog.list_sessions(with_markers=True)
+        assert marked.id == long and marked.marker_count == 1
+        assert catalog.get_markers(long)[0].label == "offside"
+        catalog.set_protected(short)
+        assert [s.protected for s in catalog.list_sessions()] == [False, True]
+        catalog.remove_session(short)
+        assert [s.id for s in catalog.list_sessions()] == [long]
+    finally:
+        catalog.close()
+
+def test_playback_opens_only_the_viewed_cameras(tmp_path):
+    session = record(tmp_path)
+    playback = PlaybackManager(read_ahead=False)
+    try:
+        assert playback.load_session(str(session), [1])
+        assert playback.session_cameras == [0, 1]
+        assert list(playback.video_captures) == [1]
+        playback.view_cameras([0])
+        assert list(playback.video_captures) == [0]
+    finally:
+        playback.close()
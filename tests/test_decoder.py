@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.decoder import DecoderWorker
+
+@pytest.fixture
+def worker_for():
+    workers = []
+    def make(decode):
+        worker = DecoderWorker(0, decode)
+        worker.start()
+        workers.append(worker)
+        return worker
+    yield make
+    for worker in workers:
+        worker.stop()
+
+def test_decodes_the_requested_frame(worker_for):
+    worker = worker_for(lambda frame_number, cancelled: np.full(4, frame_number))
+    ok, frame = worker.wait(worker.submit(7), timeout=1.0)
+    assert ok and list(frame) == [7] * 4
+
+def test_cancel_preempts_a_decode_in_flight(worker_for):
+    started = threading.Event()
+    stopped_early = threading.Event()
+    def decode(frame_number, cancelled):
+        started.set()
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            if cancelled():
+                stopped_early.set()
+                return None
+            time.sleep(0.001)
+        return np.zeros(1)
+    worker = worker_for(decode)
+    ticket = worker.submit(1)
+    assert started.wait(1.0)
+    begin = time.monotonic()
+    worker.cancel()
+    assert worker.wait(ticket, timeout=1.0) == (False, None)
+    assert time.monotonic() - begin < 0.1
+    assert stopped_early.wait(1.0)
+
+def test_newer_request_supersedes_older_one(worker_for):
+    release = threading.Event()
+    decoded = []
+    def decode(frame_number, cancelled):
+        release.wait(1.0)
+        decoded.append(frame_number)
+        return np.full(1, frame_number)
+    worker = worker_for(decode)
+    first = worker.submit(1)
+    second = worker.submit(2)
+    # The superseded ticket gives up at once rather than waiting for its decode
+    assert worker.wait(first, timeout=1.0) == (False, None)
+    release.set()
+    ok, frame = worker.wait(second, timeout=1.0)
+    assert ok and frame[0] == 2
+    assert decoded[-1] == 2
+
+def test_stale_result_is_discarded(worker_for):
+    in_decode = threading.Event()
+    release = threading.Event()
+    def decode(frame_number, cancelled):
+        in_decode.set()
+        release.wait(1.0)
+        return np.full(1, frame_number)
+    worker = worker_for(decode)
+    worker.submit(1)
+    assert in_decode.wait(1.0)
+    worker.cancel()
+    release.set()
+    time.sleep(0.05)
+    assert worker.result is None
+
+def test_failed_decode_returns_no_frame(worker_for):
+    def decode(frame_number, cancelled):
+        raise RuntimeError("corrupt packet")
+    worker = worker_for(decode)
+    assert worker.wait(worker.submit(3), timeout=1.0) == (True, None)
+    ok, frame = worker.wait(worker.submit(4), timeout=1.0)
+    assert ok and frame is None  # Still serving requests
+
+def test_stop_releases_waiters(worker_for):
+    worker = worker_for(lambda frame_number, cancelled: time.sleep(0.2))
+    ticket = worker.submit(1)
+    waiter = threading.Thread(target=worker.wait, args=(ticket,), daemon=True)
+    waiter.start()
+    worker.stop()
+    waiter.join(1.0)
+    assert not waiter.is_alive() and worker.thread is None
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from core.encoder import EncoderWorker
+from core.frames import FrameRef
+
+def ref(seq):
+    return FrameRef(seq, seq * 0.01, None)
+
+class GatedEncode:
+    """Encode callback that records frames and holds each one until the gate opens."""
+    def __init__(self, gated=True):
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+        self.started = threading.Event()
+        self.encoded = []
+
+    def __call__(self, frame_ref):
+        self.started.set()
+        self.gate.wait(5.0)
+        self.encoded.append(frame_ref.seq)
+
+def worker_with_one_in_flight(policy, queue_size=2):
+    """Worker whose thread is busy with frame 1 and whose queue is empty."""
+    encode = GatedEncode()
+    worker = EncoderWorker(0, encode, queue_size=queue_size, policy=policy)
+    worker.start()
+    worker.submit(ref(1))
+    assert encode.started.wait(1.0)
+    return worker, encode
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        EncoderWorker(0, lambda frame_ref: None, policy="drop_everything")
+
+def test_frames_are_encoded_in_order():
+    encode = GatedEncode(gated=False)
+    worker = EncoderWorker(0, encode, queue_size=8)
+    worker.start()
+    for seq in range(1, 101):
+        assert worker.submit(ref(seq))
+    worker.stop()
+    assert encode.encoded == list(range(1, 101))
+
+def test_block_policy_applies_backpressure():
+    worker, encode = worker_with_one_in_flight("block")
+    assert worker.submit(ref(2)) and worker.submit(ref(3))
+    blocked = threading.Thread(target=worker.submit, args=(ref(4),))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()  # Waits for room instead of dropping
+    encode.gate.set()
+    blocked.join(1.0)
+    assert not blocked.is_alive()
+    worker.stop()
+    assert encode.encoded == [1, 2, 3, 4]
+    assert worker.get_stats().dropped_frames == 0
+
+def test_drop_oldest_policy_evicts_queued_frame():
+    worker, encode = worker_with_one_in_flight("drop_oldest")
+    assert worker.submit(ref(2)) and worker.submit(ref(3))
+    assert worker.submit(ref(4))
+    encode.gate.set()
+    worker.stop()
+    assert encode.encoded == [1, 3, 4]
+    assert worker.get_stats().dropped_frames == 1
+
+def test_drop_newest_policy_rejects_incoming_frame():
+    worker, encode = worker_with_one_in_flight("drop_newest")
+    assert worker.submit(ref(2)) and worker.submit(ref(3))
+    assert not worker.submit(ref(4))
+    encode.gate.set()
+    worker.stop()
+    assert encode.encoded == [1, 2, 3]
+    assert worker.get_stats().dropped_frames == 1
+
+def test_stop_drains_the_backlog():
+    worker, encode = worker_with_one_in_flight("block", queue_size=10)
+    for seq in range(2, 11):
+        worker.submit(ref(seq))
+    assert worker.get_stats().queue_depth == 9
+    threading.Timer(0.05, encode.gate.set).start()
+    worker.stop()
+    assert encode.encoded == list(range(1, 11))
+    assert not worker.submit(ref(11))  # Stopped workers take no more frames
+
+def test_stop_releases_blocked_producer():
+    worker, encode = worker_with_one_in_flight("block", queue_size=1)
+    worker.submit(ref(2))
+    results = []
+    blocked = threading.Thread(target=lambda: results.append(worker.submit(ref(3))))
+    blocked.start()
+    blocked.join(0.1)
+    threading.Timer(0.05, encode.gate.set).start()
+    worker.stop()
+    blocked.join(1.0)
+    assert results == [False]
+    assert encode.encoded == [1, 2]
+    assert worker.get_stats().dropped_frames == 1
+
+def test_failed_encode_counts_as_dropped():
+    def encode(frame_ref):
+        if frame_ref.seq == 2:
+            raise RuntimeError("disk full")
+    worker = EncoderWorker(0, encode)
+    worker.start()
+    for seq in range(1, 4):
+        worker.submit(ref(seq))
+    worker.stop()
+    stats = worker.get_stats()
+    assert (stats.frames_encoded, stats.dropped_frames) == (2, 1)
+
+def test_stats_counters():
+    worker, encode = worker_with_one_in_flight("drop_newest", queue_size=3)
+    for seq in range(2, 7):
+        worker.submit(ref(seq))
+    stats = worker.get_stats()
+    assert (stats.queue_depth, stats.queue_capacity, stats.max_queue_depth) == (3, 3, 3)
+    assert (stats.frames_submitted, stats.frames_encoded, stats.dropped_frames) == (6, 0, 2)
+    encode.gate.set()
+    worker.stop()
+    stats = worker.get_stats()
+    assert (stats.queue_depth, stats.frames_encoded) == (0, 4)
+    assert stats.encoded_fps > 0 and stats.mean_encode_ms >= 0
+
+def test_start_backlog_is_encoded_first_and_not_limited():
+    encode = GatedEncode()
+    worker = EncoderWorker(0, encode, queue_size=1, policy="drop_newest")
+    worker.start([ref(seq) for seq in range(5)])
+    assert encode.started.wait(1.0)
+    worker.submit(ref(5))  # The backlog does not fill the queue
+    encode.gate.set()
+    worker.stop()
+    assert encode.encoded == list(range(6))
+    stats = worker.get_stats()
+    assert stats.frames_submitted == stats.frames_encoded == 6 and stats.dropped_frames == 0
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import pytest
+
+from core.frame_cache import FrameCache, ReadAheadWorker
+from core.frame_index import FrameIndex, FrameIndexWriter
+
+from .fakes import FakeVideo, read_stamp
+
+FRAME_BYTES = 48 * 160 * 3
+
+def frame(value=0):
+    return np.full((48, 160, 3), value, dtype=np.uint8)
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+def test_lru_eviction_stays_within_budget():
+    cache = FrameCache(3 * FRAME_BYTES)
+    for frame_number in range(3):
+        cache.put(frame_number, frame(frame_number))
+    assert cache.get(0) is not None  # 0 becomes most recently used, 1 is now the oldest
+    cache.put(3, frame(3))
+    assert not cache.contains(1)
+    assert all(cache.contains(frame_number) for frame_number in (0, 2, 3))
+    stats = cache.get_stats()
+    assert stats.entries == 3 and stats.evictions == 1
+    assert stats.memory_bytes == 3 * FRAME_BYTES <= stats.budget_bytes
+
+def test_replacing_a_frame_keeps_memory_exact():
+    cache = FrameCache(3 * FRAME_BYTES)
+    cache.put(0, frame())
+    cache.put(0, frame(1))
+    assert cache.get_stats().memory_bytes == FRAME_BYTES
+    assert cache.get(0)[0, 0, 0] == 1
+
+def test_frame_larger_than_budget_is_not_cached():
+    cache = FrameCache(FRAME_BYTES - 1)
+    cache.put(0, frame())
+    assert not cache.contains(0) and cache.get_stats().memory_bytes == 0
+
+def test_cached_frames_are_read_only():
+    cache = FrameCache(FRAME_BYTES)
+    cache.put(0, frame())
+    with pytest.raises(ValueError):
+        cache.get(0)[0, 0, 0] = 1
+
+def test_hit_rate_counts_lookups_only():
+    cache = FrameCache(2 * FRAME_BYTES)
+    cache.put(0, frame())
+    cache.get(0)
+    cache.get(1)
+    cache.contains(0)
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses, stats.hit_rate) == (1, 1, 0.5)
+
+def test_read_ahead_fills_window_around_playhead():
+    cache = FrameCache(100 * FRAME_BYTES)
+    video = FakeVideo(100)
+    worker = ReadAheadWorker(0, lambda: video, cache, None, video.frame_count, behind=10, ahead=20)
+    worker.set_playhead(50)
+    worker.start()
+    try:
+        assert wait_for(lambda: all(cache.contains(n) for n in range(40, 71)))
+    finally:
+        worker.stop()
+    assert not cache.contains(39) and not cache.contains(71)
+    assert all(read_stamp(cache.get(n)) == n for n in range(40, 71))
+    assert not video.opened
+
+def test_read_ahead_window_shrinks_to_budget():
+    cache = FrameCache(20 * FRAME_BYTES)
+    video = FakeVideo(200)
+    worker = ReadAheadWorker(0, lambda: video, cache, None, video.frame_count, behind=100, ahead=100)
+    worker.set_playhead(100)
+    worker.start()
+    try:
+        time.sleep(0.2)
+        # Once the window has been measured it fits, so the worker stops churning the cache
+        evictions = cache.get_stats().evictions
+        time.sleep(0.2)
+        assert cache.get_stats().evictions == evictions
+    finally:
+        worker.stop()
+    stats = cache.get_stats()
+    assert stats.memory_bytes <= stats.budget_bytes
+    assert 0 < stats.entries <= 20
+    assert all(read_stamp(cache.get(n)) == n for n in list(cache.frames))
+
+def test_read_ahead_seeks_from_keyframes(tmp_path):
+    writer = FrameIndexWriter(tmp_path / "camera_0.idx")
+    for frame_number in range(100):
+        writer.append(frame_number / 30, keyframe=frame_number % 25 == 0)
+    writer.close()
+    cache = FrameCache(100 * FRAME_BYTES)
+    video = FakeVideo(100)
+    worker = ReadAheadWorker(0, lambda: video, cache, FrameIndex(tmp_path / "camera_0.idx"),
+                             video.frame_count, behind=0, ahead=5)
+    worker.set_playhead(60)
+    worker.start()
+    try:
+        assert wait_for(lambda: all(cache.contains(n) for n in range(60, 66)))
+    finally:
+        worker.stop()
+    # Decoding started at keyframe 50 and skipped up to the window without decoding
+    assert video.grabbed == 10
+    assert read_stamp(cache.get(60)) == 60
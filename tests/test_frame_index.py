@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from core.frame_index import FrameIndex, FrameIndexWriter, mp4_sample_table
+from core.segments import SegmentedVideoWriter
+
+@pytest.fixture
+def frame_index(tmp_path):
+    writer = FrameIndexWriter(tmp_path / "camera_0.idx")
+    for frame_number, timestamp in enumerate([0.0, 0.1, 0.25, 0.3, 0.5, 0.6, 0.9]):
+        writer.append(timestamp, keyframe=frame_number in (0, 3, 5))
+    writer.close()
+    return FrameIndex(tmp_path / "camera_0.idx")
+
+@pytest.mark.parametrize("seconds, expected", [
+    (-1.0, 0), (0.0, 0), (0.09, 0), (0.1, 1), (0.27, 2), (0.3, 3), (0.75, 5), (0.9, 6), (5.0, 6),
+])
+def test_frame_at_time(frame_index, seconds, expected):
+    assert frame_index.frame_at_time(seconds) == expected
+
+@pytest.mark.parametrize("seconds, expected", [
+    (-1.0, 0), (0.0, 0), (0.04, 0), (0.05, 0), (0.06, 1),
+    (0.2, 2), (0.27, 2), (0.29, 3), (0.75, 5), (0.8, 6), (5.0, 6),
+])
+def test_nearest_frame(frame_index, seconds, expected):
+    assert frame_index.nearest_frame(seconds) == expected
+
+def test_measured_frame_rate(tmp_path):
+    writer = FrameIndexWriter(tmp_path / "camera_0.idx")
+    for frame_number in range(51):
+        writer.append(frame_number / 25.0)
+    writer.close()
+    assert FrameIndex(tmp_path / "camera_0.idx").frame_rate() == pytest.approx(25.0)
+
+@pytest.mark.parametrize("frame_number, expected", [
+    (0, 0), (2, 0), (3, 3), (4, 3), (5, 5), (6, 5),
+])
+def test_keyframe_before(frame_index, frame_number, expected):
+    assert frame_index.keyframe_before(frame_number) == expected
+
+def test_empty_index(tmp_path):
+    FrameIndexWriter(tmp_path / "empty.idx").close()
+    frame_index = FrameIndex(tmp_path / "empty.idx")
+    assert len(frame_index) == 0
+    assert frame_index.frame_at_time(1.0) == 0
+    assert frame_index.nearest_frame(1.0) == 0
+    assert frame_index.keyframe_before(10) == 0
+    assert frame_index.duration() == 0.0
+
+def test_partial_record_is_ignored(tmp_path, frame_index):
+    with open(frame_index.path, "ab") as f:
+        f.write(b"\0" * 5)
+    assert len(FrameIndex(frame_index.path)) == 7
+
+def test_update_rewrites_appended_records(tmp_path):
+    writer = FrameIndexWriter(tmp_path / "camera_0.idx")
+    for frame_number in range(4):
+        writer.append(frame_number / 30, keyframe=frame_number == 0)
+    writer.update(1, np.array([10, 20, 30, 40]), np.array([5, 6, 7, 8]), np.array([True, False, True, True]))
+    writer.append(4 / 30)
+    writer.close()
+    frame_index = FrameIndex(tmp_path / "camera_0.idx")
+    assert list(frame_index.records["frame"]) == [0, 1, 2, 3, 4]
+    assert list(frame_index.records["offset"]) == [-1, 10, 20, 30, -1]
+    assert list(frame_index.records["size"]) == [0, 5, 6, 7, 0]
+    assert list(frame_index.keyframes) == [0, 1, 3, 4]
+
+def test_segment_index_matches_container(tmp_path):
+    writer = SegmentedVideoWriter(tmp_path / "camera_0.mp4", 30, (64, 48), 0, segment_seconds=1.0)
+    rng = np.random.default_rng(0)
+    for frame_number in range(45):
+        writer.write(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8), frame_number / 30)
+    writer.release()
+    frame_index = FrameIndex(tmp_path / "camera_0.idx")
+    first = mp4_sample_table(tmp_path / "camera_0_00000.mp4")
+    second = mp4_sample_table(tmp_path / "camera_0_00001.mp4")
+    offsets, sizes, keyframes = (np.concatenate(columns) for columns in zip(first, second))
+    assert len(frame_index) == len(offsets) == 45
+    assert (frame_index.records["offset"] == offsets).all()
+    assert (frame_index.records["size"] == sizes).all()
+    assert (frame_index.records["keyframe"] == keyframes).all()
+    assert frame_index.records["keyframe"][[0, 30]].all()  # Every segment starts with an intra frame
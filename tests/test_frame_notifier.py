@@ -0,0 +1,78 @@
+import time
+from threading import Thread
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+from PyQt6.QtWidgets import QApplication
+
+from core.frames import FrameRef, PixelFormat
+from ui.frame_notifier import FrameNotifier
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+def ref(seq):
+    return FrameRef(seq, time.monotonic(), np.zeros((2, 2, 3), dtype=np.uint8), PixelFormat.BGR)
+
+def pump(app, until, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+
+def test_posts_between_ticks_are_coalesced(app):
+    notifier = FrameNotifier(max_fps=60.0)
+    ticks = []
+    notifier.frames_ready.connect(ticks.append)
+
+    def capture():
+        for seq in range(5):
+            notifier.post(0, ref(seq))
+        notifier.post(1, ref(0))
+    thread = Thread(target=capture)  # Queued to the GUI thread, which is busy meanwhile
+    thread.start()
+    thread.join()
+    pump(app, lambda: ticks)
+    assert len(ticks) == 1
+    assert {camera_idx: frame.seq for camera_idx, frame in ticks[0].items()} == {0: 4, 1: 0}
+    stats = notifier.get_stats()
+    assert (stats.frames_posted, stats.frames_delivered, stats.coalesced_frames, stats.coalesced_posts) == (6, 2, 4, 5)
+
+def test_only_changed_cameras_are_delivered(app):
+    notifier = FrameNotifier(max_fps=0)
+    ticks = []
+    notifier.frames_ready.connect(ticks.append)
+    notifier.post(0, ref(0))
+    pump(app, lambda: ticks)
+    notifier.post(1, ref(0))
+    pump(app, lambda: len(ticks) == 2)
+    assert [list(tick) for tick in ticks] == [[0], [1]]
+
+def test_ticks_are_paced_by_max_fps(app):
+    notifier = FrameNotifier(max_fps=20.0)
+    times = []
+    notifier.frames_ready.connect(lambda frames: times.append(time.monotonic()))
+    deadline = time.monotonic() + 0.5
+    seq = 0
+    while time.monotonic() < deadline:
+        notifier.post(0, ref(seq))  # Far faster than the display rate
+        seq += 1
+        app.processEvents()
+        time.sleep(0.001)
+    assert 5 <= len(times) <= 12
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.045
+
+def test_frames_from_other_threads_and_playback_dicts(app):
+    notifier = FrameNotifier()
+    ticks = []
+    notifier.frames_ready.connect(ticks.append)
+    frame = np.zeros((2, 2, 3), dtype=np.uint8)
+    thread = Thread(target=notifier.post_frames, args=({0: frame, 1: frame}, PixelFormat.RGB))
+    thread.start()
+    thread.join()
+    pump(app, lambda: ticks)
+    assert set(ticks[0]) == {0, 1}
+    assert all(ref.frame is frame and ref.pixel_format == PixelFormat.RGB for ref in ticks[0].values())
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from core.frames import FrameSlot, PixelFormat, convert_frame
+
+def frame(value=0):
+    return np.full((2, 2, 3), value, dtype=np.uint8)
+
+def test_sequence_numbers_increase():
+    slot = FrameSlot()
+    assert slot.get() is None
+    assert slot.publish(frame(1), 0.5).seq == 1
+    assert slot.publish(frame(2), 0.6).seq == 2
+    ref = slot.get()
+    assert (ref.seq, ref.timestamp, int(ref.frame[0, 0, 0])) == (2, 0.6, 2)
+
+def test_get_if_newer_returns_each_frame_once():
+    slot = FrameSlot()
+    assert slot.get_if_newer(0) is None
+    slot.publish(frame(1))
+    ref = slot.get_if_newer(0)
+    assert ref.seq == 1
+    assert slot.get_if_newer(ref.seq) is None
+    slot.publish(frame(2))
+    assert slot.get_if_newer(ref.seq).seq == 2
+
+def test_replaced_frames_count_as_dropped():
+    slot = FrameSlot()
+    slot.publish(frame(1))
+    slot.publish(frame(2))
+    slot.publish(frame(3))
+    assert slot.dropped_frames == 2
+    slot.get()
+    slot.publish(frame(4))
+    assert slot.dropped_frames == 2
+
+def test_failed_reads_are_not_drops():
+    slot = FrameSlot()
+    slot.publish(frame(1))
+    slot.get()
+    slot.publish(None)
+    slot.publish(frame(2))
+    assert slot.dropped_frames == 0
+    assert slot.get().frame is not None
+
+def test_publish_does_not_copy():
+    slot = FrameSlot()
+    pixels = frame(5)
+    slot.publish(pixels)
+    view = slot.get().frame
+    assert np.shares_memory(view, pixels)
+    with pytest.raises(ValueError):
+        view[0, 0, 0] = 1
+
+def test_convert_frame_swaps_channels():
+    bgr = np.zeros((2, 2, 3), dtype=np.uint8)
+    bgr[..., 0] = 255
+    rgb = convert_frame(bgr, PixelFormat.BGR, PixelFormat.RGB)
+    assert (rgb[..., 2] == 255).all() and (rgb[..., 0] == 0).all()
+    assert (convert_frame(rgb, PixelFormat.RGB, PixelFormat.BGR) == bgr).all()
+
+def test_convert_frame_to_same_format_does_not_copy():
+    bgr = frame(3)
+    assert convert_frame(bgr, PixelFormat.BGR, PixelFormat.BGR) is bgr
+
+def test_slot_tags_frames_with_its_format():
+    slot = FrameSlot(PixelFormat.RGB)
+    assert slot.publish(frame(1)).pixel_format == PixelFormat.RGB
+    assert FrameSlot().publish(frame(1)).pixel_format == PixelFormat.BGR
+
+def test_convert_frame_to_and_from_jpeg():
+    bgr = np.zeros((16, 16, 3), dtype=np.uint8)
+    bgr[..., 2] = 200
+    jpeg = convert_frame(bgr, PixelFormat.BGR, PixelFormat.MJPEG)
+    assert jpeg.ndim == 1 and jpeg[0] == 0xFF and jpeg[1] == 0xD8
+    rgb = convert_frame(jpeg, PixelFormat.MJPEG, PixelFormat.RGB)
+    assert rgb.shape == (16, 16, 3) and abs(int(rgb[8, 8, 0]) - 200) < 8
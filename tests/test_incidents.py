@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from core.catalog import CATALOG_NAME, SessionCatalog
+from core.frame_cache import FrameCache
+from core.incidents import MARKERS_NAME, IncidentWorker, Marker, append_marker, read_markers
+from core.playback import PlaybackManager
+from core.recorder import Recorder
+
+from .fakes import FakeVideo, fake_manager, read_stamp
+from .test_playback import FPS, make_session
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_markers_are_read_back_in_timeline_order(tmp_path):
+    append_marker(tmp_path, Marker(4.0, "handball", 1))
+    append_marker(tmp_path, Marker(1.5, "offside"))
+    markers = read_markers(tmp_path)
+    assert [(m.time, m.label, m.camera_id) for m in markers] == [(1.5, "offside", None), (4.0, "handball", 1)]
+    assert read_markers(tmp_path / "missing") == []
+
+def test_worker_decodes_the_window_from_the_marker_forward(tmp_path):
+    video = FakeVideo(100)
+    cache = FrameCache(64 * 1024 * 1024)
+    order = []
+    put = cache.put
+    cache.put = lambda frame_number, frame: (order.append(frame_number), put(frame_number, frame))
+    worker = IncidentWorker(0, lambda: video, cache, None)
+    worker.add_window(50, 40, 60)
+    worker.start()
+    try:
+        wait_until(lambda: worker.pending() == 0)
+    finally:
+        worker.stop()
+    assert order == list(range(50, 61)) + list(range(40, 50))
+    assert read_stamp(cache.get(45)) == 45
+
+def test_urgent_window_preempts_the_current_one(tmp_path):
+    video = FakeVideo(1000, decode_time=0.002)
+    cache = FrameCache(256 * 1024 * 1024)
+    worker = IncidentWorker(0, lambda: video, cache, None)
+    worker.add_window(500, 0, 999)
+    worker.start()
+    try:
+        wait_until(lambda: cache.contains(500))
+        worker.add_window(20, 10, 30, urgent=True)
+        wait_until(lambda: all(cache.contains(n) for n in range(10, 31)))
+        # The long window is still pending: the urgent one did not wait for it
+        assert not cache.contains(999) and worker.pending() >= 1
+    finally:
+        worker.stop()
+
+def test_recorder_markers_reach_the_session_and_catalog(tmp_path):
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    manager = fake_manager(1)
+    manager.start_capture()
+    recorder = Recorder(manager, catalog=catalog)
+    try:
+        assert recorder.add_marker("too early") is None
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(0.2)
+        marker = recorder.add_marker("offside", camera_id=0)
+        recorder.stop_recording()
+        assert marker.time == pytest.approx(0.2, abs=0.15)
+        assert [m.label for m in read_markers(recorder.recording_path)] == ["offside"]
+        (session,) = catalog.list_sessions(with_markers=True)
+        assert catalog.get_markers(session.id)[0].label == "offside"
+    finally:
+        manager.stop_capture()
+        catalog.close()
+
+def test_index_directory_imports_marker_files(tmp_path):
+    session = make_session(tmp_path / "session")
+    append_marker(session, Marker(0.5, "goal"))
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    try:
+        assert catalog.index_directory(tmp_path) == 1
+        (record,) = catalog.list_sessions()
+        assert record.marker_count == 1 and catalog.get_markers(record.id)[0].label == "goal"
+    finally:
+        catalog.close()
+
+def test_open_incident_is_served_from_the_incident_cache(tmp_path):
+    session = make_session(tmp_path / "session", frame_count=90)
+    append_marker(session, Marker(2.0, "penalty"))
+    manager = PlaybackManager(read_ahead=False, incident_seconds=0.5)
+    try:
+        assert manager.load_session(str(session))
+        assert [m.label for m in manager.get_markers()] == ["penalty"]
+        wait_until(lambda: manager.incident_workers[0].pending() == 0)
+        incidents = manager.incident_caches[0]
+        assert all(incidents.contains(n) for n in range(45, 76))
+
+        shown = []
+        manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+        assert manager.open_incident(manager.get_markers()[0])
+        manager.step_frame(forward=False)
+        assert shown == [60, 59]
+        assert not manager.frame_caches[0].contains(59)  # Never decoded by the playback path
+    finally:
+        manager.close()
+
+def test_playback_markers_are_stored_and_queued(tmp_path):
+    session = make_session(tmp_path / "session", frame_count=90)
+    manager = PlaybackManager(read_ahead=False, incident_seconds=0.2)
+    try:
+        assert manager.load_session(str(session))
+        manager.seek_to(1.0)
+        marker = manager.add_marker("foul")
+        assert marker.time == pytest.approx(1.0)
+        assert (session / MARKERS_NAME).exists() and read_markers(session)[0].label == "foul"
+        wait_until(lambda: manager.incident_caches[0].contains(int(1.2 * FPS)))
+    finally:
+        manager.close()
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+from PyQt6.QtWidgets import QApplication
+
+from ui.main_window import MainWindow
+
+from .fakes import fake_manager
+
+@pytest.fixture
+def window(tmp_path):
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow(recordings_directory=tmp_path)
+    window.camera_manager = fake_manager(2)
+    window.camera_manager.add_frame_listener(window.frame_notifier.post)
+    yield window
+    window.close()
+    app.processEvents()
+
+def test_recording_is_catalogued_and_loaded_for_playback(window, tmp_path):
+    window.camera_manager.start_capture()
+    window.update_button_states()
+    assert window.record_button.isEnabled()
+    window.toggle_recording()
+    assert window.recorder.catalog is window.catalog and window.recorder.is_recording()
+    time.sleep(0.3)
+    window.toggle_recording()
+    window.toggle_camera()
+    assert not window.camera_manager.is_capturing()
+
+    (record,) = window.catalog.list_sessions()
+    assert window.load_session(record)
+    assert window.playback_manager.session_path == window.recorder.recording_path
+    assert list(window.playback_manager.video_captures) == [0, 1]
+    assert window.play_button.isEnabled() and not window.pause_button.isEnabled()
+
+    # The first frames reach the grid through the notifier
+    deadline = time.monotonic() + 5.0
+    while window.frame_notifier.get_stats().frames_delivered < 2 and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+    assert window.frame_notifier.get_stats().frames_delivered >= 2
+
+def test_configured_sources_skip_camera_selection(tmp_path):
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow(sources={3: "synthetic:64x48@30/0", 5: "synthetic:64x48@30/1"},
+                        recordings_directory=tmp_path)
+    try:
+        window.show_camera_selection()
+        assert window.camera_manager.is_capturing()
+        assert sorted(window.camera_manager.cameras) == [3, 5] and sorted(window.video_grid.feeds) == [3, 5]
+        assert window.record_button.isEnabled()
+    finally:
+        window.close()
+        app.processEvents()
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+import pytest
+
+from core.mjpeg_store import MjpegReader, MjpegWriter, index_path_for
+
+from .fakes import read_stamp, stamp
+
+def jpeg(number):
+    frame = stamp(np.full((48, 160, 3), 128, dtype=np.uint8), number)
+    return cv2.imencode(".jpg", frame)[1].reshape(-1)
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "camera_0.mjpeg"
+    writer = MjpegWriter(str(path))
+    frames = [jpeg(number) for number in range(10)]
+    for number, data in enumerate(frames):
+        writer.write(data, number * 0.1)
+    writer.release()
+    return path, frames
+
+def test_round_trip_keeps_bitstreams(store):
+    path, frames = store
+    reader = MjpegReader(str(path))
+    assert reader.isOpened() and reader.frame_count == 10
+    for number, data in enumerate(frames):
+        assert bytes(reader.compressed(number)) == data.tobytes()
+        assert read_stamp(reader.decode(number)) == number
+    assert reader.decode(10) is None
+
+def test_capture_interface(store):
+    path, _ = store
+    reader = MjpegReader(str(path))
+    assert (reader.get(cv2.CAP_PROP_FRAME_WIDTH), reader.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (160, 48)
+    assert reader.get(cv2.CAP_PROP_FRAME_COUNT) == 10
+    assert abs(reader.get(cv2.CAP_PROP_FPS) - 10.0) < 1e-6
+    assert reader.set(cv2.CAP_PROP_POS_FRAMES, 7)
+    ok, frame = reader.read()
+    assert ok and read_stamp(frame) == 7
+    assert reader.set(cv2.CAP_PROP_POS_MSEC, 350)
+    assert read_stamp(reader.read()[1]) == 3
+    reader.set(cv2.CAP_PROP_POS_FRAMES, 10)
+    assert reader.read() == (False, None)
+
+def test_frame_at_time(store):
+    reader = MjpegReader(str(store[0]))
+    assert [reader.frame_at_time(seconds) for seconds in (-1.0, 0.0, 0.25, 0.9, 5.0)] == [0, 0, 2, 9, 9]
+
+def test_truncated_files_are_read_up_to_the_last_whole_frame(store):
+    path, frames = store
+    with open(index_path_for(path), "ab") as f:
+        f.write(b"\0" * 5)  # Partial index record
+    with open(path, "r+b") as f:
+        f.truncate(sum(len(data) for data in frames[:8]) + 10)  # Last frame payloads lost
+    reader = MjpegReader(str(path))
+    assert reader.frame_count == 8
+    assert read_stamp(reader.decode(7)) == 7
+
+def test_missing_store(tmp_path):
+    reader = MjpegReader(str(tmp_path / "camera_0.mjpeg"))
+    assert not reader.isOpened() and reader.frame_count == 0
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core.mjpeg_store import MjpegWriter, proxy_path_for
+from core.playback import PlaybackManager, PlaybackStats
+
+from .fakes import read_stamp, stamp
+
+FPS = 30.0
+
+def write_stream(path, frame_count, rate, height=48):
+    writer = MjpegWriter(str(path))
+    for frame_number in range(frame_count):
+        frame = stamp(np.full((height, 160, 3), 128, dtype=np.uint8), frame_number)
+        writer.write(cv2.imencode(".jpg", frame)[1].reshape(-1), frame_number / rate)
+    writer.release()
+
+def make_session(directory, frame_count=30, cameras=(0,), rates=None, proxies=False):
+    """MJPEG session of numbered frames, written the way Recorder writes it.
+
+    Cameras record at FPS unless rates gives them another frame rate, over the same duration.
+    With proxies every camera also gets a 24 pixel high proxy stream.
+    """
+    directory.mkdir(exist_ok=True)
+    rates = rates or {}
+    for camera_id in cameras:
+        rate = rates.get(camera_id, FPS)
+        video_path = directory / f"camera_{camera_id}.mjpeg"
+        write_stream(video_path, int(frame_count * rate / FPS), rate)
+        if proxies:
+            write_stream(proxy_path_for(video_path), int(frame_count * rate / FPS), rate, height=24)
+    with open(directory / "metadata.json", "w") as f:
+        json.dump({"duration": frame_count / FPS, "cameras": list(cameras), "format": "mjpeg"}, f)
+    return directory
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PlaybackManager(read_ahead=False)
+    assert manager.load_session(str(make_session(tmp_path / "session")))
+    yield manager
+    manager.close()
+
+def test_step_frame_moves_the_clock(manager):
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    for _ in range(3):
+        manager.step_frame()
+    manager.step_frame(forward=False)
+    assert shown == [0, 1, 2, 1]
+    assert manager.current_position == pytest.approx(1 / FPS)
+
+def test_seek_presents_the_frame_at_the_position(manager):
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    manager.seek_to(0.5)
+    manager.step_frame()
+    assert shown == [15]
+    manager.seek_to(100.0)
+    assert manager.current_position == manager.duration
+
+def test_callbacks_may_call_back_into_the_manager(manager):
+    manager.register_frame_callback(lambda frames: manager.seek_to(0.2))
+    stepper = threading.Thread(target=manager.step_frame, daemon=True)
+    stepper.start()
+    stepper.join(2.0)
+    assert not stepper.is_alive()
+    assert manager.current_position == pytest.approx(0.2)
+
+def test_playback_presents_frames_in_order(manager):
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    manager.play()
+    time.sleep(0.4)
+    manager.pause()
+    stats = manager.get_playback_stats()
+    assert isinstance(stats, PlaybackStats)
+    assert shown[0] == 0 and shown == sorted(shown)
+    assert stats.presented_frames == len(shown) > 5
+    assert stats.ticks >= stats.presented_frames
+    assert 0.3 < manager.current_position < 0.6
+
+def test_fast_playback_skips_frames_the_display_cannot_show(tmp_path):
+    manager = PlaybackManager(read_ahead=False, display_fps=10.0)
+    assert manager.load_session(str(make_session(tmp_path / "session", frame_count=90)))
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    manager.set_playback_speed(4.0)
+    try:
+        manager.play()
+        time.sleep(0.4)
+        manager.pause()
+    finally:
+        manager.close()
+    stats = manager.get_playback_stats()
+    # 120 recorded frames per second of wall time, at most 10 presentation ticks
+    assert stats.ticks <= 6
+    assert stats.dropped_frames > 2 * stats.presented_frames
+    assert shown == sorted(shown) and shown[-1] - shown[0] > len(shown)
+
+def test_play_restarts_statistics(manager):
+    manager.play()
+    time.sleep(0.1)
+    manager.pause()
+    assert manager.get_playback_stats().presented_frames > 0
+    manager.seek_to(0.0)
+    manager.play()
+    manager.pause()
+    assert manager.get_playback_stats().presented_frames <= 1
+
+@pytest.mark.parametrize("parallel_decode", [True, False])
+def test_every_camera_is_presented_each_step(tmp_path, parallel_decode):
+    manager = PlaybackManager(read_ahead=False, parallel_decode=parallel_decode)
+    assert manager.load_session(str(make_session(tmp_path / "session", cameras=(0, 1, 2))))
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append({camera_id: read_stamp(frame)
+                                                                 for camera_id, frame in frames.items()}))
+    try:
+        manager.seek_to(10 / FPS)
+        manager.step_frame()
+        manager.step_frame(forward=False)
+    finally:
+        manager.close()
+    assert shown == [{0: 10, 1: 10, 2: 10}, {0: 9, 1: 9, 2: 9}]
+
+def test_seek_discards_a_decode_in_flight(manager):
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    original = manager._read_frame
+    def slow_read(camera_id, frame_number, cancelled=None):
+        frame = original(camera_id, frame_number, cancelled)
+        time.sleep(0.2)
+        return frame
+    manager._read_frame = slow_read
+    stepper = threading.Thread(target=manager.step_frame)
+    stepper.start()
+    time.sleep(0.05)
+    manager.seek_to(0.5)
+    stepper.join(2.0)
+    assert shown == []
+    manager._read_frame = original
+    manager.step_frame()
+    assert shown == [15]
+
+def test_angles_at_different_rates_stay_aligned(tmp_path):
+    manager = PlaybackManager(read_ahead=False)
+    assert manager.load_session(str(make_session(tmp_path / "session", frame_count=60, cameras=(0, 1),
+                                                 rates={1: 25.0})))
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(
+        {camera_id: read_stamp(frame) for camera_id, frame in frames.items()}))
+    try:
+        assert manager.frame_rates[1] == pytest.approx(25.0)
+        manager.seek_to(1.0)
+        for _ in range(30):
+            manager.step_frame()
+            # Frame N of both cameras was not captured at the same moment; the nearest one was
+            for camera_id, offset in manager.get_alignment().items():
+                assert abs(offset) <= 0.5 / manager.frame_rates[camera_id] + 1e-9
+    finally:
+        manager.close()
+    assert shown[0] == {0: 30, 1: 25}
+    assert shown[-1][0] == 59 and shown[-1][1] == 49
+
+def test_camera_offset_is_applied_and_persisted(tmp_path):
+    session = make_session(tmp_path / "session", cameras=(0, 1))
+    manager = PlaybackManager(read_ahead=False)
+    assert manager.load_session(str(session))
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(
+        {camera_id: read_stamp(frame) for camera_id, frame in frames.items()}))
+    manager.set_camera_offset(1, 0.1)  # Camera 1 shows its frames 3 frames later
+    manager.seek_to(0.5)
+    manager.step_frame()
+    manager.close()
+    assert shown == [{0: 15, 1: 12}]
+    assert manager.load_session(str(session))
+    assert manager.camera_offsets == {1: 0.1}
+    manager.close()
+
+def test_scrubbing_shows_proxies_until_released(tmp_path):
+    manager = PlaybackManager(read_ahead=False)
+    assert manager.load_session(str(make_session(tmp_path / "session", cameras=(0, 1), proxies=True)))
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(
+        {camera_id: (read_stamp(frame), frame.shape[0]) for camera_id, frame in frames.items()}))
+    try:
+        manager.scrub_to(0.2)
+        manager.scrub_to(0.5)
+        manager.end_scrub()
+        manager.end_scrub()  # Nothing left to refine
+    finally:
+        manager.close()
+    assert shown == [{0: (6, 24), 1: (6, 24)}, {0: (15, 24), 1: (15, 24)}, {0: (15, 48), 1: (15, 48)}]
+
+def test_scrubbing_without_proxies_shows_full_resolution(manager):
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append((read_stamp(frames[0]), frames[0].shape[0])))
+    manager.scrub_to(0.5)
+    manager.end_scrub()
+    assert shown == [(15, 48)]
+
+def test_missing_session(tmp_path):
+    assert not PlaybackManager(read_ahead=False).load_session(str(tmp_path / "missing"))
@@ -0,0 +1,113 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from core.frames import FrameRef, PixelFormat
+from core.mjpeg_store import MjpegReader
+from core.preroll import PrerollBuffer
+from core.recorder import Recorder
+
+from .fakes import fake_manager, read_stamp
+
+def jpeg_ref(timestamp, size=1000):
+    return FrameRef(0, timestamp, np.zeros(size, dtype=np.uint8), PixelFormat.MJPEG)
+
+def settle(buffer):
+    """Wait until every offered frame has been compressed and inserted."""
+    buffer.snapshot(until=float("inf"))
+
+@pytest.fixture
+def buffer():
+    buffer = PrerollBuffer(seconds=5.0, budget_bytes=1024 * 1024, max_pending=1000)
+    yield buffer
+    buffer.close()
+
+def test_window_follows_each_cameras_newest_frame(buffer):
+    for timestamp in range(21):
+        buffer.on_frame(0, jpeg_ref(float(timestamp)))
+    for timestamp in range(3):
+        buffer.on_frame(1, jpeg_ref(float(timestamp)))
+    settle(buffer)
+    snapshot = buffer.snapshot(until=float("inf"))
+    assert [timestamp for timestamp, _ in snapshot[0]] == [float(t) for t in range(15, 21)]
+    # Camera 1 lags behind camera 0, but its frames are within its own window
+    assert [timestamp for timestamp, _ in snapshot[1]] == [0.0, 1.0, 2.0]
+    stats = buffer.get_stats()
+    assert (stats[0].frames, stats[0].evicted_frames, stats[0].seconds) == (6, 15, 5.0)
+    assert stats[1].evicted_frames == 0
+
+def test_budget_evicts_the_oldest_frames_of_any_camera():
+    buffer = PrerollBuffer(seconds=100.0, budget_bytes=5000, max_pending=1000)
+    try:
+        for timestamp in range(4):
+            buffer.on_frame(0, jpeg_ref(float(timestamp)))
+            buffer.on_frame(1, jpeg_ref(timestamp + 0.5))
+        settle(buffer)
+        stats = buffer.get_stats()
+    finally:
+        buffer.close()
+    assert stats[0].memory_bytes + stats[1].memory_bytes <= 5000
+    assert (stats[0].frames, stats[1].frames) == (2, 3)
+    assert (stats[0].evicted_frames, stats[1].evicted_frames) == (2, 1)
+
+def test_stats_track_bytes_without_walking_the_buffer(buffer):
+    for timestamp in range(10):
+        buffer.on_frame(0, jpeg_ref(float(timestamp), size=100 * (timestamp + 1)))
+    settle(buffer)
+    stats = buffer.get_stats()[0]
+    assert stats.frames == 6
+    assert stats.memory_bytes == sum(100 * (timestamp + 1) for timestamp in range(4, 10))
+    assert buffer.memory_bytes == stats.memory_bytes
+
+def test_raw_frames_are_compressed(buffer):
+    frame = np.full((48, 160, 3), 128, dtype=np.uint8)
+    buffer.on_frame(0, FrameRef(0, 1.0, frame, PixelFormat.BGR))
+    settle(buffer)
+    (timestamp, jpeg), = buffer.snapshot(until=2.0)[0]
+    assert timestamp == 1.0 and jpeg[:2].tobytes() == b"\xff\xd8" and jpeg.nbytes < frame.nbytes
+
+def test_frames_are_skipped_when_compression_falls_behind():
+    buffer = PrerollBuffer(seconds=5.0, max_pending=0)
+    try:
+        buffer.on_frame(0, jpeg_ref(0.0))
+        assert buffer.get_stats()[0].dropped_frames == 1
+    finally:
+        buffer.close()
+
+def test_pause_releases_frames_and_stops_buffering(buffer):
+    buffer.on_frame(0, jpeg_ref(0.0))
+    settle(buffer)
+    buffer.pause()
+    assert buffer.get_stats()[0].frames == 0 and buffer.memory_bytes == 0
+    buffer.on_frame(0, jpeg_ref(1.0))
+    settle(buffer)
+    assert buffer.get_stats()[0].frames == 0
+    buffer.resume()
+    buffer.on_frame(0, jpeg_ref(2.0))
+    settle(buffer)
+    assert [timestamp for timestamp, _ in buffer.snapshot(until=10.0)[0]] == [2.0]
+
+def test_recording_starts_with_the_preroll(tmp_path):
+    manager = fake_manager(1)
+    manager.start_capture()
+    recorder = Recorder(manager, recording_mode="mjpeg", preroll_seconds=0.3)
+    try:
+        time.sleep(0.5)
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(0.1)
+        assert recorder.get_preroll_stats()[0].frames == 0  # Paused while recording
+        recorder.stop_recording()
+        time.sleep(0.1)
+        assert recorder.get_preroll_stats()[0].frames > 0
+    finally:
+        recorder.close()
+        manager.stop_capture()
+    reader = MjpegReader(str(recorder.recording_path / "camera_0.mjpeg"))
+    numbers = [read_stamp(reader.decode(number)) for number in range(reader.frame_count)]
+    # Pre-roll and live frames join without a gap or a repeat
+    assert numbers == list(range(numbers[0], numbers[0] + len(numbers)))
+    with open(recorder.recording_path / "metadata.json") as f:
+        assert 0.2 < json.load(f)["preroll_seconds"] <= 0.35
+    assert reader.index.time_of(0) == 0.0
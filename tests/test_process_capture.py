@@ -0,0 +1,176 @@
+import multiprocessing as mp
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core import process_capture
+from core.frames import PixelFormat
+from core.process_capture import ProcessCameraManager, SharedFrameRing, _CaptureProcess
+
+SHAPE = (4, 6, 3)
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing.create(3, SHAPE)
+    yield ring
+    ring.close(unlink=True)
+
+def write(ring, value, timestamp):
+    buffer = ring.next_buffer()
+    buffer[:] = value
+    return ring.publish(buffer, timestamp)
+
+def test_empty_ring_has_no_frame(ring):
+    assert ring.get() is None
+    assert ring.get_if_newer(0) is None
+
+def test_reader_sees_each_frame_once(ring):
+    write(ring, 1, 0.5)
+    ref = ring.get_if_newer(0)
+    assert ref.seq == 1 and ref.timestamp == 0.5 and (ref.frame == 1).all()
+    assert ring.get_if_newer(ref.seq) is None
+    write(ring, 2, 0.6)
+    assert ring.get_if_newer(ref.seq).seq == 2
+
+def test_claimed_slot_is_not_handed_out():
+    single = SharedFrameRing.create(1, SHAPE)
+    try:
+        write(single, 1, 0.0)
+        single.next_buffer()  # The writer starts decoding over the only slot
+        assert single.get() is None
+    finally:
+        single.close(unlink=True)
+
+def test_frames_are_private_copies(ring):
+    write(ring, 1, 0.0)
+    ref = ring.get()
+    for value in range(2, 2 + ring.ring_size):
+        write(ring, value, value)
+    assert (ref.frame == 1).all()
+    assert not np.shares_memory(ref.frame, ring.frames)
+
+def test_skipped_frames_count_as_dropped(ring):
+    write(ring, 1, 0.0)
+    ring.get()
+    for value in range(2, 6):
+        write(ring, value, value)
+    assert ring.get().seq == 5
+    assert ring.dropped_frames == 3
+
+def test_attached_reader_sees_writer_frames(ring):
+    reader = SharedFrameRing.attach(ring.name, ring.ring_size, SHAPE)
+    try:
+        write(ring, 7, 1.25)
+        ref = reader.get()
+        assert ref.seq == 1 and ref.timestamp == 1.25 and (ref.frame == 7).all()
+    finally:
+        reader.close()
+
+def test_closed_ring_reads_nothing():
+    ring = SharedFrameRing.create(3, SHAPE)
+    write(ring, 1, 0.0)
+    ring.close(unlink=True)
+    assert ring.get() is None
+    assert ring.read_stats() is None
+
+def test_late_reply_is_discarded():
+    process = _CaptureProcess.__new__(_CaptureProcess)
+    process.conn, child = mp.Pipe()
+    process.lock, process.reply_lock = threading.Lock(), threading.Lock()
+    process.last_request_id = 0
+    with pytest.raises(TimeoutError):
+        process.request(("open", 0, PixelFormat.BGR), 0.01)
+    request_id, *_ = child.recv()[1:]
+    child.send((request_id, "opened", 0, SHAPE, {}))  # The answer to the request that timed out
+    answer = threading.Timer(0.05, lambda: child.send((child.recv()[1], "failed", 1, None, None)))
+    answer.start()
+    assert process.request(("open", 1, PixelFormat.BGR), 1.0) == ("failed", 1, None, None)
+    answer.join()
+
+class FakeCapture:
+    def __init__(self):
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self, image=None):
+        time.sleep(0.01)
+        return True, np.zeros(SHAPE, dtype=np.uint8)
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self.released = True
+
+def test_reopening_a_camera_releases_the_old_capture(monkeypatch):
+    captures = []
+    monkeypatch.setattr(process_capture, "open_source", lambda source: captures.append(FakeCapture()) or captures[-1])
+    parent, child = mp.Pipe()
+    thread = threading.Thread(target=process_capture._capture_process_main, args=(child, 3), daemon=True)
+    thread.start()
+    ring = SharedFrameRing.create(3, SHAPE)
+    try:
+        parent.send(("open", 1, 0, 0, PixelFormat.BGR))
+        assert parent.recv()[:2] == (1, "opened")
+        parent.send(("attach", 0, ring.name, SHAPE))
+        parent.send(("start", 0))
+        parent.send(("open", 2, 0, 0, PixelFormat.BGR))
+        assert parent.recv()[:2] == (2, "opened")
+        assert captures[0].released and not captures[1].released
+    finally:
+        parent.send(("stop",))
+        thread.join(2.0)
+        ring.close(unlink=True)
+    assert captures[1].released
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for value in range(30):
+        writer.write(np.full((48, 64, 3), value * 8, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+def test_frames_cross_the_process_boundary(video_file):
+    manager = ProcessCameraManager()
+    try:
+        assert manager.add_camera(video_file)
+        assert not manager.add_camera(video_file)  # Already open
+        manager.start_capture()
+        deadline = time.monotonic() + 10.0
+        while manager.get_frame(video_file) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert manager.get_frame(video_file).shape == (48, 64, 3)
+    finally:
+        manager.stop_capture()
+    assert manager.get_frame(video_file) is None
+    assert manager.get_camera_stats() == {}
+
+def test_ring_converts_to_its_pixel_format(ring):
+    ring.pixel_format = PixelFormat.RGB
+    buffer = ring.next_buffer()
+    buffer[:] = (255, 0, 0)  # Decoded as BGR: blue
+    assert ring.publish(buffer, 0.0).pixel_format == PixelFormat.RGB
+    ref = ring.get()
+    assert ref.pixel_format == PixelFormat.RGB
+    assert tuple(ref.frame[0, 0]) == (0, 0, 255)
+
+def test_synthetic_sources_are_opened_in_the_capture_process():
+    manager = ProcessCameraManager()
+    try:
+        assert manager.add_camera(4, source="synthetic:64x48@30/1", pixel_format=PixelFormat.RGB)
+        assert manager.cameras[4].get(cv2.CAP_PROP_FRAME_WIDTH) == 64
+        manager.start_capture()
+        deadline = time.monotonic() + 10.0
+        while manager.get_frame(4) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert manager.get_frame(4).shape == (48, 64, 3)
+        assert not manager.add_camera(5, source="synthetic:bad")
+    finally:
+        manager.stop_capture()
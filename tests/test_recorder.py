@@ -0,0 +1,145 @@
+import json
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core.mjpeg_store import MjpegReader
+from core.playback import PlaybackManager
+from core.recorder import Recorder
+from core.segments import JOURNAL_NAME, SessionJournal, journal_segments
+
+from .fakes import fake_manager, read_stamp
+
+def record(tmp_path, seconds=0.3, count=2, **recorder_kwargs):
+    manager = fake_manager(count)
+    manager.start_capture()
+    recorder = Recorder(manager, **recorder_kwargs)
+    try:
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(seconds)
+        stats = recorder.get_encoder_stats()
+        recorder.stop_recording()
+    finally:
+        manager.stop_capture()
+    return recorder.recording_path, stats
+
+def test_every_submitted_frame_is_encoded(tmp_path):
+    session, stats = record(tmp_path)
+    with open(session / "metadata.json") as f:
+        metadata = json.load(f)
+    assert metadata["cameras"] == [0, 1]
+    for camera_id in (0, 1):
+        frame_count = 0
+        for path in sorted(session.glob(f"camera_{camera_id}_*.mp4")):
+            cap = cv2.VideoCapture(str(path))
+            frame_count += int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+        assert frame_count > 5
+        assert metadata["frames_encoded"][str(camera_id)] == frame_count
+        assert metadata["dropped_frames"][str(camera_id)] == 0
+    assert set(stats) == {0, 1} and all(camera.queue_capacity == 120 for camera in stats.values())
+
+def test_recording_needs_a_camera(tmp_path):
+    manager = fake_manager(0)
+    assert not Recorder(manager).start_recording(str(tmp_path))
+
+@pytest.mark.parametrize("jpeg", [False, True])
+def test_mjpeg_recording_stores_every_frame(tmp_path, jpeg):
+    manager = fake_manager(1, jpeg=jpeg)
+    manager.start_capture()
+    recorder = Recorder(manager, recording_mode="mjpeg")
+    try:
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(0.3)
+        recorder.stop_recording()
+    finally:
+        manager.stop_capture()
+    with open(recorder.recording_path / "metadata.json") as f:
+        metadata = json.load(f)
+    reader = MjpegReader(str(recorder.recording_path / "camera_0.mjpeg"))
+    assert reader.frame_count == metadata["frames_encoded"]["0"] > 5
+    numbers = [read_stamp(reader.decode(number)) for number in range(reader.frame_count)]
+    assert numbers == list(range(numbers[0], numbers[0] + reader.frame_count))
+    timestamps = reader.index.timestamps
+    assert timestamps[0] >= 0 and (np.diff(timestamps) > 0).all()
+
+def test_unknown_recording_mode():
+    with pytest.raises(ValueError):
+        Recorder(fake_manager(0), recording_mode="gif")
+
+@pytest.mark.parametrize("sync_frames", [False, True])
+def test_video_sync_is_fed_only_on_request(tmp_path, sync_frames):
+    manager = fake_manager(1)
+    manager.start_capture()
+    recorder = Recorder(manager, sync_frames=sync_frames, sync_capacity=1000)
+    try:
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(0.2)
+        recorder.stop_recording()
+    finally:
+        manager.stop_capture()
+    count = recorder.video_sync.recordings[0].count
+    assert count > 5 if sync_frames else count == 0
+
+def test_proxy_stream_is_recorded_alongside(tmp_path):
+    session, _ = record(tmp_path, count=1, recording_mode="mjpeg", proxy_height=24)
+    with open(session / "metadata.json") as f:
+        metadata = json.load(f)
+    assert metadata["proxy_height"] == 24
+    reader = MjpegReader(str(session / "camera_0.mjpeg"))
+    proxy = MjpegReader(str(session / "camera_0_proxy.mjpeg"))
+    assert proxy.frame_count == reader.frame_count > 5
+    assert proxy.decode(0).shape == (24, 32, 3)
+    assert (proxy.index.timestamps == reader.index.timestamps).all()
+
+def test_thumbnails_are_written_while_recording(tmp_path):
+    session, _ = record(tmp_path, seconds=0.35, count=1, recording_mode="mjpeg", thumbnail_interval=0.1)
+    with open(session / "metadata.json") as f:
+        assert json.load(f)["thumbnail_interval"] == 0.1
+    manager = PlaybackManager(read_ahead=False)
+    assert manager.load_session(str(session))
+    try:
+        filmstrip = manager.get_filmstrip(0)
+        assert 3 <= len(filmstrip) <= 5
+        assert filmstrip.tiles.shape[1:] == (72, 96, 3)
+        assert np.array_equal(manager.get_thumbnail(0, 0.1), filmstrip.tiles[1])
+        assert manager.get_thumbnail(1, 0.1) is None
+    finally:
+        manager.close()
+
+def test_segments_are_journaled_and_played_back_as_one(tmp_path):
+    session, _ = record(tmp_path, seconds=0.5, count=1, segment_seconds=0.2)
+    entries = SessionJournal.read(session / JOURNAL_NAME)
+    assert [entry["event"] for entry in entries][0] == "start" and entries[-1]["event"] == "stop"
+    segments = journal_segments(session, entries)[0]
+    assert len(segments) >= 2 and all(segment.path.exists() for segment in segments)
+    with open(session / "metadata.json") as f:
+        assert sum(segment.frame_count for segment in segments) == json.load(f)["frames_encoded"]["0"]
+    manager = PlaybackManager(read_ahead=False)
+    shown = []
+    manager.register_frame_callback(lambda frames: shown.append(read_stamp(frames[0])))
+    try:
+        assert manager.load_session(str(session))
+        for _ in range(sum(segment.frame_count for segment in segments)):
+            manager.step_frame()
+    finally:
+        manager.close()
+    assert shown == list(range(shown[0], shown[0] + len(shown)))
+
+def test_crashed_session_is_recovered_from_the_journal(tmp_path):
+    session, _ = record(tmp_path, seconds=0.5, count=1, segment_seconds=0.2)
+    # A crash leaves neither metadata.json nor the stop entry, and cuts the last line short
+    (session / "metadata.json").unlink()
+    with open(session / JOURNAL_NAME) as f:
+        lines = f.readlines()[:-1]
+    with open(session / JOURNAL_NAME, "w") as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:20])
+    manager = PlaybackManager(read_ahead=False)
+    try:
+        assert manager.load_session(str(session))
+        assert 0 < manager.duration < 0.5
+    finally:
+        manager.close()
@@ -0,0 +1,75 @@
+import json
+
+import cv2
+import numpy as np
+
+from core.segments import SegmentedCapture, SegmentedVideoWriter, SessionJournal, journal_segments, recover_metadata
+
+from .fakes import read_stamp, stamp
+
+def write_journal(path, entries, tail=""):
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        f.write(tail)
+
+START = {"event": "start", "format": "mp4", "cameras": [0, 1]}
+
+def segment(camera, number, first_frame, start, end):
+    return {"event": "segment", "camera": camera, "segment": number, "file": f"camera_{camera}_{number:05d}.mp4",
+            "first_frame": first_frame, "frame_count": 60, "start": start, "end": end}
+
+def test_truncated_entry_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_journal(path, [START, segment(0, 0, 0, 0.0, 0.98)], tail='{"event": "segment", "cam')
+    assert len(SessionJournal.read(path)) == 2
+
+def test_recover_metadata_from_truncated_journal(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_journal(path, [START, segment(0, 0, 0, 0.0, 0.98), segment(1, 0, 0, 0.01, 0.99),
+                         segment(0, 1, 60, 1.0, 1.98)],
+                  tail=json.dumps(segment(1, 1, 60, 1.01, 1.99))[:40])
+    entries = SessionJournal.read(path)
+    metadata = recover_metadata(tmp_path, entries)
+    assert metadata["recovered"] is True
+    assert metadata["format"] == "mp4" and metadata["cameras"] == [0, 1]
+    assert metadata["duration"] == 1.98  # The cut-off segment is not counted
+    segments = journal_segments(tmp_path, entries)
+    assert [len(segments[0]), len(segments[1])] == [2, 1]
+    assert segments[0][1].path == tmp_path / "camera_0_00001.mp4"
+
+def test_recover_metadata_without_segments(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_journal(path, [START], tail='{"event": "seg')
+    assert recover_metadata(tmp_path, SessionJournal.read(path))["duration"] == 0.0
+
+def test_recover_metadata_needs_start(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_journal(path, [], tail='{"event": "start", "form')
+    assert recover_metadata(tmp_path, SessionJournal.read(path)) is None
+
+def test_journal_entries_survive_reopening(tmp_path):
+    journal = SessionJournal(tmp_path / "journal.jsonl")
+    journal.append("start", cameras=[0])
+    journal.close()
+    journal.append("stop", duration=1.0)  # Ignored once closed
+    assert SessionJournal.read(tmp_path / "journal.jsonl") == [{"event": "start", "cameras": [0]}]
+
+def test_segmented_capture_reads_across_segments(tmp_path):
+    journal = SessionJournal(tmp_path / "journal.jsonl")
+    writer = SegmentedVideoWriter(tmp_path / "camera_0.mp4", 30, (160, 48), 0, journal, segment_seconds=0.5)
+    for frame_number in range(40):
+        writer.write(stamp(np.full((48, 160, 3), 128, dtype=np.uint8), frame_number), frame_number / 30)
+    writer.release()
+    journal.close()
+    segments = journal_segments(tmp_path, SessionJournal.read(tmp_path / "journal.jsonl"))[0]
+    assert [(segment.first_frame, segment.frame_count) for segment in segments] == [(0, 15), (15, 15), (30, 10)]
+    cap = SegmentedCapture(segments)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 40
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 13)
+    numbers = [read_stamp(cap.read()[1]) for _ in range(5)]
+    assert numbers == [13, 14, 15, 16, 17]
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 39)
+    assert read_stamp(cap.read()[1]) == 39
+    assert cap.read() == (False, None)
+    cap.release()
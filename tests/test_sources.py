@@ -0,0 +1,90 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core.camera_manager import CameraManager
+from core.sources import (FileSource, SyntheticSource, open_source, read_frame_number,
+                          synthetic_sources)
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 50, (64, 48))
+    for value in range(10):
+        writer.write(np.full((48, 64, 3), value * 20, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+def read_times(source, count):
+    times = []
+    for _ in range(count):
+        ok, frame = source.read()
+        assert ok
+        times.append(time.monotonic())
+    return times, frame
+
+def test_synthetic_frames_are_numbered_and_deterministic():
+    first, second = SyntheticSource(320, 240, fps=1000), SyntheticSource(320, 240, fps=1000)
+    for frame_number in range(5):
+        ok, frame = first.read()
+        assert ok and frame.shape == (240, 320, 3) and read_frame_number(frame) == frame_number
+        assert np.array_equal(frame, second.read()[1])
+    assert not np.array_equal(SyntheticSource(320, 240, seed=1).read()[1], SyntheticSource(320, 240).read()[1])
+
+def test_frame_numbers_survive_jpeg():
+    source = SyntheticSource(320, 240, fps=1000)
+    for _ in range(300):
+        ok, frame = source.read()
+    decoded = cv2.imdecode(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 60])[1], cv2.IMREAD_COLOR)
+    assert read_frame_number(decoded) == 299
+
+def test_synthetic_source_is_paced_at_its_frame_rate():
+    source = SyntheticSource(64, 48, fps=50)
+    times, _ = read_times(source, 11)
+    assert times[-1] - times[0] == pytest.approx(0.2, abs=0.04)
+
+def test_late_reader_does_not_get_a_burst():
+    source = SyntheticSource(64, 48, fps=50)
+    source.read()
+    time.sleep(0.2)  # Ten frames late
+    times, _ = read_times(source, 3)
+    assert times[-1] - times[0] >= 0.03
+
+def test_frame_count_ends_the_source():
+    source = SyntheticSource(64, 48, fps=1000, frame_count=3)
+    assert [source.read()[0] for _ in range(4)] == [True, True, True, False]
+
+def test_file_source_plays_at_its_rate_and_loops(video_file):
+    source = FileSource(video_file)
+    assert source.isOpened() and source.fps == 50
+    times, frame = read_times(source, 15)
+    assert frame.shape == (48, 64, 3)
+    assert times[-1] - times[0] == pytest.approx(14 / 50, abs=0.05)
+    source.release()
+    assert not source.isOpened() and not source.read()[0]
+
+def test_open_source_specs(video_file):
+    assert isinstance(open_source("synthetic:64x48@30/2"), SyntheticSource)
+    assert open_source("synthetic:64x48@30/2").seed == 2
+    assert isinstance(open_source(f"file:{video_file}"), FileSource)
+    assert open_source(video_file).isOpened()  # Bare path, read as fast as it decodes
+    assert open_source("file:/no/such/file.mp4") is None
+    source = SyntheticSource(64, 48)
+    assert open_source(source) is source
+    assert synthetic_sources(2, 64, 48, 30) == {0: "synthetic:64x48@30/0", 1: "synthetic:64x48@30/1"}
+
+def test_camera_manager_captures_from_sources():
+    manager = CameraManager()
+    assert manager.add_camera(0, source="synthetic:64x48@100/0")
+    assert manager.add_camera(1, source=SyntheticSource(64, 48, fps=100, seed=1))
+    manager.start_capture()
+    try:
+        deadline = time.monotonic() + 5.0
+        while len(manager.get_frames_since({})) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        frames = manager.get_frames_since({})
+        assert set(frames) == {0, 1} and all(ref.frame.shape == (48, 64, 3) for ref in frames.values())
+    finally:
+        manager.stop_capture()
@@ -0,0 +1,118 @@
+import sqlite3
+import time
+
+import pytest
+
+from core.catalog import CATALOG_NAME, SessionCatalog
+from core.recorder import Recorder
+from core.storage import DEFAULT_BYTES_PER_PIXEL, StorageManager
+
+from .fakes import fake_manager
+
+GB = 1024 ** 3
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = SessionCatalog(tmp_path / CATALOG_NAME)
+    yield catalog
+    catalog.close()
+
+def add_session(catalog, tmp_path, name, start_time, total_bytes, duration=10.0, pixel_rate=0.0,
+                recording_format="mp4", protected=False):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "camera_0.mp4").write_bytes(b"\0" * 16)
+    session_id = catalog.begin_session(path, start_time, recording_format, [0], pixel_rate=pixel_rate)
+    catalog.update_camera(session_id, 0, 100, duration, total_bytes)
+    catalog.finish_session(session_id, duration)
+    catalog.set_protected(session_id, protected)
+    return path
+
+def test_estimate_defaults_to_bytes_per_pixel(tmp_path):
+    storage = StorageManager(tmp_path)
+    cameras = {0: (640, 480, 30.0), 1: (640, 480, 30.0)}
+    assert storage.estimate_bytes_per_second(cameras, "mp4") == pytest.approx(
+        2 * 640 * 480 * 30 * DEFAULT_BYTES_PER_PIXEL["mp4"])
+
+def test_estimate_scales_earlier_sessions_by_pixel_rate(tmp_path, catalog):
+    add_session(catalog, tmp_path, "vga", 100.0, total_bytes=10_000_000, pixel_rate=640 * 480 * 30)
+    storage = StorageManager(tmp_path, catalog)
+    measured = 10_000_000 / 10.0
+    assert storage.estimate_bytes_per_second({0: (640, 480, 30.0)}, "mp4") == pytest.approx(measured)
+    # Four times the pixels is four times the bytes, not the same rate as the smaller session
+    assert storage.estimate_bytes_per_second({0: (1280, 960, 30.0)}, "mp4") == pytest.approx(4 * measured)
+
+def test_catalog_gains_the_pixel_rate_column(tmp_path):
+    path = tmp_path / CATALOG_NAME
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE sessions (id INTEGER PRIMARY KEY, path TEXT UNIQUE, start_time REAL, "
+                       "duration REAL DEFAULT 0, format TEXT, status TEXT, camera_count INTEGER DEFAULT 0, "
+                       "total_bytes INTEGER DEFAULT 0, protected INTEGER DEFAULT 0)")
+    connection.commit()
+    connection.close()
+    catalog = SessionCatalog(path)
+    try:
+        catalog.begin_session(tmp_path / "session", 1.0, "mp4", [0], pixel_rate=123.0)
+        assert catalog.list_sessions()[0].pixel_rate == 123.0
+    finally:
+        catalog.close()
+
+def test_refuse_policy_keeps_the_recording_from_starting(tmp_path, monkeypatch):
+    storage = StorageManager(tmp_path, policy="refuse", reserve_bytes=GB)
+    monkeypatch.setattr(storage, "free_bytes", lambda: GB // 2)
+    manager = fake_manager(1)
+    recorder = Recorder(manager, storage=storage)
+    assert not recorder.start_recording(str(tmp_path))
+    assert not recorder.is_recording()
+
+def test_warn_policy_records_anyway(tmp_path, monkeypatch):
+    storage = StorageManager(tmp_path, policy="warn", reserve_bytes=GB)
+    monkeypatch.setattr(storage, "free_bytes", lambda: GB // 2)
+    check = storage.check({0: (640, 480, 30.0)}, "mp4")
+    assert not check.fits and check.required_bytes > GB
+
+def test_evict_policy_deletes_oldest_unprotected_sessions(tmp_path, catalog, monkeypatch):
+    oldest = add_session(catalog, tmp_path, "oldest", 100.0, total_bytes=GB, protected=True)
+    older = add_session(catalog, tmp_path, "older", 200.0, total_bytes=GB)
+    newer = add_session(catalog, tmp_path, "newer", 300.0, total_bytes=GB)
+    free = {"bytes": 0}
+    storage = StorageManager(tmp_path, catalog, policy="evict", reserve_bytes=0)
+
+    def free_bytes():
+        # Every deleted session frees its catalogued size
+        return free["bytes"] + GB * sum(not path.exists() for path in (oldest, older, newer))
+    monkeypatch.setattr(storage, "free_bytes", free_bytes)
+
+    check = storage.check({0: (640, 480, 30.0)}, "mp4", seconds=1.0)
+    assert check.fits and check.evicted_sessions == [str(older.resolve())]
+    assert oldest.exists() and not older.exists() and newer.exists()
+    assert [session.path for session in catalog.list_sessions()] == [str(newer.resolve()), str(oldest.resolve())]
+    assert storage.get_stats().evicted_sessions == 1
+
+def test_retention_quota_is_enforced(tmp_path, catalog):
+    add_session(catalog, tmp_path, "a", 100.0, total_bytes=3000)
+    add_session(catalog, tmp_path, "b", 200.0, total_bytes=3000)
+    add_session(catalog, tmp_path, "c", 300.0, total_bytes=3000)
+    storage = StorageManager(tmp_path, catalog, policy="evict", max_total_bytes=6000)
+    assert storage.enforce_retention() == [str((tmp_path / "a").resolve())]
+
+def test_evict_needs_a_catalog(tmp_path):
+    with pytest.raises(ValueError):
+        StorageManager(tmp_path, policy="evict")
+
+def test_monitor_measures_write_throughput(tmp_path, catalog):
+    storage = StorageManager(tmp_path, catalog, reserve_bytes=0, sample_interval=0.05)
+    manager = fake_manager(1)
+    manager.start_capture()
+    recorder = Recorder(manager, catalog=catalog, storage=storage)
+    try:
+        assert recorder.start_recording(str(tmp_path))
+        time.sleep(0.5)
+        stats = recorder.get_storage_stats()
+        recorder.stop_recording()
+    finally:
+        manager.stop_capture()
+    assert stats.written_bytes > 0 and stats.required_bytes_per_second > 0
+    assert stats.seconds_remaining > 0
+    (session,) = catalog.list_sessions()
+    assert session.pixel_rate == 160 * 120 * 60.0
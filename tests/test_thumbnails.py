@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+from core.frames import FrameRef, PixelFormat
+from core.thumbnails import ThumbnailAtlas, ThumbnailWriter
+
+def ref(value, pixel_format=PixelFormat.BGR):
+    frame = np.full((120, 320, 3), value, dtype=np.uint8)
+    if pixel_format == PixelFormat.MJPEG:
+        frame = cv2.imencode(".jpg", frame)[1].reshape(-1)
+    return FrameRef(0, 0.0, frame, pixel_format)
+
+def write(path, frames, interval=1.0, height=24):
+    writer = ThumbnailWriter(path, interval, height)
+    for timestamp, value in frames:
+        writer.offer(ref(value), timestamp)
+    writer.close()
+    return ThumbnailAtlas(path)
+
+def tile_values(atlas):
+    return [int(round(tile.mean())) for tile in atlas.tiles]
+
+def test_one_tile_per_interval(tmp_path):
+    atlas = write(tmp_path / "camera_0_thumbs.atlas", [(t / 4, 10 * t) for t in range(13)])
+    assert atlas.tiles.shape == (4, 24, 64, 3)
+    assert tile_values(atlas) == [0, 40, 80, 120]
+    assert [atlas.time_of(slot) for slot in range(4)] == [0.0, 1.0, 2.0, 3.0]
+
+def test_skipped_slots_repeat_the_previous_tile(tmp_path):
+    atlas = write(tmp_path / "camera_0_thumbs.atlas", [(0.0, 10), (0.5, 20), (3.2, 30)])
+    assert tile_values(atlas) == [10, 10, 10, 30]
+    assert [atlas.time_of(slot) for slot in range(4)] == [0.0, 0.0, 0.0, 3.2]
+
+def test_late_camera_fills_from_its_first_frame(tmp_path):
+    atlas = write(tmp_path / "camera_0_thumbs.atlas", [(2.5, 50)])
+    assert tile_values(atlas) == [50, 50, 50]
+
+def test_mjpeg_frames_are_decoded_reduced(tmp_path):
+    writer = ThumbnailWriter(tmp_path / "camera_0_thumbs.atlas", 1.0, 24)
+    writer.offer(ref(100, PixelFormat.MJPEG), 0.0)
+    writer.close()
+    atlas = ThumbnailAtlas(tmp_path / "camera_0_thumbs.atlas")
+    assert atlas.tiles.shape == (1, 24, 64, 3)
+    assert abs(int(atlas.tiles[0].mean()) - 100) <= 2
+
+@pytest.mark.parametrize("seconds, expected", [(-5.0, 0), (0.4, 0), (0.6, 10), (1.4, 10), (9.0, 20)])
+def test_nearest_tile(tmp_path, seconds, expected):
+    atlas = write(tmp_path / "camera_0_thumbs.atlas", [(0.0, 0), (1.0, 10), (2.0, 20)])
+    assert int(round(atlas.nearest(seconds).mean())) == expected
+
+def test_atlas_is_readable_while_recording(tmp_path):
+    path = tmp_path / "camera_0_thumbs.atlas"
+    writer = ThumbnailWriter(path, 1.0, 24)
+    writer.offer(ref(10), 0.0)
+    writer.offer(ref(20), 1.0)
+    with open(path, "ab") as f:
+        f.write(b"\0" * 100)  # Part of a tile still being written
+    atlas = ThumbnailAtlas(path)
+    writer.close()
+    assert tile_values(atlas) == [10, 20]
+
+def test_missing_or_empty_atlas(tmp_path):
+    atlas = ThumbnailAtlas(tmp_path / "missing_thumbs.atlas")
+    assert len(atlas) == 0 and atlas.nearest(1.0) is None
+    ThumbnailWriter(tmp_path / "empty_thumbs.atlas").close()
+    assert ThumbnailAtlas(tmp_path / "empty_thumbs.atlas").nearest(0.0) is None
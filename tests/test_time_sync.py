@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+
+from core.camera_manager import CameraManager, CameraWorker
+from utils.time_sync import SkewStats, SynchronizedCapture
+
+class FakeCapture:
+    """Grab latches instantly; retrieve takes decode_time seconds."""
+    def __init__(self, value=0, decode_time=0.0, grab_ok=True, retrieve_ok=True):
+        self.value = value
+        self.decode_time = decode_time
+        self.grab_ok = grab_ok
+        self.retrieve_ok = retrieve_ok
+        self.grabbed_at = None
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def grab(self):
+        self.grabbed_at = time.monotonic()
+        return self.grab_ok
+
+    def retrieve(self):
+        time.sleep(self.decode_time)
+        if not self.retrieve_ok:
+            return False, None
+        return True, np.full((2, 2, 3), self.value, dtype=np.uint8)
+
+    def read(self):
+        return self.grab() and self.retrieve()
+
+    def release(self):
+        self.opened = False
+
+def test_frames_are_decoded_in_parallel():
+    caps = {camera_idx: FakeCapture(camera_idx, decode_time=0.05) for camera_idx in range(4)}
+    sync = SynchronizedCapture(caps)
+    try:
+        started = time.monotonic()
+        frame_set = sync.capture()
+        elapsed = time.monotonic() - started
+    finally:
+        sync.close()
+    assert elapsed < 0.15  # Serial retrieves would take 0.2 s
+    assert {camera_idx: int(frame[0, 0, 0]) for camera_idx, frame in frame_set.frames.items()} == \
+        {0: 0, 1: 1, 2: 2, 3: 3}
+
+def test_timestamps_are_taken_at_grab_time():
+    caps = {0: FakeCapture(decode_time=0.05), 1: FakeCapture(decode_time=0.05)}
+    sync = SynchronizedCapture(caps)
+    try:
+        frame_set = sync.capture()
+    finally:
+        sync.close()
+    for camera_idx, cap in caps.items():
+        assert 0 <= frame_set.timestamps[camera_idx] - cap.grabbed_at < 0.01
+        assert frame_set.read_latencies[camera_idx] >= 0.05
+    assert frame_set.skew == max(frame_set.timestamps.values()) - min(frame_set.timestamps.values())
+
+def test_failed_cameras_are_left_out_of_the_skew():
+    caps = {0: FakeCapture(), 1: FakeCapture(grab_ok=False), 2: FakeCapture(retrieve_ok=False)}
+    sync = SynchronizedCapture(caps)
+    try:
+        frame_set = sync.capture()
+    finally:
+        sync.close()
+    assert frame_set.frames[0] is not None
+    assert frame_set.frames[1] is None and 1 not in frame_set.timestamps
+    assert frame_set.frames[2] is None
+    assert frame_set.skew == 0.0
+
+def test_skew_stats():
+    sync = SynchronizedCapture({})
+    assert sync.get_skew_stats() == SkewStats()
+    sync.seq = 3
+    sync.skews.extend([0.001, 0.003, 0.002])
+    sync.max_skew = 0.003
+    stats = sync.get_skew_stats()
+    sync.close()
+    assert stats.sets == 3
+    assert abs(stats.last_skew_ms - 2.0) < 1e-9
+    assert abs(stats.mean_skew_ms - 2.0) < 1e-9
+    assert abs(stats.max_skew_ms - 3.0) < 1e-9
+
+def test_synchronized_mode_publishes_sets_into_camera_slots():
+    manager = CameraManager("synchronized")
+    caps = {0: FakeCapture(10, decode_time=0.005), 1: FakeCapture(20, decode_time=0.005)}
+    for camera_idx, cap in caps.items():
+        manager.cameras[camera_idx] = cap
+        manager.workers[camera_idx] = CameraWorker(camera_idx, cap)
+    manager.start_capture()
+    try:
+        deadline = time.monotonic() + 2.0
+        while manager.get_frame_set() is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        frame_set = manager.get_frame_set()
+        assert manager.get_sync_stats().sets >= 1
+    finally:
+        manager.stop_capture()
+    assert set(frame_set.frames) == {0, 1}
+    assert frame_set.timestamps[0] <= frame_set.timestamps[1]
+    assert manager.get_frame_set() is None and manager.get_sync_stats() is None
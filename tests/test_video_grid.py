@@ -0,0 +1,175 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+from PyQt6.QtWidgets import QApplication
+
+from core.frames import PixelFormat
+from PyQt6.QtCore import QRect
+
+from ui.video_grid import (MAX_FEEDS, CompositeView, FrameScaler, ScalePlan, VideoGrid, fit_size,
+                           grid_shape, letterbox_bars)
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def scaler(app):
+    scaler = FrameScaler()
+    scaler.received = []
+    scaler.image_ready.connect(lambda camera_idx, scaled: scaler.received.append((camera_idx, scaled)))
+    yield scaler
+    scaler.stop()
+
+def collect(app, scaler, count, timeout=5.0):
+    """Scaled frames emitted to the GUI thread since the last call, once count have arrived."""
+    deadline = time.monotonic() + timeout
+    while len(scaler.received) < count and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    received, scaler.received = scaler.received, []
+    return received
+
+def test_fit_size_keeps_the_aspect_ratio():
+    assert fit_size(1920, 1080, 860, 600) == (860, 483)
+    assert fit_size(640, 480, 100, 600) == (100, 75)
+
+def test_plan_halves_before_the_final_bilinear_step():
+    plan = ScalePlan((1920, 1080), (430, 241), buffers=3)
+    assert [buffer.shape[:2] for buffer in plan.halvings] == [(540, 960), (270, 480)]
+    frame = np.random.default_rng(0).integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (31, 31), 0)
+    plan.run(frame, plan.outputs[0], cv2.COLOR_BGR2BGRA)
+    reference = cv2.resize(frame, (430, 241), interpolation=cv2.INTER_AREA)
+    assert np.abs(plan.outputs[0][..., :3].astype(int) - reference).mean() < 2.0
+
+def test_plan_copies_frames_that_already_fit():
+    plan = ScalePlan((160, 120), (160, 120), buffers=2)
+    frame = np.full((120, 160, 3), 7, dtype=np.uint8)
+    plan.run(frame, plan.outputs[1], cv2.COLOR_BGR2BGRA)
+    assert not plan.halvings and (plan.outputs[1][..., :3] == 7).all()
+
+def test_only_the_newest_frame_is_scaled(app, scaler):
+    frames = [np.full((480, 640, 3), value, dtype=np.uint8) for value in (10, 20, 30)]
+    for frame in frames:
+        scaler.submit(0, frame, PixelFormat.BGR)  # No target yet: each replaces the last
+    scaler.set_target(0, 320, 240)
+    ((camera_idx, scaled),) = collect(app, scaler, 1)
+    assert camera_idx == 0 and (scaled.image.width(), scaled.image.height()) == (320, 240)
+    assert (scaled.buffer[..., :3] == 30).all()
+
+def test_buffers_are_reused_only_once_released(app, scaler):
+    scaler.set_target(0, 64, 48)
+    received = []
+    for value in range(5):
+        scaler.submit(0, np.full((480, 640, 3), value, dtype=np.uint8), PixelFormat.BGR)
+        received += collect(app, scaler, 1, timeout=0.3)
+    assert len(received) == scaler.buffer_count  # Every buffer is still on screen
+    scaler.release(0, received[0][1])
+    assert len(collect(app, scaler, 1)) == 1
+
+def test_jpeg_frames_are_decoded_at_a_reduced_scale(app, scaler):
+    jpeg = cv2.imencode(".jpg", np.full((480, 640, 3), 128, dtype=np.uint8))[1].reshape(-1)
+    scaler.set_target(0, 160, 120)
+    scaler.submit(0, jpeg, PixelFormat.MJPEG)
+    assert len(collect(app, scaler, 1)) == 1
+    assert scaler.source_sizes[0] == (640, 480) and scaler._jpeg_reduction(0) == 4
+
+def test_grid_shows_scaled_frames(app):
+    grid = VideoGrid()
+    try:
+        grid.resize(400, 200)
+        grid.setup_grid(2)
+        grid.show()
+        app.processEvents()
+        grid.update_feed(1, np.zeros((480, 640, 3), dtype=np.uint8))
+        deadline = time.monotonic() + 5.0
+        while grid.feeds[1].scaled is None and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        scaled = grid.feeds[1].scaled
+        assert scaled is not None and grid.feeds[0].scaled is None
+        assert scaled.image.width() <= grid.feeds[1].width() and scaled.image.height() <= grid.feeds[1].height()
+        grid.clear_feed(1)
+        assert grid.feeds[1].scaled is None
+    finally:
+        grid.close()
+        grid.stop()
+
+def test_grid_shape_is_near_square():
+    assert [grid_shape(count) for count in (1, 2, 3, 4, 5, 9, 10, 16)] == [
+        (1, 1), (1, 2), (2, 2), (2, 2), (2, 3), (3, 3), (3, 4), (4, 4)]
+
+def test_letterbox_bars_surround_the_frame():
+    cell = QRect(0, 0, 100, 100)
+    assert letterbox_bars(cell, QRect(0, 25, 100, 50)) == [QRect(0, 0, 100, 25), QRect(0, 75, 100, 25)]
+    assert letterbox_bars(cell, QRect(10, 0, 80, 100)) == [QRect(0, 0, 10, 100), QRect(90, 0, 10, 100)]
+    assert letterbox_bars(cell, cell) == []
+
+def wait_for_tiles(app, composite, camera_ids, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not set(camera_ids) <= set(composite.tiles) and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+
+def test_many_cameras_share_one_composite(app):
+    grid = VideoGrid()
+    try:
+        grid.resize(800, 600)
+        camera_ids = [3, 7, 9, 12]
+        grid.setup_grid(len(camera_ids), camera_ids)
+        grid.show()
+        app.processEvents()
+        composite = grid.composite
+        assert isinstance(composite, CompositeView) and set(grid.feeds.values()) == {composite}
+        assert [composite.cells[camera_idx].topLeft().x() > 0 for camera_idx in camera_ids] == [
+            False, True, False, True]
+        for camera_idx in camera_ids:
+            grid.update_feed(camera_idx, np.zeros((480, 640, 3), dtype=np.uint8))
+        wait_for_tiles(app, composite, camera_ids)
+        assert set(composite.tiles) == set(camera_ids)
+        for camera_idx in camera_ids:
+            assert composite.cells[camera_idx].contains(composite.placed[camera_idx])
+        grid.setup_grid(MAX_FEEDS + 4)
+        assert len(grid.composite.camera_ids) == MAX_FEEDS
+    finally:
+        grid.close()
+        grid.stop()
+
+def test_only_changed_tiles_are_repainted(app):
+    grid = VideoGrid()
+    try:
+        grid.resize(800, 600)
+        grid.setup_grid(4)
+        grid.show()
+        composite = grid.composite
+        for camera_idx in range(4):
+            grid.update_feed(camera_idx, np.zeros((480, 640, 3), dtype=np.uint8))
+        wait_for_tiles(app, composite, range(4))
+        deadline = time.monotonic() + 1.0
+        while (composite.flushed or composite.dirty_cells) and time.monotonic() < deadline:
+            app.processEvents()
+
+        # Same size frame: just its tile is blitted, no letterbox bars or other tiles
+        flushes = []
+        flush = composite._flush
+        composite._flush = lambda: (flushes.append((set(composite.dirty_tiles), set(composite.dirty_cells))),
+                                    flush())
+        composite.repaint_timer.timeout.disconnect()
+        composite.repaint_timer.timeout.connect(composite._flush)
+        grid.update_feed(2, np.full((480, 640, 3), 255, dtype=np.uint8))
+        deadline = time.monotonic() + 5.0
+        while not flushes and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        assert flushes == [({2}, set())]
+
+        grid.clear_feed(1)
+        assert 1 not in composite.tiles and composite.dirty_cells == {1}
+    finally:
+        grid.close()
+        grid.stop()
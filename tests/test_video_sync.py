@@ -0,0 +1,76 @@
+import numpy as np
+
+from core.frames import PixelFormat
+from core.video_sync import FrameRecording, VideoSync
+
+def filled(capacity, timestamps):
+    recording = FrameRecording(0, capacity)
+    for timestamp in timestamps:
+        recording.append(np.full((2, 2, 3), int(timestamp * 10), dtype=np.uint8), timestamp, PixelFormat.BGR)
+    return recording
+
+def test_nearest_before_wrap():
+    recording = filled(8, [0.0, 1.0, 2.0, 3.0])
+    assert recording.nearest(np.array([-1.0, 0.4, 0.6, 1.5, 9.0])).tolist() == [0, 0, 1, 1, 3]
+
+def test_nearest_across_wrap():
+    # Capacity 4 after 6 frames: slots hold [4, 5, 2, 3], the oldest frame (2.0) is at slot 2
+    recording = filled(4, [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+    assert recording.head == 2 and recording.count == 4
+    positions = np.array([0.0, 2.4, 2.6, 3.4, 3.6, 4.5, 4.9, 10.0])
+    expected = [0, 0, 1, 1, 2, 2, 3, 3]
+    assert recording.nearest(positions).tolist() == expected
+    assert [recording.time_of(index) for index in expected] == [2.0, 2.0, 3.0, 3.0, 4.0, 4.0, 5.0, 5.0]
+
+def test_nearest_keeps_shape():
+    recording = filled(4, [0.0, 1.0, 2.0, 3.0, 4.0])
+    assert recording.nearest(np.array([[1.0, 4.0], [2.2, 3.9]])).tolist() == [[0, 3], [1, 3]]
+
+def test_nearest_on_empty_recording():
+    recording = FrameRecording(0, 4)
+    assert recording.nearest(np.array([1.0, 2.0])).tolist() == [-1, -1]
+    assert recording.nearest(np.float64(1.0)).shape == ()
+
+def test_frames_at_positions_across_wrap():
+    sync = VideoSync(capacity=3, budget_bytes=0)
+    sync.start_recording([0])
+    for timestamp in range(5):
+        sync.add_frame(0, np.full((2, 2, 3), timestamp, dtype=np.uint8), float(timestamp))
+    frame_sets = sync.get_frames_at_positions([0.0, 3.2, 4.0])
+    assert [int(frame_set[0][0, 0, 0]) for frame_set in frame_sets] == [2, 3, 4]
+
+def test_frames_at_scalar_position_on_empty_recording():
+    sync = VideoSync()
+    sync.start_recording([0])
+    assert sync.get_frames_at_positions(1.0) == [{}]
+
+def test_ring_is_sized_to_the_budget():
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    recording = FrameRecording(0, 100, budget_bytes=10 * frame.nbytes)
+    for timestamp in range(12):
+        recording.append(frame, float(timestamp), PixelFormat.BGR)
+    assert recording.capacity == 10 and recording.frames.nbytes == 10 * frame.nbytes
+    assert recording.count == 10 and recording.overwritten == 2
+
+def test_jpeg_ring_leaves_room_for_larger_frames():
+    jpeg = np.zeros(1000, dtype=np.uint8)
+    recording = FrameRecording(0, 100, budget_bytes=10 * jpeg.nbytes)
+    recording.append(jpeg, 0.0, PixelFormat.MJPEG)
+    assert recording.capacity == 5
+
+def test_budget_is_shared_by_cameras():
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    sync = VideoSync(capacity=100, budget_bytes=20 * frame.nbytes)
+    sync.start_recording([0, 1])
+    for camera_id in (0, 1):
+        sync.add_frame(camera_id, frame, 0.0)
+    assert [recording.capacity for recording in sync.recordings.values()] == [10, 10]
+
+def test_stop_recording_normalises_timestamps():
+    sync = VideoSync(capacity=4, budget_bytes=0)
+    sync.start_recording([0, 1])
+    sync.add_frame(0, np.zeros((2, 2, 3), dtype=np.uint8), 10.5)
+    sync.add_frame(1, np.zeros((2, 2, 3), dtype=np.uint8), 10.0)
+    sync.stop_recording()
+    assert sync.get_frame(0, 0).timestamp == 0.5 and sync.get_frame(1, 0).timestamp == 0.0
+    assert sync.get_duration() == 0.5
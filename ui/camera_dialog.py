@@ -1,27 +1,67 @@
 # src/ui/camera_selection_dialog.py
 
 import logging
+from threading import Thread
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QListWidget, QPushButton, 
                           QHBoxLayout, QLabel, QListWidgetItem)
-from PyQt6.QtCore import Qt
-from utils.camera_utils import get_available_cameras
+from PyQt6.QtCore import Qt, QFileSystemWatcher, QObject, QTimer, pyqtSignal
+from utils.camera_discovery import SYSFS_VIDEO, CameraDiscovery, enumerate_cameras
+from .video_grid import MAX_FEEDS
 
 logger = logging.getLogger(__name__)
 
+class DiscoveryWorker(QObject):
+    """One discovery run on its own thread, reporting through its own signals.
+
+    The worker has no parent, so it stays valid for as long as its thread
+    runs, even after the dialog that started it is gone.
+    """
+    # Emitted from the discovery thread, delivered on the GUI thread
+    camera_found = pyqtSignal(int, object)      # (discovery generation, CameraInfo)
+    finished = pyqtSignal(int)
+
+    def __init__(self, discovery, generation, force):
+        super().__init__()
+        self.discovery = discovery
+        self.generation = generation
+        self.force = force
+        self.thread = Thread(target=self._run, daemon=True, name="camera-discovery")
+
+    def start(self):
+        self.thread.start()
+
+    def join(self):
+        self.thread.join()
+
+    def _run(self):
+        try:
+            self.discovery.discover(MAX_FEEDS, lambda info: self.camera_found.emit(self.generation, info),
+                                    force=self.force)
+        except Exception as e:
+            logger.error(f"Error discovering cameras: {str(e)}", exc_info=True)
+        finally:
+            self.finished.emit(self.generation)
+
 class CameraSelectionDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, discovery=None):
         super().__init__(parent)
         self.setWindowTitle("Select Cameras")
         self.setMinimumWidth(500)
         
         # Store selected cameras
         self.selected_cameras = []
+
+        # Probe results are cached across dialogs when the caller passes its discovery
+        self.discovery = discovery or CameraDiscovery()
+        self.generation = 0
+        self.items = {}  # {camera index: QListWidgetItem}
+        self.workers = []  # Discovery runs still connected to this dialog
         
         # Create layout
         layout = QVBoxLayout(self)
         
         # Add instruction label
-        self.status_label = QLabel("Select up to 2 cameras:")
+        self.status_label = QLabel(f"Select up to {MAX_FEEDS} cameras:")
         layout.addWidget(self.status_label)
         
         # Create list widget with checkboxes
@@ -48,25 +88,85 @@ class CameraSelectionDialog(QDialog):
         # Add button layout to main layout
         layout.addLayout(button_layout)
         
+        # Refresh on hot-plug: device nodes appear and disappear in /dev
+        self.devices = set()
+        self.watcher = None
+        self.hotplug_timer = QTimer(self)
+        self.hotplug_timer.setSingleShot(True)
+        self.hotplug_timer.timeout.connect(self.on_devices_changed)
+        if SYSFS_VIDEO.is_dir():
+            self.watcher = QFileSystemWatcher(["/dev"], self)
+            # udev creates a node before it sets its permissions, wait for it to settle
+            self.watcher.directoryChanged.connect(lambda _: self.hotplug_timer.start(500))
+
         # Populate camera list
         self.populate_camera_list()
         
     def populate_camera_list(self):
-        """Populate the list of available cameras"""
+        """Start discovering cameras; the list fills in as each one answers"""
         try:
+            self.generation += 1
             self.camera_list.clear()
-            cameras = get_available_cameras(max_cameras=4)
-            
-            for idx, available, info in cameras:
-                if available and info is not None:
-                    width, height, fps = info
-                    item = QListWidgetItem(f"Camera {idx} ({width}x{height}, {fps} FPS)")
-                    item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-                    item.setCheckState(Qt.CheckState.Unchecked)
-                    self.camera_list.addItem(item)
-                    
+            self.items.clear()
+            self.devices = {device.path for device in enumerate_cameras(MAX_FEEDS)}
+            self.refresh_btn.setEnabled(False)
+            self.update_status()
+            force = self.sender() is self.refresh_btn  # An explicit Refresh re-probes everything
+            worker = DiscoveryWorker(self.discovery, self.generation, force)
+            worker.camera_found.connect(self.on_camera_found)
+            worker.finished.connect(self.on_discovery_finished)
+            self.workers.append(worker)
+            worker.start()
         except Exception as e:
             logger.error(f"Error populating camera list: {str(e)}", exc_info=True)
+
+    def done(self, result):
+        """Detach discovery from the dialog before it closes, so no thread reports to it afterwards"""
+        self.hotplug_timer.stop()
+        if self.watcher is not None:
+            self.watcher.directoryChanged.disconnect()
+        self.generation += 1  # Results already queued for the dialog are ignored
+        for worker in self.workers:
+            worker.camera_found.disconnect(self.on_camera_found)
+            worker.finished.disconnect(self.on_discovery_finished)
+        # A discovery returns within the probe timeout; probes still running only fill the cache
+        for worker in self.workers:
+            worker.join()
+        self.workers.clear()
+        super().done(result)
+
+    def on_camera_found(self, generation, info):
+        """Add a camera to the list, in index order, as soon as its probe answers"""
+        if generation != self.generation or not info.available:
+            return
+        idx = info.device.index
+        item = QListWidgetItem(f"Camera {idx} ({info.width}x{info.height}, {info.fps} FPS)")
+        if info.device.name:
+            item.setToolTip(f"{info.device.name} ({info.device.path})")
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+        checked = idx in self.selected_cameras
+        item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+        row = sum(1 for other in self.items if other < idx)
+        self.items[idx] = item
+        self.camera_list.blockSignals(True)
+        self.camera_list.insertItem(row, item)
+        self.camera_list.blockSignals(False)
+
+    def on_discovery_finished(self, generation):
+        self.workers = [worker for worker in self.workers if worker.generation != generation]
+        if generation != self.generation:
+            return
+        self.refresh_btn.setEnabled(True)
+        # Cameras that disappeared cannot stay selected
+        self.selected_cameras = [idx for idx in self.selected_cameras if idx in self.items]
+        self.update_status()
+
+    def on_devices_changed(self):
+        """Re-discover when a camera was plugged in or out"""
+        devices = {device.path for device in enumerate_cameras(MAX_FEEDS)}
+        if devices != self.devices:
+            logger.info("Camera devices changed, refreshing")
+            self.populate_camera_list()
             
     def on_item_changed(self, item):
         """Handle camera selection changes"""
@@ -76,31 +176,38 @@ class CameraSelectionDialog(QDialog):
             camera_idx = int(text.split()[1])
             
             if item.checkState() == Qt.CheckState.Checked:
-                # Add camera if not already selected and limit to 2 cameras
+                # Add camera if not already selected and limit to MAX_FEEDS cameras
                 if camera_idx not in self.selected_cameras:
-                    if len(self.selected_cameras) < 2:
+                    if len(self.selected_cameras) < MAX_FEEDS:
                         self.selected_cameras.append(camera_idx)
                     else:
-                        # Uncheck if already have 2 cameras
+                        # Uncheck if already have MAX_FEEDS cameras
                         item.setCheckState(Qt.CheckState.Unchecked)
             else:
                 # Remove camera if unchecked
                 if camera_idx in self.selected_cameras:
                     self.selected_cameras.remove(camera_idx)
                     
-            # Update status label
-            if len(self.selected_cameras) == 0:
-                self.status_label.setText("Select up to 2 cameras:")
-            elif len(self.selected_cameras) == 1:
-                self.status_label.setText("Selected Camera: " + str(self.selected_cameras[0]) + 
-                                        " (select another or click Done)")
-            else:
-                self.status_label.setText("Selected Cameras: " + 
-                                        str(self.selected_cameras[0]) + " and " + 
-                                        str(self.selected_cameras[1]))
+            self.update_status()
                 
         except Exception as e:
             logger.error(f"Error handling camera selection: {str(e)}", exc_info=True)
+
+    def update_status(self):
+        """Update status label"""
+        if len(self.selected_cameras) == 0:
+            if not self.refresh_btn.isEnabled():
+                self.status_label.setText("Searching for cameras...")
+            elif not self.items:
+                self.status_label.setText("No cameras found")
+            else:
+                self.status_label.setText(f"Select up to {MAX_FEEDS} cameras:")
+        elif len(self.selected_cameras) == 1:
+            self.status_label.setText("Selected Camera: " + str(self.selected_cameras[0]) + 
+                                    " (select another or click Done)")
+        else:
+            self.status_label.setText("Selected Cameras: " + 
+                                    ", ".join(str(camera_idx) for camera_idx in self.selected_cameras))
             
     def get_selected_cameras(self):
         """Get list of selected camera indices"""
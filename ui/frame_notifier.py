@@ -0,0 +1,90 @@
+# src/ui/frame_notifier.py
+
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from core.frames import FrameRef, PixelFormat
+
+@dataclass
+class DeliveryStats:
+    frames_posted: int = 0       # Frames handed in by capture or playback threads
+    ticks: int = 0               # Deliveries to the GUI thread
+    frames_delivered: int = 0
+    coalesced_frames: int = 0    # Frames replaced by a newer one of the same camera before delivery
+    coalesced_posts: int = 0     # Posts that found a delivery already pending and raised no signal
+    display_fps: float = 0.0
+
+class FrameNotifier(QObject):
+    """Thread-safe, coalescing hand-off of new frames to the GUI thread.
+
+    Any thread may post frames. The first post after a delivery raises one
+    queued signal. Later posts only replace the waiting frame of their
+    camera, so the GUI thread receives at most one frame per camera per
+    tick. Ticks are never closer together than 1 / max_fps; a post that
+    comes sooner is delivered when that interval has passed.
+    """
+    frames_ready = pyqtSignal(dict)  # {camera_idx: FrameRef}, on the GUI thread
+    _wake = pyqtSignal()
+
+    def __init__(self, max_fps: float = 60.0, parent=None):
+        super().__init__(parent)
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.lock = Lock()
+        self.latest: Dict[int, FrameRef] = {}
+        self.scheduled = False
+        self.last_delivery = 0.0
+        self.stats = DeliveryStats()
+        self.window_start = time.monotonic()
+        self.window_ticks = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._deliver)
+        self._wake.connect(self._on_wake)  # Queued: posts come from other threads
+
+    def post(self, camera_idx, ref: FrameRef):
+        """Any thread: offer the newest frame of a camera; a frame listener signature."""
+        with self.lock:
+            self.stats.frames_posted += 1
+            if camera_idx in self.latest:
+                self.stats.coalesced_frames += 1
+            self.latest[camera_idx] = ref
+            if self.scheduled:
+                self.stats.coalesced_posts += 1
+                return
+            self.scheduled = True
+        self._wake.emit()
+
+    def post_frames(self, frames: Dict[int, object], pixel_format: PixelFormat = PixelFormat.BGR):
+        """Any thread: offer a {camera_idx: frame} dict, as passed to playback frame callbacks."""
+        timestamp = time.monotonic()
+        for camera_idx, frame in frames.items():
+            self.post(camera_idx, FrameRef(0, timestamp, frame, pixel_format))
+
+    def _on_wake(self):
+        remaining = self.min_interval - (time.monotonic() - self.last_delivery)
+        if remaining > 0:
+            self.timer.start(max(1, int(remaining * 1000)))
+        else:
+            self._deliver()
+
+    def _deliver(self):
+        with self.lock:
+            frames, self.latest = self.latest, {}
+            self.scheduled = False
+            self.stats.ticks += 1
+            self.stats.frames_delivered += len(frames)
+        self.last_delivery = time.monotonic()
+        self.window_ticks += 1
+        elapsed = self.last_delivery - self.window_start
+        if elapsed >= 1.0:
+            self.stats.display_fps = self.window_ticks / elapsed
+            self.window_start = self.last_delivery
+            self.window_ticks = 0
+        if frames:
+            self.frames_ready.emit(frames)
+
+    def get_stats(self) -> DeliveryStats:
+        with self.lock:
+            return DeliveryStats(**vars(self.stats))
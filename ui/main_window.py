@@ -1,17 +1,24 @@
 import logging
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QMessageBox)
-from PyQt6.QtCore import Qt, QTimer
-from .video_grid import VideoGrid
+from .video_grid import MAX_FEEDS, VideoGrid
+from .frame_notifier import FrameNotifier
 from .camera_dialog import CameraSelectionDialog
+from .session_browser import SessionBrowserDialog
 from core.camera_manager import CameraManager
+from core.catalog import CATALOG_NAME, SessionCatalog
+from core.playback import PlaybackManager
+from core.process_capture import ProcessCameraManager
+from core.recorder import Recorder
+from utils.camera_discovery import CameraDiscovery
+from pathlib import Path
 import time
-import cv2
 
 logger = logging.getLogger(__name__)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, capture_backend="thread", max_display_fps=60.0, sources=None,
+                 recordings_directory="recordings"):
         logger.debug("Initializing MainWindow")
         super().__init__()
         
@@ -22,10 +29,27 @@ class MainWindow(QMainWindow):
             logger.debug("Window properties set")
             
             # Initialize camera manager
-            logger.debug("Creating CameraManager")
-            self.camera_manager = CameraManager()
+            logger.debug(f"Creating CameraManager ({capture_backend} backend)")
+            if capture_backend == "process":
+                self.camera_manager = ProcessCameraManager()
+            else:
+                self.camera_manager = CameraManager()
             self.current_camera_id = 0
             
+            # {camera_idx: source spec or object} to connect instead of picking devices
+            self.sources = dict(sources) if sources else None
+
+            # Probe results outlive the dialog, so reopening it does not probe again
+            self.camera_discovery = CameraDiscovery()
+            
+            # Session catalog, opened when first recording or browsing sessions
+            self.recordings_directory = Path(recordings_directory)
+            self.catalog = None
+            self.recorder = None
+            
+            # Playback of a session picked in the browser
+            self.playback_manager = None
+            
             # Create main widget and layout
             logger.debug("Creating main layout")
             main_widget = QWidget()
@@ -45,19 +69,14 @@ class MainWindow(QMainWindow):
             self.control_panel = self.create_control_panel()
             main_layout.addWidget(self.control_panel)
             
-            # Setup frame update timer
-            self.update_timer = QTimer()
-            self.update_timer.setTimerType(Qt.TimerType.PreciseTimer)
-            self.update_timer.setInterval(16)  # ~60 FPS to match camera
-            self.update_timer.timeout.connect(self.update_video_frames)
+            # Capture pushes new frames; feeds repaint only when their camera delivers one
+            self.frame_notifier = FrameNotifier(max_display_fps)
+            self.frame_notifier.frames_ready.connect(self.update_video_frames)
+            self.camera_manager.add_frame_listener(self.frame_notifier.post)
             
             # Performance monitoring
-            self.frame_count = 0
             self.last_fps_time = time.time()
             
-            # Start timer
-            self.update_timer.start()
-            
             # Disable buttons initially
             self.update_button_states()
             
@@ -83,6 +102,11 @@ class MainWindow(QMainWindow):
             self.play_button = QPushButton("Play")
             self.pause_button = QPushButton("Pause")
             self.record_button = QPushButton("Record")
+            self.sessions_button = QPushButton("Sessions")
+            self.play_button.clicked.connect(self.play_session)
+            self.pause_button.clicked.connect(self.pause_session)
+            self.record_button.clicked.connect(self.toggle_recording)
+            self.sessions_button.clicked.connect(self.show_session_browser)
             
             # Disable playback controls initially
             self.play_button.setEnabled(False)
@@ -94,6 +118,7 @@ class MainWindow(QMainWindow):
             layout.addWidget(self.play_button)
             layout.addWidget(self.pause_button)
             layout.addWidget(self.record_button)
+            layout.addWidget(self.sessions_button)
             
             logger.debug("Control panel created successfully")
             return panel
@@ -102,28 +127,32 @@ class MainWindow(QMainWindow):
             logger.error(f"Error creating control panel: {str(e)}", exc_info=True)
             raise
 
-    def update_video_frames(self):
-        """Update all video feeds"""
+    def update_video_frames(self, frame_refs):
+        """Update the feeds of the cameras that delivered new frames"""
         try:
-            # Get frames from all cameras
-            frames = self.camera_manager.get_frames()
-            
-            # Update each camera feed
-            for camera_idx, frame in frames.items():
+            # Only changed cameras are in frame_refs, stalled feeds are skipped entirely
+            for camera_idx, ref in frame_refs.items():
+                frame = ref.frame
                 if frame is not None:
-                    # Convert BGR to RGB for display
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    self.video_grid.update_feed(camera_idx, rgb_frame)
+                    # VideoGrid displays the frame in whatever layout it was captured in
+                    self.video_grid.update_feed(camera_idx, frame, ref.pixel_format)
                 else:
                     self.video_grid.clear_feed(camera_idx)
             
             # Log FPS every second
-            self.frame_count += 1
             current_time = time.time()
             if current_time - self.last_fps_time >= 1.0:
-                fps = self.frame_count / (current_time - self.last_fps_time)
-                logger.debug(f"UI Update FPS: {fps:.1f}")
-                self.frame_count = 0
+                delivery = self.frame_notifier.get_stats()
+                logger.debug(f"UI Update FPS: {delivery.display_fps:.1f}, "
+                             f"{delivery.coalesced_posts} ticks and {delivery.coalesced_frames} frames coalesced")
+                for stats in self.camera_manager.get_camera_stats().values():
+                    logger.debug(f"Camera {stats.camera_idx}: {stats.fps:.1f} FPS, "
+                                 f"{stats.dropped_frames} dropped, "
+                                 f"read {stats.mean_read_latency_ms:.1f} ms avg")
+                sync_stats = self.camera_manager.get_sync_stats()
+                if sync_stats:
+                    logger.debug(f"Inter-camera skew: {sync_stats.mean_skew_ms:.2f} ms avg, "
+                                 f"{sync_stats.max_skew_ms:.2f} ms max")
                 self.last_fps_time = current_time
                 
         except Exception as e:
@@ -131,29 +160,125 @@ class MainWindow(QMainWindow):
 
     def show_camera_selection(self):
         """Show camera selection dialog"""
-        dialog = CameraSelectionDialog(self)
+        if self.sources:
+            # Configured sources (files, synthetic cameras) need no device selection
+            self.start_cameras(self.sources)
+            return
+        dialog = CameraSelectionDialog(self, discovery=self.camera_discovery)
         if dialog.exec():
             selected_cameras = dialog.get_selected_cameras()
             if selected_cameras:
-                # Setup video grid for selected number of cameras
-                self.video_grid.setup_grid(len(selected_cameras))
-                
-                # Start camera manager with selected cameras
-                for camera_idx in selected_cameras:
-                    self.camera_manager.add_camera(camera_idx)
-                self.camera_manager.start_capture()
-                
-                # Update button states
-                self.update_button_states()
+                self.start_cameras({camera_idx: camera_idx for camera_idx in selected_cameras})
+
+    def start_cameras(self, sources):
+        """Open {camera_idx: source} and start capturing from them"""
+        camera_ids = list(sources)
+        
+        # Setup video grid for selected number of cameras
+        self.video_grid.setup_grid(len(camera_ids), camera_ids)
+        
+        # Start camera manager with selected cameras
+        for camera_idx, source in sources.items():
+            self.camera_manager.add_camera(camera_idx, source=source)
+        self.camera_manager.start_capture()
+        
+        # Update button states
+        self.update_button_states()
+
+    def open_catalog(self):
+        """Open the session catalog in the recordings directory, once"""
+        if self.catalog is None:
+            self.recordings_directory.mkdir(parents=True, exist_ok=True)
+            self.catalog = SessionCatalog(self.recordings_directory / CATALOG_NAME)
+        return self.catalog
+
+    def show_session_browser(self):
+        """Show the recorded sessions in the catalog and load the chosen one"""
+        try:
+            catalog = self.open_catalog()
+            # Pick up sessions recorded without the catalog
+            added = catalog.index_directory(self.recordings_directory)
+            if added:
+                logger.debug(f"Indexed {added} sessions in {self.recordings_directory}")
+        except Exception as e:
+            logger.error(f"Error opening session catalog: {str(e)}", exc_info=True)
+            QMessageBox.warning(self, "Sessions", f"Could not open the session catalog: {e}")
+            return
+        dialog = SessionBrowserDialog(catalog, self)
+        if dialog.exec():
+            record = dialog.get_selected_record()
+            if record is not None:
+                self.load_session(record)
+
+    def load_session(self, record):
+        """Load a catalogued session for playback, opening only the cameras the grid shows"""
+        try:
+            if self.camera_manager.is_capturing():
+                QMessageBox.information(self, "Sessions", "Disconnect the cameras to play back a session.")
+                return False
+            camera_ids = [camera.camera_id for camera in self.catalog.get_cameras(record.id)][:MAX_FEEDS]
+            if self.playback_manager is None:
+                self.playback_manager = PlaybackManager()
+                self.playback_manager.register_frame_callback(self.on_playback_frames)
+            if not camera_ids or not self.playback_manager.load_session(str(record.path), camera_ids):
+                QMessageBox.warning(self, "Sessions", f"Could not load session {record.path}")
+                return False
+            
+            self.video_grid.setup_grid(len(camera_ids), camera_ids)
+            self.playback_manager.seek_to(0.0)
+            logger.debug(f"Loaded session {record.path} cameras {camera_ids}")
+            self.statusBar().showMessage(f"Loaded session {record.path}")
+            return True
+        finally:
+            self.update_button_states()
+
+    def on_playback_frames(self, frames):
+        """Playback-thread callback: hand the frames to the feeds of their cameras"""
+        self.frame_notifier.post_frames(frames, self.playback_manager.pixel_format)
+
+    def play_session(self):
+        """Play the loaded session"""
+        if self.session_loaded():
+            self.playback_manager.play()
+            self.update_button_states()
+
+    def pause_session(self):
+        """Pause the loaded session"""
+        if self.session_loaded():
+            self.playback_manager.pause()
+            self.update_button_states()
+
+    def session_loaded(self):
+        """Check if a session is loaded for playback"""
+        return self.playback_manager is not None and self.playback_manager.session_path is not None
+
+    def toggle_recording(self):
+        """Start or stop recording the connected cameras"""
+        try:
+            if self.recorder is None:
+                # Recordings are catalogued as they are written
+                self.recorder = Recorder(self.camera_manager, catalog=self.open_catalog())
+            if self.recorder.is_recording():
+                self.recorder.stop_recording()
+            elif not self.recorder.start_recording(str(self.recordings_directory)):
+                QMessageBox.warning(self, "Record", "Could not start recording")
+            self.update_button_states()
+        except Exception as e:
+            logger.error(f"Error toggling recording: {str(e)}", exc_info=True)
 
     def toggle_camera(self):
         """Toggle camera connection on/off"""
         try:
             if self.camera_manager.is_capturing():
                 logger.debug("Stopping cameras")
+                if self.recorder is not None:
+                    self.recorder.stop_recording()
                 self.camera_manager.stop_capture()
                 self.connect_camera_btn.setText("Connect Camera")
             else:
+                if self.session_loaded():
+                    # Live feeds take over the grid
+                    self.playback_manager.close()
                 self.show_camera_selection()
             self.update_button_states()
         except Exception as e:
@@ -165,9 +290,12 @@ class MainWindow(QMainWindow):
             camera_connected = self.camera_manager.is_capturing()
             self.connect_camera_btn.setText("Disconnect Camera" if camera_connected else "Connect Camera")
             self.select_camera_btn.setEnabled(not camera_connected)
-            self.play_button.setEnabled(False)  # Disable unused buttons
-            self.pause_button.setEnabled(False)
-            self.record_button.setEnabled(False)
+            playing = self.session_loaded() and self.playback_manager.is_playing
+            self.play_button.setEnabled(self.session_loaded() and not playing)
+            self.pause_button.setEnabled(playing)
+            recording = self.recorder is not None and self.recorder.is_recording()
+            self.record_button.setEnabled(camera_connected)
+            self.record_button.setText("Stop Recording" if recording else "Record")
         except Exception as e:
             logger.error(f"Error updating button states: {str(e)}", exc_info=True)
 
@@ -175,8 +303,15 @@ class MainWindow(QMainWindow):
         """Clean up resources when closing the application"""
         try:
             logger.debug("Closing application")
-            self.update_timer.stop()
+            self.camera_manager.remove_frame_listener(self.frame_notifier.post)
+            if self.recorder is not None:
+                self.recorder.close()
             self.camera_manager.stop_capture()
+            self.video_grid.stop()
+            if self.playback_manager is not None:
+                self.playback_manager.close()
+            if self.catalog is not None:
+                self.catalog.close()
             event.accept()
         except Exception as e:
             logger.error(f"Error during application closure: {str(e)}", exc_info=True)
@@ -0,0 +1,108 @@
+# src/ui/session_browser.py
+
+import logging
+import time
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                          QPushButton, QLabel, QLineEdit, QDoubleSpinBox, QCheckBox,
+                          QAbstractItemView, QHeaderView)
+from core.catalog import SessionCatalog
+
+logger = logging.getLogger(__name__)
+
+class SessionBrowserDialog(QDialog):
+    """Lists recorded sessions from the catalog; filtering never opens a video file."""
+    COLUMNS = ["Started", "Duration", "Cameras", "Size", "Markers", "Status", "Path"]
+
+    def __init__(self, catalog: SessionCatalog, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Recorded Sessions")
+        self.setMinimumWidth(800)
+
+        self.catalog = catalog
+        self.sessions = []
+        self.selected_session = None
+
+        # Create layout
+        layout = QVBoxLayout(self)
+
+        # Create filter controls
+        filter_layout = QHBoxLayout()
+        self.path_filter = QLineEdit()
+        self.path_filter.setPlaceholderText("Path contains...")
+        self.path_filter.textChanged.connect(self.populate_session_list)
+        self.min_duration = QDoubleSpinBox()
+        self.min_duration.setRange(0, 24 * 3600)
+        self.min_duration.setSuffix(" s")
+        self.min_duration.valueChanged.connect(self.populate_session_list)
+        self.markers_only = QCheckBox("With markers")
+        self.markers_only.stateChanged.connect(self.populate_session_list)
+        filter_layout.addWidget(self.path_filter)
+        filter_layout.addWidget(QLabel("Min duration:"))
+        filter_layout.addWidget(self.min_duration)
+        filter_layout.addWidget(self.markers_only)
+        layout.addLayout(filter_layout)
+
+        # Create session table
+        self.session_table = QTableWidget(0, len(self.COLUMNS))
+        self.session_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.session_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.session_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.session_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.session_table.horizontalHeader().setSectionResizeMode(len(self.COLUMNS) - 1,
+                                                                   QHeaderView.ResizeMode.Stretch)
+        self.session_table.cellDoubleClicked.connect(lambda row, column: self.accept())
+        layout.addWidget(self.session_table)
+
+        # Create button layout
+        button_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.populate_session_list)
+        self.open_btn = QPushButton("Open")
+        self.open_btn.clicked.connect(self.accept)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.refresh_btn)
+        button_layout.addWidget(self.open_btn)
+        button_layout.addWidget(self.cancel_btn)
+        layout.addLayout(button_layout)
+
+        # Populate session list
+        self.populate_session_list()
+
+    def populate_session_list(self):
+        """Query the catalog with the current filters"""
+        try:
+            self.sessions = self.catalog.list_sessions(
+                min_duration=self.min_duration.value() or None,
+                with_markers=self.markers_only.isChecked(),
+                path_contains=self.path_filter.text().strip() or None
+            )
+            self.session_table.setRowCount(len(self.sessions))
+            for row, session in enumerate(self.sessions):
+                values = [
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(session.start_time or 0)),
+                    f"{session.duration:.1f} s",
+                    str(session.camera_count),
+                    f"{session.total_bytes / (1024 * 1024):.1f} MB",
+                    str(session.marker_count),
+                    session.status + (" (protected)" if session.protected else ""),
+                    session.path,
+                ]
+                for column, value in enumerate(values):
+                    self.session_table.setItem(row, column, QTableWidgetItem(value))
+
+        except Exception as e:
+            logger.error(f"Error populating session list: {str(e)}", exc_info=True)
+
+    def accept(self):
+        row = self.session_table.currentRow()
+        self.selected_session = self.sessions[row] if 0 <= row < len(self.sessions) else None
+        super().accept()
+
+    def get_selected_session(self):
+        """Get the path of the selected session"""
+        return self.selected_session.path if self.selected_session else None
+
+    def get_selected_record(self):
+        """Get the catalog record of the selected session"""
+        return self.selected_session
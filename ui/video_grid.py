@@ -1,70 +1,460 @@
 import cv2
-from PyQt6.QtWidgets import QWidget, QGridLayout, QLabel
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QImage, QPixmap
+import logging
+import math
+import numpy as np
+from collections import deque
+from threading import Thread, Condition
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from PyQt6.QtWidgets import QWidget, QGridLayout
+from PyQt6.QtCore import QObject, QPoint, QRect, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QRegion
+from core.frames import PixelFormat, convert_frame
+
+logger = logging.getLogger(__name__)
+
+# Display buffers are in Qt's native RGB32 layout (B, G, R, X in memory), which paints
+# as a plain blit; these are the conversions into it from the frames we can scale
+TO_RGB32 = {
+    PixelFormat.BGR: cv2.COLOR_BGR2BGRA,
+    PixelFormat.RGB: cv2.COLOR_RGB2BGRA,
+}
+
+# Most feeds a grid shows
+MAX_FEEDS = 16
+
+# libjpeg decodes at 1/2, 1/4 or 1/8 scale for a fraction of the cost of a full decode
+JPEG_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def fit_size(frame_width: int, frame_height: int, width: int, height: int) -> Tuple[int, int]:
+    """Largest size with the frame's aspect ratio that fits in width x height."""
+    scale = min(width / frame_width, height / frame_height)
+    return max(1, int(frame_width * scale)), max(1, int(frame_height * scale))
+
+class ScalePlan:
+    """How frames of one size are brought to a feed's size, with preallocated buffers to do it in.
+
+    Downscaling halves with an exact 2x2 box filter (INTER_AREA) while the
+    frame is at least twice the target, then finishes with a bilinear step of
+    less than 2x, which cannot alias. That is several times cheaper than one
+    INTER_AREA resize at a fractional ratio and much cleaner than one
+    bilinear resize at a large one. The last step writes RGB32 output.
+    """
+    def __init__(self, input_size: Tuple[int, int], output_size: Tuple[int, int], buffers: int):
+        self.input_size = input_size
+        self.output_size = output_size
+        width, height = input_size
+        self.halvings: List[np.ndarray] = []
+        while width // 2 >= output_size[0] and height // 2 >= output_size[1]:
+            width, height = width // 2, height // 2
+            self.halvings.append(np.empty((height, width, 3), dtype=np.uint8))
+        self.resized = np.empty((output_size[1], output_size[0], 3), dtype=np.uint8)
+        self.outputs = [np.empty((output_size[1], output_size[0], 4), dtype=np.uint8) for _ in range(buffers)]
+
+    def run(self, frame: np.ndarray, output: np.ndarray, conversion: int):
+        for buffer in self.halvings:
+            frame = cv2.resize(frame, (buffer.shape[1], buffer.shape[0]), dst=buffer,
+                               interpolation=cv2.INTER_AREA)
+        if frame.shape[:2] != output.shape[:2]:
+            frame = cv2.resize(frame, self.output_size, dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(frame, conversion, dst=output)
+
+class ScaledFrame(NamedTuple):
+    """A frame scaled for display; image wraps buffer, which stays out of reuse until released."""
+    image: QImage
+    buffer: np.ndarray
+    plan: ScalePlan
+    slot: int
+
+class FrameScaler(QObject):
+    """Scales frames for display on a worker thread and hands the images to the GUI thread.
+
+    Only the newest frame of each camera waits to be scaled; newer frames
+    replace it. Each camera cycles through a few preallocated output buffers:
+    one on screen, one on its way to the GUI thread and one being written.
+    A buffer is reused only after the GUI thread releases it.
+    """
+    image_ready = pyqtSignal(int, object)  # camera index, ScaledFrame
+
+    def __init__(self, buffers: int = 3):
+        super().__init__()
+        self.buffer_count = max(2, buffers)
+        self.condition = Condition()
+        self.pending: Dict[int, Tuple[np.ndarray, PixelFormat]] = {}
+        self.targets: Dict[int, Tuple[int, int]] = {}     # Feed size per camera, set on resize
+        self.source_sizes: Dict[int, Tuple[int, int]] = {}  # Full frame size, to pick JPEG reductions
+        self.plans: Dict[int, ScalePlan] = {}
+        self.free: Dict[int, Deque[int]] = {}
+        self.running = True
+        self.thread = Thread(target=self._scale_loop, daemon=True, name="frame-scaler")
+        self.thread.start()
+
+    def submit(self, camera_idx: int, frame: np.ndarray, pixel_format: PixelFormat):
+        """Queue the newest frame of a camera, replacing one not scaled yet."""
+        with self.condition:
+            self.pending[camera_idx] = (frame, pixel_format)
+            self.condition.notify_all()
+
+    def set_target(self, camera_idx: int, width: int, height: int):
+        """Size of a camera's feed; the scaling plan is rebuilt only when it changes."""
+        with self.condition:
+            if self.targets.get(camera_idx) != (width, height):
+                self.targets[camera_idx] = (width, height)
+                self.condition.notify_all()
+
+    def release(self, camera_idx: int, scaled: ScaledFrame):
+        """The GUI thread no longer shows scaled; its buffer can be written again."""
+        with self.condition:
+            if self.plans.get(camera_idx) is scaled.plan:
+                self.free[camera_idx].append(scaled.slot)
+                self.condition.notify_all()
+
+    def remove(self, camera_idx: int):
+        with self.condition:
+            for per_camera in (self.pending, self.targets, self.source_sizes, self.plans, self.free):
+                per_camera.pop(camera_idx, None)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _ready(self) -> Optional[int]:
+        """A camera with a frame waiting, a known feed size and a free buffer."""
+        for camera_idx in self.pending:
+            target = self.targets.get(camera_idx)
+            if target is None or target[0] <= 0 or target[1] <= 0:
+                continue
+            if camera_idx not in self.plans or self.free[camera_idx]:
+                return camera_idx
+        return None
+
+    def _plan(self, camera_idx: int, input_size: Tuple[int, int]) -> ScalePlan:
+        """Cached plan for the camera, rebuilt (with new buffers) when the frame or feed size changes."""
+        output_size = fit_size(*input_size, *self.targets[camera_idx])
+        plan = self.plans.get(camera_idx)
+        if plan is None or plan.input_size != input_size or plan.output_size != output_size:
+            plan = ScalePlan(input_size, output_size, self.buffer_count)
+            self.plans[camera_idx] = plan
+            self.free[camera_idx] = deque(range(self.buffer_count))
+        return plan
+
+    def _jpeg_reduction(self, camera_idx: int) -> int:
+        """Largest libjpeg reduction that still leaves the frame at least the feed's size."""
+        source = self.source_sizes.get(camera_idx)
+        if source is None:
+            return 1
+        output_width, output_height = fit_size(*source, *self.targets[camera_idx])
+        reduction = 1
+        while reduction < 8 and source[0] // (reduction * 2) >= output_width \
+                and source[1] // (reduction * 2) >= output_height:
+            reduction *= 2
+        return reduction
+
+    def _scale_loop(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: not self.running or self._ready() is not None)
+                if not self.running:
+                    break
+                camera_idx = self._ready()
+                frame, pixel_format = self.pending.pop(camera_idx)
+                reduction = self._jpeg_reduction(camera_idx) if pixel_format == PixelFormat.MJPEG else 1
+            try:
+                # Compressed passthrough frames are decoded here, at the smallest useful scale
+                if pixel_format == PixelFormat.MJPEG:
+                    frame = cv2.imdecode(frame, JPEG_REDUCED_FLAGS[reduction])
+                    pixel_format = PixelFormat.BGR
+                elif pixel_format not in TO_RGB32:
+                    frame = convert_frame(frame, pixel_format, PixelFormat.BGR)
+                    pixel_format = PixelFormat.BGR
+                height, width = frame.shape[:2]
+                with self.condition:
+                    if camera_idx not in self.targets:
+                        continue  # Feed removed meanwhile
+                    if reduction == 1:
+                        self.source_sizes[camera_idx] = (width, height)
+                    plan = self._plan(camera_idx, (width, height))
+                    if not self.free[camera_idx]:
+                        continue  # Buffers were all taken by an older plan's frames
+                    slot = self.free[camera_idx].popleft()
+                output = plan.outputs[slot]
+                plan.run(frame, output, TO_RGB32[pixel_format])
+                image = QImage(output.data, output.shape[1], output.shape[0], output.strides[0],
+                               QImage.Format.Format_RGB32)
+                self.image_ready.emit(camera_idx, ScaledFrame(image, output, plan, slot))
+            except Exception as e:
+                logger.error(f"Error scaling frame of camera {camera_idx}: {str(e)}")
+
+class FeedWidget(QWidget):
+    """Paints the latest scaled frame of one camera, centred; it never scales anything itself."""
+    def __init__(self, camera_idx: int, scaler: FrameScaler, parent=None):
+        super().__init__(parent)
+        self.camera_idx = camera_idx
+        self.scaler = scaler
+        self.scaled: Optional[ScaledFrame] = None
+        self.setMinimumSize(1, 1)
+
+    def show_frame(self, scaled: ScaledFrame):
+        previous, self.scaled = self.scaled, scaled
+        if previous is not None:
+            self.scaler.release(self.camera_idx, previous)
+        self.update()
+
+    def clear(self):
+        if self.scaled is not None:
+            self.scaler.release(self.camera_idx, self.scaled)
+            self.scaled = None
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scaler.set_target(self.camera_idx, self.width(), self.height())
+
+    def paintEvent(self, event):
+        if self.scaled is None:
+            return
+        image = self.scaled.image
+        painter = QPainter(self)
+        painter.drawImage((self.width() - image.width()) // 2, (self.height() - image.height()) // 2, image)
+        painter.end()
+
+def grid_shape(count: int) -> Tuple[int, int]:
+    """Rows and columns of the most square grid with room for count tiles."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return max(1, math.ceil(count / columns)), columns
+
+def letterbox_bars(cell: QRect, placed: QRect) -> List[QRect]:
+    """The parts of a tile around the frame centred in it."""
+    bars = [
+        QRect(cell.x(), cell.y(), cell.width(), placed.y() - cell.y()),
+        QRect(cell.x(), placed.bottom() + 1, cell.width(), cell.bottom() - placed.bottom()),
+        QRect(cell.x(), placed.y(), placed.x() - cell.x(), placed.height()),
+        QRect(placed.right() + 1, placed.y(), cell.right() - placed.right(), placed.height()),
+    ]
+    return [bar for bar in bars if bar.width() > 0 and bar.height() > 0]
+
+class CompositeView(QWidget):
+    """Any number of feeds composited by one widget, painted at most once per display frame.
+
+    Each camera is scaled straight to its tile's size into the scaler's
+    preallocated RGB32 buffers, and its tile is blitted from there: there is
+    no per-feed widget, layout or intermediate copy. A new frame only marks
+    its tile dirty, and dirty tiles are painted at most max_fps times a
+    second in a single paint event, so a camera that did not deliver costs
+    nothing and the number of paints does not grow with the number of feeds.
+    Tile origins and letterbox bars are worked out when a frame's size
+    changes, so a repaint of our own is one blit per changed tile.
+    """
+    def __init__(self, camera_ids: List[int], scaler: FrameScaler, spacing: int = 5,
+                 max_fps: float = 60.0, parent=None):
+        super().__init__(parent)
+        self.camera_ids = list(camera_ids)
+        self.scaler = scaler
+        self.spacing = spacing
+        self.cells: Dict[int, QRect] = {}          # Tile area of each camera
+        self.tiles: Dict[int, ScaledFrame] = {}    # Frame each tile shows
+        self.placed: Dict[int, QRect] = {}         # Where that frame sits in its tile
+        self.origins: Dict[int, QPoint] = {}       # Its top left corner, for the blit
+        self.bars: Dict[int, List[QRect]] = {}     # The tile's letterbox bars around it
+        self.cells_region = QRegion()
+        self.dirty_tiles = set()                   # Cameras with a new frame of the same size
+        self.dirty_cells = set()                   # Cameras whose whole tile needs painting
+        self.flushed: Optional[Tuple[set, set, QRegion]] = None  # What the pending paint is for
+        self.repaint_timer = QTimer(self)
+        self.repaint_timer.setSingleShot(True)
+        self.repaint_timer.setInterval(max(1, int(1000 / max_fps)))
+        self.repaint_timer.timeout.connect(self._flush)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)  # We paint every pixel ourselves
+        self.setMinimumSize(1, 1)
+
+    def _layout(self):
+        """Give every camera its tile size; only on resize."""
+        width, height = max(1, self.width()), max(1, self.height())
+        rows, columns = grid_shape(len(self.camera_ids))
+        cell_width = max(1, (width - self.spacing * (columns - 1)) // columns)
+        cell_height = max(1, (height - self.spacing * (rows - 1)) // rows)
+        self.cells.clear()
+        self.cells_region = QRegion()
+        for position, camera_idx in enumerate(self.camera_ids):
+            row, column = divmod(position, columns)
+            cell = QRect(column * (cell_width + self.spacing), row * (cell_height + self.spacing),
+                         cell_width, cell_height)
+            self.cells[camera_idx] = cell
+            self.cells_region = self.cells_region.united(cell)
+            self.scaler.set_target(camera_idx, cell_width, cell_height)
+        for camera_idx in list(self.tiles):
+            self._place(camera_idx)
+
+    def _place(self, camera_idx: int) -> Optional[QRect]:
+        """Centre a camera's frame in its tile; frames scaled for an older, larger tile are dropped."""
+        cell = self.cells.get(camera_idx)
+        scaled = self.tiles.get(camera_idx)
+        height, width = scaled.buffer.shape[:2]
+        if cell is None or width > cell.width() or height > cell.height():
+            self.scaler.release(camera_idx, self.tiles.pop(camera_idx))
+            self._unplace(camera_idx)
+            return None
+        placed = QRect(cell.x() + (cell.width() - width) // 2, cell.y() + (cell.height() - height) // 2,
+                       width, height)
+        self.placed[camera_idx] = placed
+        self.origins[camera_idx] = placed.topLeft()
+        self.bars[camera_idx] = letterbox_bars(cell, placed)
+        return placed
+
+    def _unplace(self, camera_idx: int):
+        for per_camera in (self.placed, self.origins, self.bars):
+            per_camera.pop(camera_idx, None)
+
+    def show_frame(self, camera_idx: int, scaled: ScaledFrame):
+        """Show a scaled frame in its tile at the next repaint."""
+        previous = self.tiles.get(camera_idx)
+        self.tiles[camera_idx] = scaled
+        if previous is not None:
+            self.scaler.release(camera_idx, previous)
+            if previous.buffer.shape == scaled.buffer.shape:
+                self._invalidate(camera_idx)  # Same placement: only the frame itself changes
+                return
+        if self._place(camera_idx) is not None:
+            self._invalidate(camera_idx, whole_cell=True)  # Letterbox bars move with a new size
+
+    def clear_feed(self, camera_idx: int):
+        scaled = self.tiles.pop(camera_idx, None)
+        if scaled is not None:
+            self.scaler.release(camera_idx, scaled)
+        self._unplace(camera_idx)
+        if camera_idx in self.cells:
+            self._invalidate(camera_idx, whole_cell=True)
+
+    def _invalidate(self, camera_idx: int, whole_cell: bool = False):
+        """Mark a tile dirty; tiles changing within one display interval share one paint."""
+        (self.dirty_cells if whole_cell else self.dirty_tiles).add(camera_idx)
+        if not self.repaint_timer.isActive():
+            self.repaint_timer.start()
+
+    def _flush(self):
+        tiles, cells = self.dirty_tiles - self.dirty_cells, self.dirty_cells
+        self.dirty_tiles, self.dirty_cells = set(), set()
+        region = QRegion()
+        for camera_idx in cells:
+            if camera_idx in self.cells:
+                region += self.cells[camera_idx]
+        for camera_idx in tiles:
+            if camera_idx in self.placed:
+                region += self.placed[camera_idx]
+        if self.flushed is not None:
+            # The previous flush has not been painted yet; paint it with this one
+            tiles, cells, region = tiles | self.flushed[0], cells | self.flushed[1], region + self.flushed[2]
+        self.flushed = (tiles, cells, region)
+        self.update(region)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._layout()
+
+    def paintEvent(self, event):
+        region = event.region()
+        flushed, self.flushed = self.flushed, None
+        painter = QPainter(self)
+        if flushed is not None and region == flushed[2]:
+            # Our own repaint: exactly the dirty tiles, blitted
+            tiles, cells, _ = flushed
+            for camera_idx in cells:
+                if camera_idx not in self.origins:
+                    painter.fillRect(self.cells[camera_idx], Qt.GlobalColor.black)
+                    continue
+                for bar in self.bars[camera_idx]:
+                    painter.fillRect(bar, Qt.GlobalColor.black)
+            for camera_idx in tiles | cells:
+                origin = self.origins.get(camera_idx)
+                if origin is not None:
+                    painter.drawImage(origin, self.tiles[camera_idx].image)
+            painter.end()
+            return
+
+        # Exposed, resized or merged with other updates: paint whatever the region touches
+        if not region.subtracted(self.cells_region).isEmpty():
+            painter.fillRect(event.rect(), Qt.GlobalColor.black)  # Spacing, exposed after a resize
+        for camera_idx, cell in self.cells.items():
+            if not region.intersects(cell):
+                continue
+            origin = self.origins.get(camera_idx)
+            if origin is None:
+                painter.fillRect(cell, Qt.GlobalColor.black)
+                continue
+            for bar in self.bars[camera_idx]:
+                painter.fillRect(bar, Qt.GlobalColor.black)
+            painter.drawImage(origin, self.tiles[camera_idx].image)
+        painter.end()
 
 class VideoGrid(QWidget):
-    def __init__(self, parent=None):
+    """Camera feeds side by side: a widget per feed for one or two cameras, one composited canvas beyond."""
+    def __init__(self, parent=None, composite_from: int = 3):
         super().__init__(parent)
         self.layout = QGridLayout(self)
         self.layout.setSpacing(5)
         self.feeds = {}  # Dictionary to store feed widgets
-        
-    def setup_grid(self, num_cameras):
-        """Setup the grid layout based on number of cameras"""
+        self.composite: Optional[CompositeView] = None
+        self.composite_from = composite_from  # Camera count from which feeds share one canvas
+
+        # Scaling happens off the GUI thread, which only paints the results
+        self.scaler = FrameScaler()
+        self.scaler.image_ready.connect(self.show_scaled_frame)
+
+    def setup_grid(self, num_cameras, camera_ids=None):
+        """Setup the grid layout based on number of cameras, shown in camera_ids order (0.. by default)"""
         # Clear existing feeds
-        for feed in self.feeds.values():
-            self.layout.removeWidget(feed)
-            feed.deleteLater()
+        for camera_idx, feed in self.feeds.items():
+            self.scaler.remove(camera_idx)
+        for widget in set(self.feeds.values()):
+            self.layout.removeWidget(widget)
+            widget.deleteLater()
         self.feeds.clear()
-        
-        if num_cameras == 1:
-            # Single camera - one large feed
-            feed = QLabel()
-            feed.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.layout.addWidget(feed, 0, 0)
-            self.feeds[0] = feed
-            
-        elif num_cameras == 2:
-            # Two cameras - side by side
-            for i in range(2):
-                feed = QLabel()
-                feed.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.layout.addWidget(feed, 0, i)
-                self.feeds[i] = feed
-                
-    def update_feed(self, camera_idx, frame):
-        """Update the video feed for a specific camera"""
+        self.composite = None
+
+        camera_ids = list(camera_ids if camera_ids is not None else range(num_cameras))[:MAX_FEEDS]
+        if len(camera_ids) >= self.composite_from:
+            # Many cameras - one canvas, painted once per frame
+            self.composite = CompositeView(camera_ids, self.scaler)
+            self.layout.addWidget(self.composite, 0, 0)
+            self.feeds = {camera_idx: self.composite for camera_idx in camera_ids}
+
+        else:
+            # Few cameras - a widget each, side by side
+            rows, columns = grid_shape(len(camera_ids))
+            for i, camera_idx in enumerate(camera_ids):
+                feed = FeedWidget(camera_idx, self.scaler)
+                self.layout.addWidget(feed, *divmod(i, columns))
+                self.feeds[camera_idx] = feed
+
+    def update_feed(self, camera_idx, frame, pixel_format=PixelFormat.BGR):
+        """Queue a frame for a specific camera; it is scaled and shown asynchronously"""
         if camera_idx in self.feeds and frame is not None:
-            try:
-                # Get feed dimensions
-                feed = self.feeds[camera_idx]
-                w = feed.width()
-                h = feed.height()
-                
-                if w > 0 and h > 0:
-                    # Scale frame to fit feed while maintaining aspect ratio
-                    frame_h, frame_w = frame.shape[:2]
-                    scale = min(w/frame_w, h/frame_h)
-                    new_w = int(frame_w * scale)
-                    new_h = int(frame_h * scale)
-                    
-                    # Resize frame
-                    frame = cv2.resize(frame, (new_w, new_h))
-                    
-                    # Convert frame to QImage
-                    bytes_per_line = frame.strides[0]
-                    image = QImage(frame.data, frame.shape[1], frame.shape[0], 
-                                 bytes_per_line, QImage.Format.Format_BGR888)
-                    
-                    # Convert to pixmap and set to label
-                    pixmap = QPixmap.fromImage(image)
-                    feed.setPixmap(pixmap)
-                    
-            except Exception as e:
-                print(f"Error updating feed {camera_idx}: {str(e)}")
-                
+            self.scaler.submit(camera_idx, frame, pixel_format)
+
+    def show_scaled_frame(self, camera_idx, scaled):
+        """GUI thread: show a frame the scaler has finished"""
+        feed = self.feeds.get(camera_idx)
+        if feed is None:
+            self.scaler.release(camera_idx, scaled)
+        elif feed is self.composite:
+            self.composite.show_frame(camera_idx, scaled)
+        else:
+            feed.show_frame(scaled)
+
     def clear_feed(self, camera_idx):
         """Clear the video feed for a specific camera"""
         if camera_idx in self.feeds:
-            self.feeds[camera_idx].clear()
+            if self.feeds[camera_idx] is self.composite:
+                self.composite.clear_feed(camera_idx)
+            else:
+                self.feeds[camera_idx].clear()
+
+    def stop(self):
+        """Stop the scaling thread"""
+        self.scaler.stop()
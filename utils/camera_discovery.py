@@ -0,0 +1,188 @@
+import cv2
+import logging
+import os
+import platform
+import queue
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+from .camera_utils import get_camera_backend
+
+logger = logging.getLogger(__name__)
+
+SYSFS_VIDEO = Path("/sys/class/video4linux")
+
+@dataclass
+class CameraDevice:
+    index: int
+    path: str               # /dev/videoN on Linux, "camera:N" where devices cannot be listed
+    name: str = ""
+    signature: tuple = ()   # Changes when the device is unplugged and plugged back, empty if unknown
+
+@dataclass
+class CameraInfo:
+    device: CameraDevice
+    available: bool
+    width: int = 0
+    height: int = 0
+    fps: int = 0
+    timed_out: bool = False  # The probe did not answer in time; it is retried on the next discovery
+
+def _read_attribute(path: Path, default: str = "") -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return default
+
+def enumerate_cameras(max_cameras: int = 16) -> List[CameraDevice]:
+    """List candidate capture devices without opening any of them.
+
+    On Linux the video4linux class in sysfs names every node; metadata and
+    other secondary nodes of a camera (index > 0) are skipped. Elsewhere
+    the first max_cameras indices are candidates.
+    """
+    if platform.system().lower() != "linux" or not SYSFS_VIDEO.is_dir():
+        return [CameraDevice(index, f"camera:{index}") for index in range(max_cameras)]
+    devices = []
+    for node in SYSFS_VIDEO.glob("video*"):
+        if not node.name[5:].isdigit() or _read_attribute(node / "index", "0") != "0":
+            continue
+        dev = Path("/dev") / node.name
+        try:
+            stat = dev.stat()
+        except OSError:
+            continue
+        # The USB port path and the node's creation time change on hot-plug
+        signature = (os.path.realpath(node / "device"), stat.st_rdev, stat.st_ctime_ns)
+        devices.append(CameraDevice(int(node.name[5:]), str(dev), _read_attribute(node / "name"), signature))
+    devices.sort(key=lambda device: device.index)
+    return devices[:max_cameras]
+
+def probe_camera(device: CameraDevice) -> CameraInfo:
+    """Open a device, read one frame and report its format."""
+    cap = cv2.VideoCapture(device.index, get_camera_backend())
+    try:
+        if not cap.isOpened():
+            logger.debug(f"No camera found at {device.path}")
+            return CameraInfo(device, False)
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            logger.debug(f"Camera {device.path} found but not readable")
+            return CameraInfo(device, False)
+        info = CameraInfo(device, True, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                          int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FPS)))
+        logger.debug(f"Found camera {device.path}: {info.width}x{info.height} @ {info.fps}fps")
+        return info
+    except Exception as e:
+        logger.error(f"Error checking camera {device.path}: {str(e)}")
+        return CameraInfo(device, False)
+    finally:
+        cap.release()
+
+class CameraDiscovery:
+    """Parallel, cached probing of capture devices.
+
+    Every candidate from enumerate_cameras() is probed on its own thread and
+    reported as soon as it answers; a probe that takes longer than
+    probe_timeout is reported as timed out and left to finish in the
+    background, where its result still fills the cache. Results are cached
+    per device path. A device with a hot-plug signature keeps its entry until
+    the signature changes; results without one, and failed probes, expire
+    after cache_seconds.
+    """
+    def __init__(self, probe_timeout: float = 3.0, cache_seconds: float = 30.0):
+        self.probe_timeout = probe_timeout
+        self.cache_seconds = cache_seconds
+        self.lock = Lock()
+        self.cache: Dict[str, Tuple[tuple, float, CameraInfo]] = {}  # path: (signature, probed at, info)
+        self.waiters: Dict[str, List[queue.Queue]] = {}  # Probes in flight and who waits for them
+
+    def invalidate(self, path: Optional[str] = None):
+        """Forget the cached result of one device, or of all of them."""
+        with self.lock:
+            if path is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(path, None)
+
+    def cached(self, device: CameraDevice) -> Optional[CameraInfo]:
+        with self.lock:
+            entry = self.cache.get(device.path)
+        if entry is None:
+            return None
+        signature, probed_at, info = entry
+        if signature != device.signature:
+            return None
+        if (not signature or not info.available) and time.monotonic() - probed_at > self.cache_seconds:
+            return None
+        return info
+
+    def discover(self, max_cameras: int = 16, on_result: Optional[Callable[[CameraInfo], None]] = None,
+                 force: bool = False) -> List[CameraInfo]:
+        """Probe all candidates and return their results in device order.
+
+        on_result is called with each result as it arrives: from this thread
+        for cached devices, from probe threads for the others. Blocks for at
+        most probe_timeout.
+        """
+        devices = enumerate_cameras(max_cameras)
+        with self.lock:
+            present = {device.path for device in devices}
+            for path in [path for path in self.cache if path not in present]:
+                del self.cache[path]
+        results: Dict[str, CameraInfo] = {}
+        answers = queue.Queue()
+        pending = {}
+        for device in devices:
+            info = None if force else self.cached(device)
+            if info is not None:
+                results[device.path] = info
+                if on_result:
+                    on_result(info)
+                continue
+            pending[device.path] = device
+            with self.lock:
+                in_flight = device.path in self.waiters  # A probe from an earlier discovery is still running
+                self.waiters.setdefault(device.path, []).append(answers)
+            if in_flight:
+                continue
+            Thread(target=self._probe, args=(device,), daemon=True, name=f"probe-{device.index}").start()
+
+        deadline = time.monotonic() + self.probe_timeout
+        while pending:
+            try:
+                info = answers.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if pending.pop(info.device.path, None) is None:
+                continue
+            results[info.device.path] = info
+            if on_result:
+                on_result(info)
+        for path, device in pending.items():
+            with self.lock:
+                waiters = self.waiters.get(path, [])
+                if answers in waiters:
+                    waiters.remove(answers)
+            logger.warning(f"Camera {path} did not answer within {self.probe_timeout:.1f}s")
+            info = CameraInfo(device, False, timed_out=True)
+            results[path] = info
+            if on_result:
+                on_result(info)
+        return [results[device.path] for device in devices]
+
+    def _probe(self, device: CameraDevice):
+        info = probe_camera(device)
+        with self.lock:
+            self.cache[device.path] = (device.signature, time.monotonic(), info)
+            waiters = self.waiters.pop(device.path, [])
+        for answers in waiters:
+            answers.put(info)
+
+def get_available_cameras(max_cameras: int = 2, discovery: Optional[CameraDiscovery] = None) -> list:
+    """Scan for cameras, as [(index, available, (width, height, fps) or None)]."""
+    discovery = discovery or CameraDiscovery()
+    return [(info.device.index, info.available, (info.width, info.height, info.fps) if info.available else None)
+            for info in discovery.discover(max_cameras)]
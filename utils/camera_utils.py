@@ -1,46 +1,56 @@
 import cv2
-import platform
 import time
 import numpy as np
 from threading import Thread
 from collections import deque
 import logging
+from core.frames import PixelFormat
+from core.sources import device_backend, open_source
 
 logger = logging.getLogger(__name__)
 
 def get_camera_backend():
     """Get the appropriate backend for the current operating system."""
-    system = platform.system().lower()
-    if system == "windows":
-        # Force DirectShow backend and disable RealSense checks
-        return cv2.CAP_DSHOW
-    elif system == "darwin":
-        return cv2.CAP_AVFOUNDATION
-    else:
-        return cv2.CAP_V4L2
+    return device_backend()
 
-def create_camera_capture(camera_id: int, for_preview: bool = False) -> tuple:
-    """Create an optimized camera capture."""
+def get_available_cameras(max_cameras: int = 2) -> list:
+    """Quick scan for available cameras; kept here for existing callers, see camera_discovery."""
+    # Imported on use: camera_discovery imports this module
+    from .camera_discovery import get_available_cameras as discover_cameras
+    return discover_cameras(max_cameras)
+
+def create_camera_capture(camera_id, for_preview: bool = False) -> tuple:
+    """Create an optimized camera capture.
+
+    camera_id is a device index or any other source open_source() accepts.
+    """
     try:
         backend = get_camera_backend()
         
-        if for_preview:
+        if not isinstance(camera_id, int):
+            # File and synthetic sources come with their own format and rate
+            cap = open_source(camera_id)
+            if cap is None:
+                return None, None
+            if for_preview:
+                return cap, None
+        elif for_preview:
             # Quick preview mode
             cap = cv2.VideoCapture(camera_id, backend)
             if not cap.isOpened():
                 return None, None
             return cap, None
+        else:
+            # Full initialization
+            cap = cv2.VideoCapture(camera_id, backend)
+            if not cap.isOpened():
+                return None, None
 
-        # Full initialization
-        cap = cv2.VideoCapture(camera_id, backend)
-        if not cap.isOpened():
-            return None, None
-
-        # Configure camera
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        cap.set(cv2.CAP_PROP_FPS, 30)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            # Configure camera
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         
         # Verify camera is working
         ret, frame = cap.read()
@@ -60,36 +70,6 @@ def create_camera_capture(camera_id: int, for_preview: bool = False) -> tuple:
             cap.release()
         return None, None
 
-def get_available_cameras(max_cameras: int = 2) -> list:
-    """Quick scan for available cameras."""
-    available_cameras = []
-    backend = get_camera_backend()
-    
-    for i in range(max_cameras):
-        try:
-            # Use DirectShow/specific backend to avoid RealSense detection
-            cap = cv2.VideoCapture(i, backend)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    fps = int(cap.get(cv2.CAP_PROP_FPS))
-                    available_cameras.append((i, True, (width, height, fps)))
-                    logger.debug(f"Found camera {i}: {width}x{height} @ {fps}fps")
-                else:
-                    available_cameras.append((i, False, None))
-                    logger.debug(f"Camera {i} found but not readable")
-            else:
-                available_cameras.append((i, False, None))
-                logger.debug(f"No camera found at index {i}")
-            cap.release()
-        except Exception as e:
-            logger.error(f"Error checking camera {i}: {str(e)}")
-            available_cameras.append((i, False, None))
-    
-    return available_cameras
-
 class AsyncFrameReader:
     """Asynchronous frame reader to decouple capture from display"""
     def __init__(self, camera_id):
@@ -98,6 +78,7 @@ class AsyncFrameReader:
         self.running = False
         self.thread = None
         self.cap = None
+        self.pixel_format = PixelFormat.BGR
         self.logger = logging.getLogger(f"{__name__}.AsyncFrameReader.{camera_id}")
 
     def start(self, cap):
@@ -129,8 +110,7 @@ class AsyncFrameReader:
         while self.running and self.cap and self.cap.isOpened():
             ret, frame = self.cap.read()
             if ret:
-                # Convert BGR to RGB directly using numpy (faster than cv2.cvtColor)
-                frame = frame[..., ::-1].copy()
+                # Frames stay BGR (self.pixel_format), consumers convert only if they must
                 self.queue.clear()
                 self.queue.append(frame)
                 
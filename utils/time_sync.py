@@ -0,0 +1,86 @@
+import time
+import logging
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FrameSet:
+    """Frames of all cameras that belong to one synchronized grab"""
+    seq: int
+    frames: Dict[int, Optional[np.ndarray]]
+    timestamps: Dict[int, float]   # Monotonic grab time per camera
+    read_latencies: Dict[int, float]  # Grab + retrieve time per camera in seconds
+    skew: float                    # Spread between the first and last grab in seconds
+
+@dataclass
+class SkewStats:
+    sets: int = 0
+    last_skew_ms: float = 0.0
+    mean_skew_ms: float = 0.0
+    max_skew_ms: float = 0.0
+
+class SynchronizedCapture:
+    """Capture several cameras as close together in time as possible.
+
+    All cameras are grabbed back to back first, which only latches the frame
+    in the driver, and the expensive retrieve/decode step then runs for all of
+    them in parallel. The timestamp of each frame is taken at grab time.
+    """
+    def __init__(self, caps: Dict[int, object], stats_window: int = 300):
+        self.caps = dict(caps)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.caps)),
+                                           thread_name_prefix="sync-retrieve")
+        self.seq = 0
+        self.skews = deque(maxlen=stats_window)
+        self.max_skew = 0.0
+
+    def capture(self) -> FrameSet:
+        """Grab every camera, then retrieve all grabbed frames in parallel"""
+        grab_started = {}
+        timestamps = {}
+        for camera_idx, cap in self.caps.items():
+            grab_started[camera_idx] = time.monotonic()
+            if cap.grab():
+                timestamps[camera_idx] = time.monotonic()
+            else:
+                logger.warning(f"Failed to grab frame from camera {camera_idx}")
+
+        futures = {camera_idx: self.executor.submit(self.caps[camera_idx].retrieve)
+                   for camera_idx in timestamps}
+        frames = {camera_idx: None for camera_idx in self.caps}
+        read_latencies = {}
+        for camera_idx, future in futures.items():
+            ret, frame = future.result()
+            if ret:
+                frames[camera_idx] = frame
+            else:
+                logger.warning(f"Failed to retrieve frame from camera {camera_idx}")
+            read_latencies[camera_idx] = time.monotonic() - grab_started[camera_idx]
+
+        grab_times = [timestamps[camera_idx] for camera_idx in timestamps if frames[camera_idx] is not None]
+        skew = max(grab_times) - min(grab_times) if len(grab_times) > 1 else 0.0
+        self.skews.append(skew)
+        self.max_skew = max(self.max_skew, skew)
+        self.seq += 1
+        return FrameSet(self.seq, frames, timestamps, read_latencies, skew)
+
+    def get_skew_stats(self) -> SkewStats:
+        """Inter-camera skew over recent frame sets"""
+        skews = list(self.skews)
+        if not skews:
+            return SkewStats()
+        return SkewStats(
+            sets=self.seq,
+            last_skew_ms=skews[-1] * 1000,
+            mean_skew_ms=sum(skews) / len(skews) * 1000,
+            max_skew_ms=self.max_skew * 1000,
+        )
+
+    def close(self):
+        """Shut down the retrieve workers"""
+        self.executor.shutdown(wait=True)